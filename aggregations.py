@@ -0,0 +1,291 @@
+"""Shared, memoized group-by aggregations over the permits dataset.
+
+Callers describe the aggregation they need instead of writing the group-by:
+
+    aggregate(df, ["Region", "Technology"], {"Number of Permits": (None, "size")}, version=version)
+
+Results are cached per dataset version (see data_loader.dataset_version) and
+CACHE_FORMAT_VERSION in a bounded in-memory LRU and in an on-disk Arrow cache
+shared by every process (API workers, Streamlit sessions), so a group-by is
+computed once per dataset version.
+A coarser grouping (e.g. by Technology) is rolled up from a cached finer one
+(e.g. Region × Technology) instead of rescanning the dataset.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+from data_loader import arrow_to_frame
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, concurrent misses may compute twice
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "aggregations")
+MAX_ENTRIES = 256
+MAX_CACHED_VERSIONS = 4
+# Part of every cache key: bump when compute/roll_up/finish or DERIVED_COLUMNS change
+# what a cached frame holds, so results written by older code are never reused
+CACHE_FORMAT_VERSION = 1
+
+# Columns derived from the dataset that can be grouped on or measured like real ones
+DERIVED_COLUMNS = {
+    "Submission Year": lambda df: df["Application Submission Date"].dt.year,
+    "Issuance Year": lambda df: df["Permit Issuance Date"].dt.year,
+    "Expiration Year": lambda df: df["Permit Expiration Date"].dt.year,
+    "Processing Time (Days)": lambda df: (df["Permit Issuance Date"] - df["Application Submission Date"]).dt.days,
+}
+
+# Permit count and capacity per region or regional unit, used by the maps and their
+# per-technology breakdowns
+PERMIT_TOTALS = {
+    "Permit ID": ("Permit ID", "count"),
+    "Installed Capacity (MW)": ("Installed Capacity (MW)", "sum"),
+}
+
+# How each cached measure is combined when rolling up to a coarser grouping.
+# "mean" is not stored; it is derived from the sum and count of its column.
+ROLLUPS = {"size": "sum", "count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+def column(df, name):
+    """Return a dataset column, computing it if it is one of DERIVED_COLUMNS."""
+    if name in df.columns:
+        return df[name]
+    if name in DERIVED_COLUMNS:
+        return DERIVED_COLUMNS[name](df).rename(name)
+    raise KeyError(f"Unknown column: {name}")
+
+
+def base_measures(measures):
+    """Stored measures ("func:column") needed to answer the requested measures."""
+    needed = set()
+    for column_name, func in measures.values():
+        if func == "mean":
+            needed |= {f"sum:{column_name}", f"count:{column_name}"}
+        elif func == "size":
+            needed.add("size:")
+        elif func in ROLLUPS:
+            needed.add(f"{func}:{column_name}")
+        else:
+            raise ValueError(f"Unsupported aggregation: {func}")
+    return needed
+
+
+def compute(df, grouping, row_filter, needed):
+    """Group the dataset by `grouping` (keeping missing keys) and compute the stored measures."""
+    if row_filter:
+        df = df.dropna(subset=list(row_filter))
+    data = {key: column(df, key) for key in grouping}
+    for measure in needed:
+        column_name = measure.split(":", 1)[1]
+        if column_name and column_name not in data:
+            data[column_name] = column(df, column_name)
+    grouped = pd.DataFrame(data).groupby(list(grouping), dropna=False)
+    results = {}
+    for measure in sorted(needed):
+        func, column_name = measure.split(":", 1)
+        results[measure] = grouped.size() if func == "size" else getattr(grouped[column_name], func)()
+    return pd.DataFrame(results)
+
+
+def roll_up(finer, grouping, needed):
+    """Combine a cached finer-grained result into the coarser `grouping`."""
+    return finer.groupby(level=list(grouping), dropna=False).agg(
+        {measure: ROLLUPS[measure.split(":", 1)[0]] for measure in sorted(needed)})
+
+
+def finish(frame, by, measures):
+    """Turn a cached result into the requested columns, in the requested key order."""
+    frame = frame.reset_index().dropna(subset=by)
+    if len(by) > 1 and tuple(by) != tuple(sorted(by)):
+        frame = frame.sort_values(by)
+    result = frame[by].reset_index(drop=True)
+    for name, (column_name, func) in measures.items():
+        if func == "mean":
+            values = frame[f"sum:{column_name}"] / frame[f"count:{column_name}"]
+        else:
+            values = frame["size:" if func == "size" else f"{func}:{column_name}"]
+        result[name] = values.to_numpy()
+    return result
+
+
+class AggregationCache:
+    """Bounded LRU of aggregation results per dataset version, backed by an on-disk cache."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()  # (version, row_filter, grouping) -> frame
+        self.views = OrderedDict()  # entry key + requested key order and measures -> finished frame
+        self.lock = threading.RLock()
+        self.computed = 0
+
+    def aggregate(self, df, by, measures, version=None, notna=()):
+        """Group `df` by the `by` columns and compute `measures` ({name: (column, func)}).
+
+        func is one of size, count, sum, min, max or mean. Rows missing any of the
+        `notna` columns are left out. Without a version nothing is cached, since the
+        frame cannot be identified (e.g. a filtered view of the dataset).
+        """
+        by = list(by)
+        grouping, row_filter = tuple(sorted(by)), tuple(sorted(notna))
+        needed = base_measures(measures)
+        if version is None:
+            return finish(compute(df, grouping, row_filter, needed), by, measures)
+
+        version = f"{version}-v{CACHE_FORMAT_VERSION}"
+        view_key = (version, row_filter, grouping, tuple(by), tuple(sorted(measures.items())))
+        with self.lock:
+            view = self.get(view_key, self.views)
+            if view is None:
+                frame = self.lookup(df, version, grouping, row_filter, needed)
+                view = self.put(view_key, finish(frame, by, measures), self.views)
+        # Callers may add or modify columns of the result
+        return view.copy()
+
+    def lookup(self, df, version, grouping, row_filter, needed):
+        key = (version, row_filter, grouping)
+        with self.lock:
+            frame = self.get(key)
+            if frame is not None and needed <= set(frame.columns):
+                return frame
+            # Another process may have computed it meanwhile: check the disk cache under its lock
+            with self.disk_lock(key):
+                stored = self.load(key)
+                existing = stored if stored is not None else frame
+                if existing is not None and needed <= set(existing.columns):
+                    return self.put(key, existing)
+                missing = needed - set(existing.columns) if existing is not None else needed
+                result = self.roll_up_from(key, missing)
+                if result is None:
+                    result = compute(df, grouping, row_filter, missing)
+                    self.computed += 1
+                if existing is not None:
+                    result = pd.concat([existing, result], axis=1)
+                self.save(key, result)
+                return self.put(key, result)
+
+    def get(self, key, store=None):
+        store = self.entries if store is None else store
+        frame = store.get(key)
+        if frame is not None:
+            store.move_to_end(key)
+        return frame
+
+    def put(self, key, frame, store=None):
+        store = self.entries if store is None else store
+        store[key] = frame
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+        return frame
+
+    def roll_up_from(self, key, needed):
+        """Roll up the smallest cached finer grouping (in memory or on disk) that has every needed measure."""
+        version, row_filter, grouping = key
+
+        def finer(candidate, columns):
+            return candidate[:2] == key[:2] and set(grouping) < set(candidate[2]) and needed <= set(columns)
+
+        candidates = [(len(frame), lambda frame=frame: frame)
+                      for candidate, frame in self.entries.items() if finer(candidate, frame.columns)]
+        candidates += [(rows, lambda path=path: self.read(path))
+                       for candidate, columns, rows, path in self.disk_index(version) if finer(candidate, columns)]
+        if not candidates:
+            return None
+        _, load = min(candidates, key=lambda candidate: candidate[0])
+        return roll_up(load(), grouping, needed)
+
+    # On-disk cache: one Arrow file per (row filter, grouping) in a directory per version
+
+    def path(self, key):
+        version, row_filter, grouping = key
+        digest = hashlib.sha1(json.dumps([row_filter, grouping]).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, version, digest + ".arrow")
+
+    @contextmanager
+    def disk_lock(self, key):
+        if not self.cache_dir or fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        with open(self.path(key) + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, key):
+        if not self.cache_dir or not os.path.exists(self.path(key)):
+            return None
+        return self.read(self.path(key))
+
+    def disk_index(self, version):
+        """Cached groupings of a version on disk, as (key, measures, rows, path), read from file metadata only."""
+        directory = os.path.join(self.cache_dir, version) if self.cache_dir else None
+        if not directory or not os.path.isdir(directory):
+            return []
+        index = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".arrow"):
+                path = os.path.join(directory, name)
+                with pa.memory_map(path, "r") as source:
+                    meta = json.loads(pa.ipc.open_file(source).schema.metadata[b"aggregation"])
+                key = (meta["version"], tuple(meta["filter"]), tuple(meta["grouping"]))
+                index.append((key, meta["measures"], meta["rows"], path))
+        return index
+
+    @staticmethod
+    def read(path):
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        grouping = json.loads(table.schema.metadata[b"aggregation"])["grouping"]
+        return arrow_to_frame(table).set_index(grouping)
+
+    def save(self, key, frame):
+        if not self.cache_dir:
+            return
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            self.prune_versions()
+        version, row_filter, grouping = key
+        meta = json.dumps({"version": version, "filter": row_filter, "grouping": grouping,
+                           "measures": list(frame.columns), "rows": len(frame)})
+        table = pa.Table.from_pandas(frame.reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({"aggregation": meta})
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The in-memory entry is still valid; another process will write the file
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune_versions(self):
+        """Keep only the most recently created dataset versions on disk."""
+        versions = sorted((os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)),
+                          key=os.path.getmtime, reverse=True)
+        for stale in versions[MAX_CACHED_VERSIONS:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+cache = AggregationCache(cache_dir=os.environ.get("AGGREGATION_CACHE_DIR", DEFAULT_CACHE_DIR) or None)
+
+
+def aggregate(df, by, measures, version=None, notna=()):
+    """Memoized group-by on the shared cache; see AggregationCache.aggregate."""
+    return cache.aggregate(df, by, measures, version=version, notna=notna)
@@ -0,0 +1,136 @@
+"""Data for the /visualization/* charts, built on the shared aggregation layer.
+
+Several charts aggregate the same keys: permit_distribution, sankey_permits and
+energy_mix all group by Region × Technology, while permits_over_time,
+technology_growth and permit_type_distribution all group by submission Year ×
+Technology. Their group-bys go through aggregations.aggregate, which memoizes them
+per dataset version and rolls coarser groupings up from finer cached ones, so
+/dashboard/bundle and POST /batch compute each of them at most once.
+"""
+from functools import cached_property
+
+import pandas as pd
+
+from aggregations import AggregationCache, cache
+from metrics import timed
+
+CAPACITY = "Installed Capacity (MW)"
+PERMIT_COUNT = {"Number of Permits": (None, "size")}
+CAPACITY_SUM = {CAPACITY: (CAPACITY, "sum")}
+
+
+class SharedGroupBys:
+    """Aggregations and derived columns shared by the charts of one request.
+
+    With a dataset version the process-wide aggregation cache is used; without one
+    the results are only shared within this request.
+    """
+
+    def __init__(self, df, version=None):
+        self.df = df
+        self.version = version if version is not None else "request"
+        self.cache = cache if version is not None else AggregationCache()
+
+    def aggregate(self, by, measures, year_column=None):
+        result = self.cache.aggregate(self.df, by, measures, version=self.version)
+        return result.rename(columns={year_column: "Year"}) if year_column else result
+
+    @cached_property
+    def processing_days(self):
+        return (self.df["Permit Issuance Date"] - self.df["Application Submission Date"]).dt.days.rename("Processing Time (Days)")
+
+
+def permit_distribution(shared):
+    return shared.aggregate(["Region", "Technology"], PERMIT_COUNT)
+
+
+def permits_over_time(shared):
+    return shared.aggregate(["Submission Year"], PERMIT_COUNT, "Submission Year")
+
+
+def technology_growth(shared):
+    return shared.aggregate(["Submission Year", "Technology"], CAPACITY_SUM, "Submission Year")
+
+
+def installed_capacity(shared):
+    return shared.aggregate(["Technology"], CAPACITY_SUM)
+
+
+def top_permits(shared):
+    return shared.df.nlargest(10, CAPACITY)[["Permit ID", "Company", CAPACITY, "Technology"]]
+
+
+def energy_mix(shared):
+    return shared.aggregate(["Region", "Technology"], CAPACITY_SUM)
+
+
+def expiring_permits(shared):
+    return shared.aggregate(["Expiration Year", "Technology"], PERMIT_COUNT, "Expiration Year")
+
+
+def cumulative_installed_capacity(shared):
+    tech_capacity = shared.aggregate(["Issuance Year", "Technology"], CAPACITY_SUM, "Issuance Year")
+    total_capacity = shared.aggregate(["Issuance Year"], CAPACITY_SUM, "Issuance Year")
+    total_capacity[CAPACITY] = total_capacity[CAPACITY].cumsum()
+    total_capacity["Technology"] = "Total"
+    tech_capacity[CAPACITY] = tech_capacity.groupby("Technology")[CAPACITY].cumsum()
+    return pd.concat([total_capacity, tech_capacity], ignore_index=True)
+
+
+def permit_type_distribution(shared):
+    return shared.aggregate(["Submission Year", "Technology"], PERMIT_COUNT, "Submission Year")
+
+
+def sankey_permits(shared):
+    return permit_distribution(shared)
+
+
+def processing_time(shared):
+    return shared.aggregate(["Submission Year"], {"Processing Time (Days)": ("Processing Time (Days)", "mean")}, "Submission Year")
+
+
+def violin_processing_time(shared):
+    days = shared.processing_days
+    positive = days > 0
+    return days[positive].groupby(shared.df["Technology"][positive]).apply(list)
+
+
+# Chart name -> builder. The name is the /visualization/<name> route. Charts grouping
+# by Year × Technology come before those by Year alone, so a bundle computes the finer
+# group-by first and rolls the coarser one up from it.
+DATASETS = {
+    "permit_distribution": permit_distribution,
+    "technology_growth": technology_growth,
+    "permit_type_distribution": permit_type_distribution,
+    "permits_over_time": permits_over_time,
+    "installed_capacity": installed_capacity,
+    "top_permits": top_permits,
+    "energy_mix": energy_mix,
+    "expiring_permits": expiring_permits,
+    "cumulative_installed_capacity": cumulative_installed_capacity,
+    "sankey_permits": sankey_permits,
+    "processing_time": processing_time,
+    "violin_processing_time": violin_processing_time,
+}
+
+
+def dataset_name(requested):
+    """Accept either a chart name or its /visualization/<name> route."""
+    return requested.strip().rstrip("/").rsplit("/", 1)[-1]
+
+
+def build_dataset(name, df, version=None, shared=None):
+    """Compute one chart's JSON-ready data."""
+    shared = shared or SharedGroupBys(df, version)
+    with timed("groupby"):
+        result = DATASETS[name](shared)
+    with timed("to_dict"):
+        if isinstance(result, pd.DataFrame):
+            return result.to_dict(orient="records")
+        return result.to_dict()
+
+
+def build_bundle(names, df, version=None):
+    """Compute several charts at once, sharing their intermediate group-bys."""
+    shared = SharedGroupBys(df, version)
+    return {name: build_dataset(name, df, version, shared) for name in names}
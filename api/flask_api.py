@@ -1,19 +1,98 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 import sys
 import os
+import time
 import pandas as pd
 import json
+from datetime import datetime, timezone
+from functools import lru_cache
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from data_loader import load_data
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from data_loader import load_data, dataset_version
+from metrics import init_metrics, timed
+from profiling import init_profiling
+from aggregations import PERMIT_TOTALS, aggregate
+from geocoding import default_geocoder
+from clustering import ClusterIndex, MAX_ZOOM, MIN_ZOOM
+from hexgrid import HexBins, RESOLUTIONS
+from expirations import ExpirationIndex
+from search import SEARCH_FIELDS, SearchIndex
+from permits import HIDDEN_COLUMNS, PermitIndex, PermitVersions, json_column
+from history import HistoryStore, history_path, parse_month
+from portfolios import CompanyPortfolios, MEASURES, PORTFOLIO_COLUMNS
+from timeseries import ActiveCapacity, CapacityTimeSeries, DATE_RANGE, GRANULARITIES
+from dashboard import DATASETS, build_bundle, build_dataset, dataset_name
 
 from flask_cors import CORS # just in case...
 app = Flask(__name__)
 CORS(app)
+init_metrics(app)
+init_profiling(app)
+
+
+# Loaded dataset, reported by /health/ready. The dataset and every index are built
+# at import, before the app can serve a request: under gunicorn (preload_app) in the
+# master, shared copy-on-write by the workers, which are forked afterwards. So handlers
+# must never add or overwrite columns of the global df.
+dataset_state = {"status": None, "version": None, "rows": 0, "loaded_at": None, "load_seconds": None}
+
+
+def load_dataset():
+    """Load the processed permits dataset and record its version for /health/ready."""
+    start = time.perf_counter()
+    dataset = load_data()
+    dataset_state.update(
+        status="loaded",
+        version=dataset_version(),
+        rows=len(dataset),
+        loaded_at=datetime.now(timezone.utc).isoformat(),
+        load_seconds=round(time.perf_counter() - start, 3),
+    )
+    return dataset
 
 
 # Load the dataset (processed permits data)
-df = load_data()
+df = load_dataset()
+
+# Build the reverse geocoder's spatial indexes up front so workers share them
+geocoder = default_geocoder()
+
+# Precompute the map clusters of every zoom level and the hexagon heatmap bins once per dataset
+cluster_index = ClusterIndex(df)
+hex_bins = HexBins(df)
+
+# Daily prefix sums of issued capacity and the capacity in force per day, for date queries
+# without scanning the dataset
+capacity_series = CapacityTimeSeries(df)
+active_capacity = ActiveCapacity(df)
+
+# Permits sorted by expiration date per technology and region, for the watchlist
+expiration_index = ExpirationIndex(df)
+
+# Trigram index over companies, permit IDs and municipalities
+search_index = SearchIndex(df)
+permit_ids = df["Permit ID"].astype(str).to_numpy()
+
+# Hash index from Permit ID to its record
+permit_index = PermitIndex(df)
+
+# Per-company aggregates for the portfolio leaderboards
+portfolios = CompanyPortfolios(df, version=dataset_state["version"])
+
+# Year/month partitioned monthly snapshots for as_of queries (empty until preprocess_data.py writes them)
+history_store = HistoryStore(history_path())
+
+# Every monthly version of a permit, returned with its record (read per request, recent ones cached)
+permit_versions = PermitVersions(history_store)
+
+COMPANIES_MAX_TOP = 1000
+# Snapshot months whose portfolios are kept in memory for /companies?as_of
+SNAPSHOT_PORTFOLIOS_CACHED = 32
+PERMIT_LOOKUP_MAX_IDS = 1000
+SEARCH_MAX_LIMIT = 100
+WATCHLIST_MAX_DAYS = 36500
+WATCHLIST_MAX_LIMIT = 500
 
 
 @app.route("/")
@@ -30,6 +109,36 @@ def home():
     return jsonify({"message": "Renewable Energy Permits API"})
 
 
+@app.route("/health/live", methods=["GET"])
+def get_liveness():
+    """
+    Liveness Probe
+    ---
+    description: Returns 200 as long as the worker process is able to serve requests.
+    responses:
+      200:
+        description: Worker is alive
+        examples:
+          application/json: { "status": "alive", "pid": 42 }
+    """
+    return jsonify({"status": "alive", "pid": os.getpid()})
+
+
+@app.route("/health/ready", methods=["GET"])
+def get_readiness():
+    """
+    Readiness Probe
+    ---
+    description: Reports the loaded permits dataset, with its version (content hash), size and load time. The dataset and indexes are built before the app accepts connections (in the gunicorn master, before the workers are forked), so a worker that answers is ready and this probe succeeds exactly when /health/live does; use it to check which dataset version is served.
+    responses:
+      200:
+        description: Dataset loaded, ready to serve traffic
+        examples:
+          application/json: { "status": "loaded", "version": "3f2a9c1b7d4e", "rows": 4310, "loaded_at": "2025-01-10T08:00:00+00:00", "load_seconds": 1.52, "pid": 42 }
+    """
+    return jsonify(dict(dataset_state, pid=os.getpid()))
+
+
 @app.route("/geojson/regions", methods=["GET"])
 def get_regions_geojson():
     geojson_path = os.path.join("data", "geo", "greece-regions.geojson")
@@ -48,6 +157,43 @@ def get_regional_units_geojson():
     except Exception as e:
         return jsonify({"error": f"Could not load GeoJSON: {str(e)}"}), 500
 
+@app.route("/geo/lookup", methods=["GET"])
+def get_geo_lookup():
+    """
+    Reverse Geocode a Point
+    ---
+    description: Returns the region and regional unit (prefecture) containing a WGS84 point. Points outside every polygon (e.g. offshore) are matched to the nearest one, with match "nearest" and the distance in degrees.
+    parameters:
+      - name: lat
+        in: query
+        type: number
+        required: true
+        example: 37.98
+      - name: lon
+        in: query
+        type: number
+        required: true
+        example: 23.72
+    responses:
+      200:
+        description: Matching region and regional unit
+        examples:
+          application/json: {
+            "lat": 37.98, "lon": 23.72,
+            "region": { "name": "Attica", "name_greek": "Αττική", "match": "within", "distance": 0.0 },
+            "regional_unit": { "name": "Athens", "name_greek": "Αθήνα", "match": "within", "distance": 0.0 }
+          }
+      400:
+        description: Missing or invalid coordinates
+    """
+    lat = request.args.get("lat", type=float)
+    lon = request.args.get("lon", type=float)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({"error": "Query parameters lat and lon must be valid WGS84 coordinates"}), 400
+    with timed("geocode"):
+        match = geocoder.lookup(lat, lon)
+    return jsonify({"lat": lat, "lon": lon, "region": match["regions"], "regional_unit": match["regional_units"]})
+
 
 ######################### THIS IS WHERE DATA FOR EACH VISUALIZATION STARTS #########################
 
@@ -83,9 +229,7 @@ def get_permit_distribution():
             { "Region": "Crete", "Technology": "Wind", "Number of Permits": 18 }
           ]
     """
-
-    permit_counts = df.groupby(["Region", "Technology"]).size().reset_index(name="Number of Permits")
-    return jsonify(permit_counts.to_dict(orient="records"))
+    return jsonify(build_dataset("permit_distribution", df, dataset_state["version"]))
 
 
 
@@ -116,10 +260,7 @@ def get_permits_over_time():
             { "Year": 2021, "Number of Permits": 58 }
           ]
     """
-
-    df["Year"] = df["Application Submission Date"].dt.year
-    permits_per_year = df.groupby("Year").size().reset_index(name="Number of Permits")
-    return jsonify(permits_per_year.to_dict(orient="records"))
+    return jsonify(build_dataset("permits_over_time", df, dataset_state["version"]))
 
 
 @app.route("/visualization/technology_growth", methods=["GET"])
@@ -152,9 +293,7 @@ def get_technology_growth():
             { "Year": 2020, "Technology": "Wind", "Installed Capacity (MW)": 150.5 }
           ]
     """
-    df["Year"] = df["Application Submission Date"].dt.year
-    tech_trends = df.groupby(["Year", "Technology"])["Installed Capacity (MW)"].sum().reset_index()
-    return jsonify(tech_trends.to_dict(orient="records"))
+    return jsonify(build_dataset("technology_growth", df, dataset_state["version"]))
 
 
 @app.route("/visualization/installed_capacity", methods=["GET"])
@@ -184,8 +323,7 @@ def get_installed_capacity():
             { "Technology": "Wind", "Installed Capacity (MW)": 380.2 }
           ]
     """
-    capacity = df.groupby("Technology")["Installed Capacity (MW)"].sum().reset_index()
-    return jsonify(capacity.to_dict(orient="records"))
+    return jsonify(build_dataset("installed_capacity", df, dataset_state["version"]))
 
 
 @app.route("/visualization/top_permits", methods=["GET"])
@@ -221,8 +359,7 @@ def get_top_permits():
             { "Permit ID": "PERMIT67890", "Company": "Solar Solutions", "Installed Capacity (MW)": 280.3, "Technology": "Solar" }
           ]
     """
-    top_permits = df.nlargest(10, "Installed Capacity (MW)")[["Permit ID", "Company", "Installed Capacity (MW)", "Technology"]]
-    return jsonify(top_permits.to_dict(orient="records"))
+    return jsonify(build_dataset("top_permits", df, dataset_state["version"]))
 
 
 @app.route("/visualization/energy_mix", methods=["GET"])
@@ -255,8 +392,7 @@ def get_energy_mix():
             { "Region": "Attica", "Technology": "Wind", "Installed Capacity (MW)": 400.5 }
           ]
     """
-    energy_mix = df.groupby(["Region", "Technology"])["Installed Capacity (MW)"].sum().reset_index()
-    return jsonify(energy_mix.to_dict(orient="records"))
+    return jsonify(build_dataset("energy_mix", df, dataset_state["version"]))
 
 
 @app.route("/visualization/expiring_permits", methods=["GET"])
@@ -289,9 +425,7 @@ def get_expiring_permits():
             { "Year": 2026, "Technology": "Solar", "Number of Permits": 20 }
           ]
     """
-    df["Year"] = df["Permit Expiration Date"].dt.year
-    expiration_counts = df.groupby(["Year", "Technology"]).size().reset_index(name="Number of Permits")
-    return jsonify(expiration_counts.to_dict(orient="records"))
+    return jsonify(build_dataset("expiring_permits", df, dataset_state["version"]))
 
 
 @app.route("/visualization/cumulative_installed_capacity", methods=["GET"])
@@ -324,12 +458,7 @@ def get_cumulative_installed_capacity():
             { "Year": 2024, "Installed Capacity (MW)": 800.0, "Technology": "Solar" }
           ]
     """
-    df["Year"] = df["Permit Issuance Date"].dt.year
-    total_capacity = df.groupby("Year")["Installed Capacity (MW)"].sum().cumsum().reset_index()
-    total_capacity["Technology"] = "Total"
-    tech_capacity = df.groupby(["Year", "Technology"])["Installed Capacity (MW)"].sum().groupby(level=1).cumsum().reset_index()
-    combined_capacity = pd.concat([total_capacity, tech_capacity], ignore_index=True)
-    return jsonify(combined_capacity.to_dict(orient="records"))
+    return jsonify(build_dataset("cumulative_installed_capacity", df, dataset_state["version"]))
 
 
 @app.route("/visualization/permit_type_distribution", methods=["GET"])
@@ -362,9 +491,7 @@ def get_permit_type_distribution():
             { "Year": 2023, "Technology": "Solar", "Number of Permits": 35 }
           ]
     """
-    df["Year"] = df["Application Submission Date"].dt.year
-    permit_trends = df.groupby(["Year", "Technology"]).size().reset_index(name="Number of Permits")
-    return jsonify(permit_trends.to_dict(orient="records"))
+    return jsonify(build_dataset("permit_type_distribution", df, dataset_state["version"]))
 
 
 @app.route("/visualization/sankey_permits", methods=["GET"])
@@ -389,8 +516,7 @@ def get_sankey_permits():
               Number of Permits:
                 type: integer
     """
-    permit_counts = df.groupby(["Region", "Technology"]).size().reset_index(name="Number of Permits")
-    return jsonify(permit_counts.to_dict(orient="records"))
+    return jsonify(build_dataset("sankey_permits", df, dataset_state["version"]))
 
 
 
@@ -412,10 +538,7 @@ def get_processing_time():
               Processing Time (Days):
                 type: number
     """
-    df["Processing Time (Days)"] = (df["Permit Issuance Date"] - df["Application Submission Date"]).dt.days
-    df["Year"] = df["Application Submission Date"].dt.year
-    processing_time_trends = df.groupby("Year")["Processing Time (Days)"].mean().reset_index()
-    return jsonify(processing_time_trends.to_dict(orient="records"))
+    return jsonify(build_dataset("processing_time", df, dataset_state["version"]))
 
 
 @app.route("/visualization/violin_processing_time", methods=["GET"])
@@ -440,80 +563,148 @@ def get_violin_processing_time():
             "Wind": [25, 40, 55, 70]
           }
     """
-    df_filtered = df.copy()
-    df_filtered["Processing Time (Days)"] = (df_filtered["Permit Issuance Date"] - df_filtered["Application Submission Date"]).dt.days
-    df_filtered = df_filtered[df_filtered["Processing Time (Days)"] > 0]
-    violin_data = df_filtered.groupby("Technology")["Processing Time (Days)"].apply(list).to_dict()
-    return jsonify(violin_data)
+    return jsonify(build_dataset("violin_processing_time", df, dataset_state["version"]))
+
+
+# ✅ BUNDLED VISUALIZATION ENDPOINTS (one round-trip per dashboard page load)
+
+def resolve_datasets(requested):
+    """Map requested chart names or /visualization/ routes to dataset names, or None if any is unknown."""
+    names = [dataset_name(item) for item in requested if item.strip()]
+    if not names or any(name not in DATASETS for name in names):
+        return None
+    return list(dict.fromkeys(names))
+
+
+@app.route("/dashboard/bundle", methods=["GET"])
+def get_dashboard_bundle():
+    """
+    Get All Dashboard Visualization Data
+    ---
+    description: Returns the data of several /visualization/* charts in one response, keyed by chart name. Intermediate group-bys shared between charts (e.g. Region × Technology, submission Year × Technology) are computed once. Each value is identical to the corresponding /visualization/<name> response.
+    parameters:
+      - name: datasets
+        in: query
+        type: string
+        required: false
+        description: Comma-separated chart names (default all), e.g. permit_distribution,energy_mix
+    responses:
+      200:
+        description: Chart data keyed by chart name
+        examples:
+          application/json: {
+            "permit_distribution": [ { "Region": "Attica", "Technology": "Solar", "Number of Permits": 25 } ],
+            "energy_mix": [ { "Region": "Attica", "Technology": "Solar", "Installed Capacity (MW)": 300.5 } ]
+          }
+      400:
+        description: Unknown chart name
+    """
+    requested = request.args.get("datasets")
+    names = resolve_datasets(requested.split(",")) if requested else list(DATASETS)
+    if names is None:
+        return jsonify({"error": f"Unknown dataset, expected any of: {', '.join(DATASETS)}"}), 400
+    return jsonify(build_bundle(names, df, dataset_state["version"]))
+
+
+@app.route("/batch", methods=["POST"])
+def post_batch():
+    """
+    Get Visualization Data in Batch
+    ---
+    description: Returns the data of an arbitrary subset of /visualization/* charts in one request, sharing intermediate group-bys between them. Accepts chart names or their routes.
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            datasets:
+              type: array
+              items:
+                type: string
+              example: ["/visualization/permit_distribution", "sankey_permits", "energy_mix"]
+    responses:
+      200:
+        description: Chart data keyed by chart name
+      400:
+        description: Missing or unknown chart names
+    """
+    body = request.get_json(silent=True) or {}
+    requested = body.get("datasets") if isinstance(body, dict) else None
+    names = resolve_datasets(requested) if isinstance(requested, list) and all(isinstance(item, str) for item in requested) else None
+    if names is None:
+        return jsonify({"error": f"Body must be {{\"datasets\": [...]}} with any of: {', '.join(DATASETS)}"}), 400
+    return jsonify(build_bundle(names, df, dataset_state["version"]))
 
 
 
 def get_map_regions(df_regions):
     """Processes and returns Region-level permit data."""
-    region_summary = df_regions.groupby("Region").agg({
-        "Permit ID": "count",
-        "Installed Capacity (MW)": "sum"
-    }).reset_index()
-
-    region_tech_breakdown = df_regions.groupby(["Region", "Technology"])["Installed Capacity (MW)"].sum().reset_index()
-
-    region_data = []
-    for _, row in region_summary.iterrows():
-        region = row["Region"]
-        total_permits = int(row["Permit ID"])
-        total_capacity = float(row["Installed Capacity (MW)"])
-
-        # Get technology breakdown for this region
-        tech_data = region_tech_breakdown[region_tech_breakdown["Region"] == region]
-        tech_breakdown = {tech: round(capacity, 2) for tech, capacity in
-                          zip(tech_data["Technology"], tech_data["Installed Capacity (MW)"])}
-
-        # Find latitude & longitude (guaranteed not NaN)
-        lat, lon = df_regions[df_regions["Region"] == region].iloc[0][["LAT", "LON"]]
-
-        region_data.append({
-            "region": region,
-            "total_permits": total_permits,
-            "total_capacity_mw": total_capacity,
-            "technology_breakdown": tech_breakdown,
-            "lat": lat,
-            "lon": lon
-        })
+    with timed("groupby"):
+        region_tech_breakdown = aggregate(df, ["Region", "Technology"], PERMIT_TOTALS,
+                                          version=dataset_state["version"], notna=["LAT", "LON"])
+        region_summary = aggregate(df, ["Region"], PERMIT_TOTALS,
+                                   version=dataset_state["version"], notna=["LAT", "LON"])
+
+    with timed("to_dict"):
+        region_data = []
+        for _, row in region_summary.iterrows():
+            region = row["Region"]
+            total_permits = int(row["Permit ID"])
+            total_capacity = float(row["Installed Capacity (MW)"])
+
+            # Get technology breakdown for this region
+            tech_data = region_tech_breakdown[region_tech_breakdown["Region"] == region]
+            tech_breakdown = {tech: round(capacity, 2) for tech, capacity in
+                              zip(tech_data["Technology"], tech_data["Installed Capacity (MW)"])}
+
+            # Find latitude & longitude (guaranteed not NaN)
+            lat, lon = df_regions[df_regions["Region"] == region].iloc[0][["LAT", "LON"]]
+
+            region_data.append({
+                "region": region,
+                "total_permits": total_permits,
+                "total_capacity_mw": total_capacity,
+                "technology_breakdown": tech_breakdown,
+                "lat": lat,
+                "lon": lon
+            })
 
     return region_data
 
 
 def get_map_regional_units(df_units):
     """Processes and returns Regional Unit-level permit data."""
-    unit_summary = df_units.groupby("Regional Unit").agg({
-        "Permit ID": "count",
-        "Installed Capacity (MW)": "sum"
-    }).reset_index()
-
-    unit_tech_breakdown = df_units.groupby(["Regional Unit", "Technology"])["Installed Capacity (MW)"].sum().reset_index()
-
-    unit_data = []
-    for _, row in unit_summary.iterrows():
-        unit = row["Regional Unit"]
-        total_permits = int(row["Permit ID"])
-        total_capacity = float(row["Installed Capacity (MW)"])
-
-        # Get technology breakdown for this unit
-        tech_data = unit_tech_breakdown[unit_tech_breakdown["Regional Unit"] == unit]
-        tech_breakdown = {tech: round(capacity, 2) for tech, capacity in
-                          zip(tech_data["Technology"], tech_data["Installed Capacity (MW)"])}
-
-        # Find latitude & longitude (guaranteed not NaN)
-        lat, lon = df_units[df_units["Regional Unit"] == unit].iloc[0][["LAT_UNIT", "LON_UNIT"]]
-
-        unit_data.append({
-            "regional_unit": unit,
-            "total_permits": total_permits,
-            "total_capacity_mw": total_capacity,
-            "technology_breakdown": tech_breakdown,
-            "lat": lat,
-            "lon": lon
-        })
+    with timed("groupby"):
+        unit_tech_breakdown = aggregate(df, ["Regional Unit", "Technology"], PERMIT_TOTALS,
+                                        version=dataset_state["version"], notna=["LAT_UNIT", "LON_UNIT"])
+        unit_summary = aggregate(df, ["Regional Unit"], PERMIT_TOTALS,
+                                 version=dataset_state["version"], notna=["LAT_UNIT", "LON_UNIT"])
+
+    with timed("to_dict"):
+        unit_data = []
+        for _, row in unit_summary.iterrows():
+            unit = row["Regional Unit"]
+            total_permits = int(row["Permit ID"])
+            total_capacity = float(row["Installed Capacity (MW)"])
+
+            # Get technology breakdown for this unit
+            tech_data = unit_tech_breakdown[unit_tech_breakdown["Regional Unit"] == unit]
+            tech_breakdown = {tech: round(capacity, 2) for tech, capacity in
+                              zip(tech_data["Technology"], tech_data["Installed Capacity (MW)"])}
+
+            # Find latitude & longitude (guaranteed not NaN)
+            lat, lon = df_units[df_units["Regional Unit"] == unit].iloc[0][["LAT_UNIT", "LON_UNIT"]]
+
+            unit_data.append({
+                "regional_unit": unit,
+                "total_permits": total_permits,
+                "total_capacity_mw": total_capacity,
+                "technology_breakdown": tech_breakdown,
+                "lat": lat,
+                "lon": lon
+            })
 
     return unit_data
 
@@ -541,8 +732,9 @@ def get_map_permits():
     """
     global df
 
-    df_regions = df.dropna(subset=["LAT", "LON"])
-    df_units = df.dropna(subset=["LAT_UNIT", "LON_UNIT"])
+    with timed("filter"):
+        df_regions = df.dropna(subset=["LAT", "LON"])
+        df_units = df.dropna(subset=["LAT_UNIT", "LON_UNIT"])
 
     regions_data = get_map_regions(df_regions)
     units_data = get_map_regional_units(df_units)
@@ -553,6 +745,576 @@ def get_map_permits():
     })
 
 
+@app.route("/map/clusters", methods=["GET"])
+def get_map_clusters():
+    """
+    Get Clustered Permits for a Map Viewport
+    ---
+    visualization_type: Map with Clustered Markers
+    description: Returns the permit clusters visible in a bounding box at a web-map zoom level. Clusters are precomputed per zoom level, so the response only contains what is in view. A cluster of a single permit also carries its permit_id, company and technology. Permits are placed at their regional unit (or region) coordinates.
+    parameters:
+      - name: bbox
+        in: query
+        type: string
+        required: true
+        description: Viewport as min_lon,min_lat,max_lon,max_lat
+        example: 19.0,34.5,29.0,42.0
+      - name: zoom
+        in: query
+        type: integer
+        required: true
+        example: 7
+    responses:
+      200:
+        description: Clusters in the viewport
+        examples:
+          application/json: {
+            "zoom": 7, "bbox": [19.0, 34.5, 29.0, 42.0],
+            "clusters": [
+              { "lat": 38.37, "lon": 23.101, "count": 424, "capacity_mw": 4769.2, "technologies": {"Photovoltaics": 138, "Wind Power": 278} }
+            ]
+          }
+      400:
+        description: Missing or invalid bbox or zoom
+    """
+    zoom = request.args.get("zoom", type=int)
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in request.args.get("bbox", "").split(","))
+    except ValueError:
+        return jsonify({"error": "Query parameter bbox must be min_lon,min_lat,max_lon,max_lat"}), 400
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        return jsonify({"error": "Query parameter bbox must be a valid WGS84 bounding box"}), 400
+    if zoom is None or not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        return jsonify({"error": f"Query parameter zoom must be an integer between {MIN_ZOOM} and {MAX_ZOOM}"}), 400
+
+    with timed("filter"):
+        clusters = cluster_index.clusters(min_lat, min_lon, max_lat, max_lon, zoom)
+    return jsonify({"zoom": zoom, "bbox": [min_lon, min_lat, max_lon, max_lat], "clusters": clusters})
+
+
+@app.route("/map/hexbins", methods=["GET"])
+def get_map_hexbins():
+    """
+    Get Hexagonal Heatmap of Permits
+    ---
+    visualization_type: Hexbin Heatmap
+    description: Returns permit count and installed capacity binned into hexagons as a GeoJSON FeatureCollection. Resolution 0 uses hexagons of about 60 km, each further resolution halves their size. Only occupied hexagons are returned.
+    parameters:
+      - name: resolution
+        in: query
+        type: integer
+        required: false
+        default: 2
+        example: 2
+      - name: technology
+        in: query
+        type: string
+        required: false
+        example: Wind Power
+    responses:
+      200:
+        description: GeoJSON hexagons with count and capacity_mw properties
+        examples:
+          application/json: {
+            "type": "FeatureCollection",
+            "features": [
+              { "type": "Feature", "geometry": { "type": "Polygon", "coordinates": [[[20.78, 38.21], [20.62, 38.14], [20.47, 38.21], [20.47, 38.35], [20.62, 38.42], [20.78, 38.35], [20.78, 38.21]]] },
+                "properties": { "count": 9, "capacity_mw": 130.3 } }
+            ]
+          }
+      400:
+        description: Invalid resolution or unknown technology
+    """
+    resolution = request.args.get("resolution", "2")
+    technology = request.args.get("technology") or None
+    resolution = int(resolution) if resolution.isdigit() else None
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"Query parameter resolution must be an integer between {RESOLUTIONS[0]} and {RESOLUTIONS[-1]}"}), 400
+    if technology is not None and technology not in hex_bins.technologies:
+        return jsonify({"error": f"Unknown technology: {technology}"}), 400
+
+    with timed("filter"):
+        heatmap = hex_bins.heatmap(resolution, technology)
+    return jsonify(heatmap)
+
+
+# ✅ TIME SERIES ENDPOINTS
+
+def parse_date(name):
+    """Read an optional query date; raises ValueError if it is invalid or outside DATE_RANGE."""
+    if not request.args.get(name):
+        return None
+    date = pd.Timestamp(request.args[name])
+    if date.tzinfo is not None or not DATE_RANGE[0] <= date <= DATE_RANGE[1]:
+        raise ValueError(f"{name} is outside {DATE_RANGE[0].year}-{DATE_RANGE[1].year}")
+    return date
+
+
+def parse_date_range():
+    """Read the optional from/to query dates; raises ValueError if they are invalid."""
+    start, end = parse_date("from"), parse_date("to")
+    if start is not None and end is not None and start > end:
+        raise ValueError("from is after to")
+    return start, end
+
+
+@app.route("/timeseries/capacity", methods=["GET"])
+def get_timeseries_capacity():
+    """
+    Get Issued Capacity per Period
+    ---
+    visualization_type: Time Series
+    description: Returns the installed capacity and number of permits issued per day, month, quarter or year between two dates, with the cumulative capacity issued up to the end of each period. Periods are clipped to the requested range. Each period is answered from daily prefix sums, without scanning the dataset.
+    parameters:
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: First day (defaults to the first issuance date)
+        example: "2020-01-01"
+      - name: to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Last day, inclusive (defaults to the last issuance date)
+        example: "2020-12-31"
+      - name: granularity
+        in: query
+        type: string
+        enum: [day, month, quarter, year]
+        default: month
+      - name: technology
+        in: query
+        type: string
+        required: false
+        example: Wind Power
+      - name: region
+        in: query
+        type: string
+        required: false
+        example: Attica
+    responses:
+      200:
+        description: Capacity issued per period
+        examples:
+          application/json: {
+            "granularity": "month", "technology": "Wind Power", "region": null,
+            "series": [
+              { "period": "2020-02", "start": "2020-02-01", "end": "2020-02-29", "capacity_mw": 95.18, "permits": 11, "cumulative_capacity_mw": 16473.867 }
+            ]
+          }
+      400:
+        description: Invalid dates, granularity, technology or region
+    """
+    granularity = request.args.get("granularity", "month")
+    technology = request.args.get("technology") or None
+    region = request.args.get("region") or None
+    try:
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({"error": "Query parameters from and to must be dates (YYYY-MM-DD) between "
+                                 f"{DATE_RANGE[0]:%Y-%m-%d} and {DATE_RANGE[1]:%Y-%m-%d} with from <= to"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"Query parameter granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+    if (technology, region) not in capacity_series.columns:
+        return jsonify({"error": "Unknown technology or region"}), 400
+
+    with timed("groupby"):
+        series = capacity_series.query(start, end, granularity, technology, region)
+    return jsonify({"granularity": granularity, "technology": technology, "region": region, "series": series})
+
+
+@app.route("/timeseries/active_capacity", methods=["GET"])
+def get_timeseries_active_capacity():
+    """
+    Get Capacity in Force
+    ---
+    visualization_type: Time Series
+    description: Returns the installed capacity and number of permits licensed and not yet expired (issuance <= date < expiration). With a date, returns that single day; otherwise returns the level on the last day of each period between from and to. Every value is a lookup into a daily curve precomputed with a sweep over the permit intervals.
+    parameters:
+      - name: date
+        in: query
+        type: string
+        format: date
+        required: false
+        example: "2023-03-15"
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        example: "2010-01-01"
+      - name: to
+        in: query
+        type: string
+        format: date
+        required: false
+        example: "2024-12-31"
+      - name: granularity
+        in: query
+        type: string
+        enum: [day, month, quarter, year]
+        default: month
+      - name: technology
+        in: query
+        type: string
+        required: false
+        example: Wind Power
+      - name: region
+        in: query
+        type: string
+        required: false
+        example: Attica
+    responses:
+      200:
+        description: Capacity in force on the date, or per period
+        examples:
+          application/json: {
+            "granularity": "year", "technology": null, "region": null,
+            "series": [
+              { "period": "2010", "date": "2010-12-31", "capacity_mw": 8611.871, "permits": 1077 }
+            ]
+          }
+      400:
+        description: Invalid dates, granularity, technology or region
+    """
+    granularity = request.args.get("granularity", "month")
+    technology = request.args.get("technology") or None
+    region = request.args.get("region") or None
+    try:
+        date = parse_date("date")
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({"error": "Query parameters date, from and to must be dates (YYYY-MM-DD) between "
+                                 f"{DATE_RANGE[0]:%Y-%m-%d} and {DATE_RANGE[1]:%Y-%m-%d} with from <= to"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"Query parameter granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+    if (technology, region) not in active_capacity.columns:
+        return jsonify({"error": "Unknown technology or region"}), 400
+
+    with timed("groupby"):
+        if date is not None:
+            result = active_capacity.on(date, technology, region)
+        else:
+            result = {"granularity": granularity, "series": active_capacity.query(start, end, granularity, technology, region)}
+    return jsonify({"technology": technology, "region": region, **result})
+
+
+@lru_cache(maxsize=SNAPSHOT_PORTFOLIOS_CACHED)
+def snapshot_portfolios(month):
+    """Company portfolios of one monthly snapshot of the history store (a pd.Period)."""
+    columns = [name for name in PORTFOLIO_COLUMNS if name in history_store.columns]
+    snapshot = history_store.read(month, columns)
+    # No version: snapshot group-bys would push the live dataset's versions out of the disk aggregation cache
+    return CompanyPortfolios(snapshot)
+
+
+@app.route("/companies", methods=["GET"])
+def get_companies():
+    """
+    Get Company Portfolio Leaderboard
+    ---
+    description: Returns the top companies by a portfolio measure (total capacity, number of permits, number of technologies or number of regions), each with its permit count, capacity, share of all capacity and capacity per technology and region, plus the market concentration of every region (Herfindahl-Hirschman index of company capacity shares, 0-10000).
+    parameters:
+      - name: by
+        in: query
+        type: string
+        enum: [capacity_mw, permits, technologies, regions]
+        default: capacity_mw
+      - name: top
+        in: query
+        type: integer
+        default: 10
+        maximum: 1000
+      - name: as_of
+        in: query
+        type: string
+        required: false
+        description: Month (YYYY-MM); ranks the portfolios of the latest monthly snapshot up to that month, from the history store, instead of the latest state
+        example: 2023-05
+    responses:
+      200:
+        description: Leaderboard and regional concentration
+        examples:
+          application/json: {
+            "by": "capacity_mw", "top": 1, "companies_total": 2365,
+            "companies": [
+              { "rank": 1, "company": "CERO DEVELOPMENT HELLAS ΜΟΝΟΠΡΟΣΩΠΗ Α Ε", "permits": 6, "capacity_mw": 1452.304, "capacity_share": 0.0247,
+                "technologies": {"Photovoltaics": 1452.304}, "regions": {"Central Greece": 649.994, "Central Macedonia": 269.23, "Eastern Macedonia and Thrace": 423.08, "Thessaly": 110.0} }
+            ],
+            "concentration": [
+              { "region": "Attica", "companies": 48, "capacity_mw": 469.56, "hhi": 613.3, "top_company": "ΗΛΙΟΘΕΜΑ ΕΝΕΡΓΕΙΑΚΗ ΜΟΝΟΠΡΟΣΩΠΗ ΑΝΩΝΥΜΗ ΕΤΑΙΡΕΙΑ", "top_share": 0.132 }
+            ]
+          }
+      400:
+        description: Unknown measure, invalid top or as_of not YYYY-MM
+      404:
+        description: No history store, or no snapshot on or before as_of
+    """
+    by = request.args.get("by", "capacity_mw")
+    top = request.args.get("top", 10, type=int)
+    as_of = request.args.get("as_of")
+    if by not in MEASURES:
+        return jsonify({"error": f"Query parameter by must be one of {', '.join(MEASURES)}"}), 400
+    if not 1 <= top <= COMPANIES_MAX_TOP:
+        return jsonify({"error": f"Query parameter top must be between 1 and {COMPANIES_MAX_TOP}"}), 400
+
+    ranked, snapshot = portfolios, None
+    if as_of:
+        try:
+            month = parse_month(as_of)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not history_store.months:
+            return jsonify({"error": "No history store; run preprocess_data.py to build it"}), 404
+        snapshot = history_store.snapshot(month)
+        if snapshot is None:
+            return jsonify({"error": f"No snapshot on or before {as_of}; the first is {history_store.months[0]}"}), 404
+        with timed("groupby"):
+            ranked = snapshot_portfolios(snapshot)
+
+    with timed("filter"):
+        leaders = ranked.top(top, by)
+    result = {"by": by, "top": top, "companies_total": len(ranked.companies), "companies": leaders,
+              "concentration": ranked.concentration}
+    if snapshot is not None:
+        result["snapshot"] = str(snapshot)
+    return jsonify(result)
+
+
+@app.route("/search", methods=["GET"])
+def get_search():
+    """
+    Search Companies, Permit IDs and Municipalities
+    ---
+    description: Returns the company names, permit IDs and municipalities matching a query, with the IDs of their permits. Matching ignores accents, case and punctuation (final sigma is folded too). Results are ranked exact, prefix, word prefix, then fuzzy matches by the share of the query's character trigrams they contain.
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        example: Καρυστίας
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma-separated subset of company, permit_id, municipality
+        example: company,municipality
+      - name: limit
+        in: query
+        type: integer
+        default: 20
+        maximum: 100
+    responses:
+      200:
+        description: Ranked matches
+        examples:
+          application/json: {
+            "query": "Καρυστίας",
+            "results": [
+              { "field": "company", "value": "ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "match": "prefix", "score": 1.0, "permits": 3, "permit_ids": ["ΑΔ-00161", "ΑΔ-01022", "ΑΔ-02231"] }
+            ]
+          }
+      400:
+        description: Missing query, unknown field or invalid limit
+    """
+    query = request.args.get("q", "").strip()
+    fields = [field.strip() for field in request.args.get("fields", "").split(",") if field.strip()]
+    limit = request.args.get("limit", 20, type=int)
+    if not query:
+        return jsonify({"error": "Query parameter q is required"}), 400
+    if any(field not in SEARCH_FIELDS for field in fields):
+        return jsonify({"error": f"Query parameter fields must be a subset of {', '.join(SEARCH_FIELDS)}"}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({"error": f"Query parameter limit must be between 1 and {SEARCH_MAX_LIMIT}"}), 400
+
+    with timed("filter"):
+        matches = search_index.search(query, fields, limit)
+    with timed("to_dict"):
+        results = [{"field": field, "value": value, "match": match, "score": score, "permits": len(rows),
+                    "permit_ids": permit_ids[rows].tolist()} for field, value, match, score, rows in matches]
+    return jsonify({"query": query, "results": results})
+
+
+@app.route("/permits/<permit_id>", methods=["GET"])
+def get_permit(permit_id):
+    """
+    Get One Permit
+    ---
+    description: Returns the full record of a permit by its Permit ID, from a hash index built when the dataset is loaded, with its version in every monthly snapshot of the history store under "history" (oldest first; empty without a history store). Dates are YYYY-MM-DD.
+    parameters:
+      - name: permit_id
+        in: path
+        type: string
+        required: true
+        example: ΑΔ-00161
+      - name: as_of
+        in: query
+        type: string
+        required: false
+        description: Month (YYYY-MM); returns the permit as listed in the latest monthly snapshot up to that month
+        example: 2023-05
+    responses:
+      200:
+        description: The permit's record
+        examples:
+          application/json: {
+            "Permit ID": "ΑΔ-00161", "Company": "ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "Technology": "Wind Power", "Region": "Central Greece", "Regional Unit": "Evia",
+            "Municipality": "ΚΑΡΥΣΤΟΥ", "Installed Capacity (MW)": 9.0, "Application Submission Date": "2001-02-07", "Permit Issuance Date": "2001-10-22", "Permit Expiration Date": "2026-10-21",
+            "history": [ { "Snapshot": "2020-12", "Permit ID": "ΑΔ-00161", "Installed Capacity (MW)": 9.0, "Permit Expiration Date": "2026-10-21" } ]
+          }
+      400:
+        description: as_of is not YYYY-MM
+      404:
+        description: Unknown Permit ID, or no snapshot of the permit as of the month
+    """
+    as_of = request.args.get("as_of")
+    if as_of:
+        try:
+            month = parse_month(as_of)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not history_store.months:
+            return jsonify({"error": "No history store; run preprocess_data.py to build it"}), 404
+        with timed("filter"):
+            columns = [name for name in history_store.columns if name not in HIDDEN_COLUMNS]
+            snapshot = history_store.read(month, columns, filters=[("Permit ID", "==", permit_id.strip())])
+        if snapshot is None or snapshot.empty:
+            return jsonify({"error": f"Unknown permit as of {as_of}: {permit_id}"}), 404
+        return jsonify({name: json_column(snapshot[name])[0] for name in snapshot.columns})
+
+    with timed("filter"):
+        record = permit_index.get(permit_id)
+    if record is None:
+        return jsonify({"error": f"Unknown permit: {permit_id}"}), 404
+    return jsonify({**record, "history": permit_versions.get(permit_id)})
+
+
+@app.route("/permits/lookup", methods=["POST"])
+def post_permits_lookup():
+    """
+    Look Up Several Permits
+    ---
+    description: Returns the full records of up to 1000 permits by Permit ID in one request, keyed by ID, each with its monthly versions under "history" like /permits/{permit_id}, and lists the IDs that are unknown.
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            permit_ids:
+              type: array
+              items:
+                type: string
+          example: { "permit_ids": ["ΑΔ-00161", "ΑΔ-99999"] }
+    responses:
+      200:
+        description: Records of the known permits and the unknown IDs
+        examples:
+          application/json: {
+            "permits": { "ΑΔ-00161": { "Permit ID": "ΑΔ-00161", "Company": "ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "Installed Capacity (MW)": 9.0 } },
+            "missing": ["ΑΔ-99999"]
+          }
+      400:
+        description: Body is not {"permit_ids": [...]} or has too many IDs
+    """
+    body = request.get_json(silent=True) or {}
+    permit_ids = body.get("permit_ids") if isinstance(body, dict) else None
+    if not isinstance(permit_ids, list) or not all(isinstance(permit_id, str) for permit_id in permit_ids):
+        return jsonify({"error": "Body must be a JSON object with a \"permit_ids\" list of strings"}), 400
+    if len(permit_ids) > PERMIT_LOOKUP_MAX_IDS:
+        return jsonify({"error": f"At most {PERMIT_LOOKUP_MAX_IDS} permit_ids per request"}), 400
+
+    with timed("filter"):
+        found, missing = permit_index.lookup(permit_ids)
+        versions = permit_versions.get_many(found)
+        found = {permit_id: {**record, "history": versions[permit_id.strip()]} for permit_id, record in found.items()}
+    return jsonify({"permits": found, "missing": missing})
+
+
+@app.route("/permits/expiring", methods=["GET"])
+def get_permits_expiring():
+    """
+    Get Upcoming Permit Expirations
+    ---
+    visualization_type: Watchlist
+    description: Returns the permits expiring in the next `days` days (from `from`, inclusive, to `to` = `from` + `days`, exclusive, so the window is exactly `days` days), sorted by expiration date, with the total count and capacity of the whole window and one page of permits. Each query is a binary search in a pre-sorted expiration index, cheap enough for frequent polling.
+    parameters:
+      - name: days
+        in: query
+        type: integer
+        default: 90
+        maximum: 36500
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: First day of the window (defaults to today, UTC); a date without time zone
+        example: "2026-10-19"
+      - name: technology
+        in: query
+        type: string
+        required: false
+        example: Wind Power
+      - name: region
+        in: query
+        type: string
+        required: false
+        example: Attica
+      - name: offset
+        in: query
+        type: integer
+        default: 0
+      - name: limit
+        in: query
+        type: integer
+        default: 50
+        maximum: 500
+    responses:
+      200:
+        description: Totals and one page of expiring permits
+        examples:
+          application/json: {
+            "from": "2026-10-19", "to": "2027-01-17", "days": 90, "technology": null, "region": null, "offset": 0, "limit": 50,
+            "total": { "permits": 20, "capacity_mw": 145.2 },
+            "permits": [
+              { "Permit ID": "ΑΔ-00161", "Company": "ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "Technology": "Wind Power", "Region": "Central Greece", "Regional Unit": "Evia", "Installed Capacity (MW)": 9.0, "Permit Expiration Date": "2026-10-21" }
+            ]
+          }
+      400:
+        description: Invalid days, from, offset or limit, or unknown technology or region
+    """
+    days = request.args.get("days", 90, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", 50, type=int)
+    technology = request.args.get("technology") or None
+    region = request.args.get("region") or None
+    try:
+        start = parse_date("from")
+    except ValueError:
+        return jsonify({"error": "Query parameter from must be a date (YYYY-MM-DD) between "
+                                 f"{DATE_RANGE[0]:%Y-%m-%d} and {DATE_RANGE[1]:%Y-%m-%d}"}), 400
+    if not 1 <= days <= WATCHLIST_MAX_DAYS or offset < 0 or not 1 <= limit <= WATCHLIST_MAX_LIMIT:
+        return jsonify({"error": f"days must be between 1 and {WATCHLIST_MAX_DAYS}, offset non-negative "
+                                 f"and limit between 1 and {WATCHLIST_MAX_LIMIT}"}), 400
+    if ((technology is not None and technology not in expiration_index.technologies)
+            or (region is not None and region not in expiration_index.regions)):
+        return jsonify({"error": "Unknown technology or region"}), 400
+
+    start = (start if start is not None else pd.Timestamp.now(tz="UTC").tz_localize(None)).normalize()
+    if days > (DATE_RANGE[1] - start).days + 1:
+        return jsonify({"error": f"The window must end by {DATE_RANGE[1]:%Y-%m-%d}"}), 400
+    end = start + pd.Timedelta(days=days)
+    with timed("filter"):
+        result = expiration_index.expiring(start, end, technology, region, offset, limit)
+    return jsonify({"from": start.strftime("%Y-%m-%d"), "to": end.strftime("%Y-%m-%d"), "days": days,
+                    "technology": technology, "region": region, "offset": offset, "limit": limit, **result})
+
+
 # ✅ VISUALIZATION ENDPOINTS (Data Table tab)
 
 @app.route("/data/table", methods=["GET"])
@@ -561,7 +1323,20 @@ def get_data_table():
     Get Full Permits Data Table
     ---
     visualization_type: Data Table
-    description: Returns the entire dataset for the permits, excluding unnecessary columns, suitable for rendering as a searchable/sortable table.
+    description: Returns the entire dataset for the permits, excluding unnecessary columns, suitable for rendering as a searchable/sortable table. With as_of, returns the register as of a past month, read from that month's partition of the history store only.
+    parameters:
+      - name: as_of
+        in: query
+        type: string
+        required: false
+        description: Month (YYYY-MM); the latest monthly snapshot up to that month is returned
+        example: 2023-05
+      - name: columns
+        in: query
+        type: string
+        required: false
+        description: Comma-separated columns to return (default all visible columns); only these are read
+        example: Permit ID,Company,Installed Capacity (MW)
     responses:
       200:
         description: Full permits data
@@ -571,6 +1346,31 @@ def get_data_table():
             { "Permit ID": "PERMIT67890", "Region": "Crete", "Technology": "Wind", "Installed Capacity (MW)": 400.0, "Application Submission Date": "2021-06-15" }
           ]
     """
-    columns_to_drop = ["Year", "LAT", "LON", "LAT_UNIT", "LON_UNIT", "Processing Time (Days)", "Regional Unit Greek", "index_right", "distance_to_match"]
-    df_display = df.drop(columns=[col for col in columns_to_drop if col in df.columns], errors="ignore")
-    return jsonify(df_display.to_dict(orient="records"))
+    as_of = request.args.get("as_of")
+    columns = [name.strip() for name in request.args.get("columns", "").split(",") if name.strip()]
+    if as_of:
+        try:
+            month = parse_month(as_of)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not history_store.months:
+            return jsonify({"error": "No history store; run preprocess_data.py to build it"}), 404
+        available = [name for name in history_store.columns if name not in HIDDEN_COLUMNS]
+    else:
+        available = [name for name in df.columns if name not in HIDDEN_COLUMNS]
+    unknown = [name for name in columns if name not in available]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}. Use any of: {', '.join(available)}"}), 400
+
+    with timed("filter"):
+        if as_of:
+            df_display = history_store.read(month, columns or available)
+        elif columns:
+            df_display = df[columns]
+        else:
+            df_display = df.drop(columns=[col for col in HIDDEN_COLUMNS if col in df.columns], errors="ignore")
+    if df_display is None:
+        return jsonify({"error": f"No snapshot on or before {as_of}; the first is {history_store.months[0]}"}), 404
+    with timed("to_dict"):
+        records = df_display.to_dict(orient="records")
+    return jsonify(records)
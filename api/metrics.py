@@ -0,0 +1,248 @@
+"""Per-request timing instrumentation for the Flask API.
+
+Records per-route latency histograms, the time spent in each processing phase
+(filter, groupby, to_dict, json) and response sizes. Phase timings are returned
+in a Server-Timing header and everything is exposed in Prometheus text format
+at /metrics.
+
+Under gunicorn every worker process keeps its own metrics. With RAE_METRICS_DIR
+set (gunicorn.conf.py does), each worker also writes them to a file there and
+/metrics serves the sum over all workers, whichever worker answers the scrape.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+# How often a worker writes its metrics to RAE_METRICS_DIR, i.e. how stale the
+# other workers' share of a scrape can be
+FLUSH_INTERVAL = 1.0
+
+# Order in which phases are reported in the Server-Timing header
+PHASES = ("filter", "groupby", "to_dict", "json")
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def state(self):
+        return [self.counts, self.sum, self.count]
+
+    def merge(self, state):
+        counts, total, count = state
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Thread-safe store of request, phase and response-size metrics.
+
+    With a `directory`, the process's metrics are written to a file of their own
+    there every FLUSH_INTERVAL and render() adds up every file in it. Files of
+    exited workers are kept, so the counters never go backwards.
+    """
+
+    def __init__(self, directory=None):
+        self.lock = threading.Lock()
+        self.requests = {}    # (route, method, status) -> count
+        self.latency = {}     # (route, method) -> Histogram
+        self.phases = {}      # (route, phase) -> Histogram
+        self.sizes = {}       # (route,) -> Histogram
+        self.directory = directory
+        self.path = None      # this process's file in directory
+        self.flusher_pid = None
+        self.dirty = False
+
+    def observe_request(self, route, method, status, seconds, size, phase_timings):
+        with self.lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((route, method), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            for phase, phase_seconds in phase_timings.items():
+                self.phases.setdefault((route, phase), Histogram(LATENCY_BUCKETS)).observe(phase_seconds)
+            if size is not None:
+                self.sizes.setdefault((route,), Histogram(SIZE_BUCKETS)).observe(size)
+            self.dirty = True
+        # The registry is created before gunicorn forks: each worker starts its own flusher
+        if self.directory and self.flusher_pid != os.getpid():
+            self.start_flusher()
+
+    def start_flusher(self):
+        with self.lock:
+            if self.flusher_pid == os.getpid():
+                return
+            self.flusher_pid = os.getpid()
+            # A restarted worker may get a dead one's pid: never overwrite its file
+            self.path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}.json")
+        threading.Thread(target=self.flush_periodically, daemon=True).start()
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        """Write this process's metrics to its file in the directory if they changed."""
+        with self.lock:
+            if not self.dirty:
+                return
+            state = json.dumps(self.state())
+            self.dirty = False
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as handle:
+            handle.write(state)
+        os.replace(tmp_path, self.path)
+
+    def state(self):
+        return {"requests": [[list(key), count] for key, count in self.requests.items()],
+                **{name: [[list(key), histogram.state()] for key, histogram in getattr(self, name).items()]
+                   for name in ("latency", "phases", "sizes")}}
+
+    def collect(self):
+        """This process's metrics, plus those the other processes wrote to the directory."""
+        with self.lock:
+            states = [self.state()]
+        if self.directory and os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".json") and path != self.path:
+                    try:
+                        with open(path) as handle:
+                            states.append(json.load(handle))
+                    except (OSError, ValueError):
+                        continue  # removed or replaced while reading
+
+        merged = MetricsRegistry()
+        for state in states:
+            for key, count in state["requests"]:
+                merged.requests[tuple(key)] = merged.requests.get(tuple(key), 0) + count
+            for name, buckets in (("latency", LATENCY_BUCKETS), ("phases", LATENCY_BUCKETS), ("sizes", SIZE_BUCKETS)):
+                for key, histogram in state[name]:
+                    getattr(merged, name).setdefault(tuple(key), Histogram(buckets)).merge(histogram)
+        return merged
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        metrics = self.collect()
+        lines = ["# HELP rae_api_requests_total Requests handled, by route, method and status.",
+                 "# TYPE rae_api_requests_total counter"]
+        for (route, method, status), count in sorted(metrics.requests.items()):
+            lines.append(f'rae_api_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+        lines += ["# HELP rae_api_request_duration_seconds Request latency, by route and method.",
+                  "# TYPE rae_api_request_duration_seconds histogram"]
+        for (route, method), histogram in sorted(metrics.latency.items()):
+            lines += histogram.render("rae_api_request_duration_seconds", _labels(route=route, method=method))
+
+        lines += ["# HELP rae_api_phase_duration_seconds Time spent per processing phase, by route.",
+                  "# TYPE rae_api_phase_duration_seconds histogram"]
+        for (route, phase), histogram in sorted(metrics.phases.items()):
+            lines += histogram.render("rae_api_phase_duration_seconds", _labels(route=route, phase=phase))
+
+        lines += ["# HELP rae_api_response_size_bytes Response body size, by route.",
+                  "# TYPE rae_api_response_size_bytes histogram"]
+        for (route,), histogram in sorted(metrics.sizes.items()):
+            lines += histogram.render("rae_api_response_size_bytes", _labels(route=route))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    """Format Prometheus labels, escaping backslashes, quotes and newlines."""
+    escaped = {key: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for key, value in labels.items()}
+    return ",".join(f'{key}="{value}"' for key, value in escaped.items())
+
+
+registry = MetricsRegistry(directory=os.environ.get("RAE_METRICS_DIR") or None)
+
+
+@contextmanager
+def timed(phase):
+    """Accumulate the wall time of a block into the current request's phase timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and "phase_timings" in g:
+            g.phase_timings[phase] = g.phase_timings.get(phase, 0.0) + time.perf_counter() - start
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records the time jsonify() spends encoding."""
+
+    def response(self, *args, **kwargs):
+        with timed("json"):
+            return super().response(*args, **kwargs)
+
+
+def server_timing_header(phase_timings, total):
+    """Build a Server-Timing header value (durations in milliseconds)."""
+    ordered = [p for p in PHASES if p in phase_timings] + [p for p in phase_timings if p not in PHASES]
+    entries = [f"{phase};dur={phase_timings[phase] * 1000:.2f}" for phase in ordered]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def init_metrics(app):
+    """Attach timing middleware and the /metrics endpoint to a Flask app."""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.phase_timings = {}
+
+    @app.after_request
+    def record_request_metrics(response):
+        if "request_start" not in g or g.get("skip_metrics"):
+            return response
+        total = time.perf_counter() - g.request_start
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        registry.observe_request(route, request.method, response.status_code, total,
+                                 response.calculate_content_length(), g.phase_timings)
+        response.headers["Server-Timing"] = server_timing_header(g.phase_timings, total)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def get_metrics():
+        """
+        Prometheus Metrics
+        ---
+        description: Per-route latency, per-phase timing and response size metrics in Prometheus text format, summed over all gunicorn workers when RAE_METRICS_DIR is set.
+        produces:
+          - text/plain
+        responses:
+          200:
+            description: Metrics in Prometheus exposition format
+        """
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
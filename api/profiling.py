@@ -0,0 +1,119 @@
+"""On-demand profiling of individual API requests.
+
+Add ?profile=1 (or an X-Profile header) to any GET request to run its handler
+under a profiler and get the profile back instead of the normal payload:
+
+- profile_format=pstats (default): cProfile call statistics sorted by cumulative time,
+  the top profile_limit functions (the endpoints keep their own limit parameters)
+- profile_format=collapsed: one "frame;frame;frame microseconds" line per call stack,
+  ready for flamegraph.pl or speedscope
+
+Profiling is admin-only: the RAE_ADMIN_TOKEN environment variable must be set
+and the request must send the same value in an X-Admin-Token header.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+
+from flask import Response, g, jsonify, request
+
+ADMIN_TOKEN_ENV = "RAE_ADMIN_TOKEN"
+PROFILE_FORMATS = ("pstats", "collapsed")
+DEFAULT_STATS_LIMIT = 60
+
+
+class StackProfiler:
+    """Deterministic profiler that attributes wall time to each full call stack."""
+
+    def __init__(self):
+        self.stack_times = defaultdict(float)
+        self.stack = []
+        self.last_event = None
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter()
+        if self.stack:
+            self.stack_times[tuple(self.stack)] += now - self.last_event
+        if event == "call":
+            code = frame.f_code
+            self.stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        elif event == "c_call":
+            self.stack.append(f"{getattr(arg, '__qualname__', arg)} (builtin)")
+        elif self.stack:
+            # return, c_return and c_exception close the innermost frame
+            self.stack.pop()
+        self.last_event = time.perf_counter()
+
+    def enable(self):
+        self.last_event = time.perf_counter()
+        sys.setprofile(self._callback)
+
+    def disable(self):
+        sys.setprofile(None)
+
+    def collapsed(self):
+        """Render stacks in the collapsed format used by flamegraph tools."""
+        lines = [f"{';'.join(stack)} {int(seconds * 1e6)}"
+                 for stack, seconds in self.stack_times.items() if seconds >= 1e-6]
+        return "\n".join(sorted(lines)) + "\n"
+
+
+def profiling_requested():
+    """Return the requested profile format, or None when the request is not profiled."""
+    flag = request.args.get("profile") or request.headers.get("X-Profile")
+    if not flag or flag.lower() in ("0", "false", "no"):
+        return None
+    profile_format = request.args.get("profile_format", flag if flag in PROFILE_FORMATS else "pstats")
+    return profile_format if profile_format in PROFILE_FORMATS else "pstats"
+
+
+def is_admin():
+    """Check the X-Admin-Token header against RAE_ADMIN_TOKEN."""
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(expected) and hmac.compare_digest(expected.encode(), supplied.encode())
+
+
+def init_profiling(app):
+    """Attach the opt-in request profiler to a Flask app."""
+
+    @app.before_request
+    def start_profiler():
+        profile_format = profiling_requested()
+        if profile_format is None:
+            return None
+        if not is_admin():
+            return jsonify({"error": "Profiling requires a valid X-Admin-Token header"}), 403
+
+        g.profile_format = profile_format
+        g.profiler = StackProfiler() if profile_format == "collapsed" else cProfile.Profile()
+        # Profiled timings are not representative, keep them out of the latency histograms
+        g.skip_metrics = True
+        g.profile_start = time.perf_counter()
+        g.profiler.enable()
+        return None
+
+    @app.after_request
+    def return_profile(response):
+        if "profiler" not in g:
+            return response
+        g.profiler.disable()
+        elapsed_ms = (time.perf_counter() - g.profile_start) * 1000
+
+        if g.profile_format == "collapsed":
+            body = g.profiler.collapsed()
+        else:
+            stream = io.StringIO()
+            limit = request.args.get("profile_limit", DEFAULT_STATS_LIMIT, type=int)
+            pstats.Stats(g.profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+            body = stream.getvalue()
+
+        profiled = Response(body, mimetype="text/plain")
+        profiled.headers["X-Profiled-Status"] = str(response.status_code)
+        profiled.headers["X-Profiled-Duration-Ms"] = f"{elapsed_ms:.2f}"
+        return profiled
@@ -0,0 +1,11 @@
+import sys
+import os
+
+# Add the directory of flask_api.py to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# ✅ Importing appfordoc loads the dataset and registers the Swagger docs
+import appfordoc
+
+# WSGI entry point for production servers, e.g. gunicorn -c gunicorn.conf.py
+app = appfordoc.flask_api.app
@@ -2,7 +2,7 @@ import streamlit as st  # ✅ Move st.set_page_config to the top before anything
 st.set_page_config(page_title="Renewable Energy Permits in Greece", layout="wide")  # ✅ Must be first!
 
 import pandas as pd
-from data_loader import load_data
+from data_loader import load_data, dataset_version
 from greece_map import create_combined_map, create_prefecture_map
 from streamlit_folium import st_folium
 from visualizations import (
@@ -20,8 +20,9 @@ from visualizations import (
     plot_violin_processing_time
 )
 
-# Load data
+# Load data (the version keys the shared aggregation cache)
 df = load_data()
+version = dataset_version()
 
 
 # Dashboard Title
@@ -34,7 +35,7 @@ tab1, tab2, tab3 = st.tabs(["📊 Data Analysis", "🌍 Map", "🔍 Data Table"]
 with tab1:
     # 📊 Permit Distribution
     st.subheader("📊 Permit Distribution")
-    st.plotly_chart(plot_permit_distribution(df), use_container_width=True)
+    st.plotly_chart(plot_permit_distribution(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -53,7 +54,7 @@ with tab1:
 
     # 📈 Permit Trends Over Time
     st.subheader("📈 Permit Trends Over Time")
-    st.plotly_chart(plot_permits_over_time(df), use_container_width=True)
+    st.plotly_chart(plot_permits_over_time(df, version), use_container_width=True)
     st.markdown("""
     ℹ️ **How is this calculated?**  
     This **line chart** shows the total number of permits issued each year.
@@ -69,7 +70,7 @@ with tab1:
 
     # 💡 Growth of Renewable Technologies
     st.subheader("💡 Growth of Renewable Technologies")
-    st.plotly_chart(plot_technology_growth(df), use_container_width=True)
+    st.plotly_chart(plot_technology_growth(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -88,7 +89,7 @@ with tab1:
 
     # 💡 Installed Capacity by Technology
     st.subheader("💡 Installed Capacity by Technology")
-    st.plotly_chart(plot_installed_capacity(df), use_container_width=True)
+    st.plotly_chart(plot_installed_capacity(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -126,7 +127,7 @@ with tab1:
 
     # 🌞 Energy Mix by Region
     st.subheader("🌞 Energy Mix by Region")
-    st.plotly_chart(plot_energy_mix_per_region(df), use_container_width=True)
+    st.plotly_chart(plot_energy_mix_per_region(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -145,7 +146,7 @@ with tab1:
 
     # ⏳ Expiring Permits Timeline
     st.subheader("⏳ Expiring Permits Timeline")
-    st.plotly_chart(plot_expiring_permits(df), use_container_width=True)
+    st.plotly_chart(plot_expiring_permits(df, version), use_container_width=True)
     st.markdown("""
     ℹ️ **How is this calculated?**  
     This **stacked bar chart** shows the number of permits that will expire each year, categorized by **technology**.
@@ -163,7 +164,7 @@ with tab1:
 
     # 📈 Cumulative Installed Capacity Over Time
     st.subheader("📈 Cumulative Installed Capacity Over Time")
-    st.plotly_chart(plot_cumulative_installed_capacity(df), use_container_width=True)
+    st.plotly_chart(plot_cumulative_installed_capacity(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -179,7 +180,7 @@ with tab1:
 
     # 💡 Permit Type Distribution Over Time
     st.subheader("💡 Permit Type Distribution Over Time")
-    st.plotly_chart(plot_permit_type_distribution(df), use_container_width=True)
+    st.plotly_chart(plot_permit_type_distribution(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -192,7 +193,7 @@ with tab1:
     """)
 
     st.subheader("🔄 Flow of Renewable Energy Permits")
-    st.plotly_chart(plot_sankey_permits(df), use_container_width=True)
+    st.plotly_chart(plot_sankey_permits(df, version), use_container_width=True)
 
     st.markdown("""
     ℹ️ **How is this calculated?**  
@@ -209,7 +210,7 @@ with tab1:
 
     # 🕒 Permit Processing Time Analysis
     st.subheader("🕒 Permit Processing Time Analysis")
-    st.plotly_chart(plot_permit_processing_time(df), use_container_width=True)
+    st.plotly_chart(plot_permit_processing_time(df, version), use_container_width=True)
 
     st.markdown("""
         ℹ️ **How is this calculated?**  
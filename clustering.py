@@ -0,0 +1,141 @@
+"""Viewport-aware clustering of permit locations for the map.
+
+ClusterIndex precomputes a hierarchy of grid clusters, one level per web-map zoom.
+At each zoom, points are snapped to a grid of cells CLUSTER_RADIUS pixels wide in
+Web Mercator space. Each level is built from the level below it by merging child
+clusters (count-weighted centroid, summed capacity and per-technology counts), so
+the whole hierarchy costs O(levels × permits) to build once per dataset.
+
+Each level is sorted by grid row, which makes it its own spatial index: a bounding
+box query binary-searches the rows it covers and filters columns within them, so
+a response only grows with what is visible in the viewport.
+"""
+import numpy as np
+import pandas as pd
+
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+CLUSTER_RADIUS = 60  # pixels
+TILE_SIZE = 256  # pixels
+
+
+def mercator(lat, lon):
+    """Project WGS84 coordinates into the unit Web Mercator square (y grows southwards)."""
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    x = lon / 360.0 + 0.5
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return x, y
+
+
+def inverse_mercator(x, y):
+    lon = (x - 0.5) * 360.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y))))
+    return lat, lon
+
+
+def cell_size(zoom):
+    """Grid cell width at a zoom level, in unit Mercator coordinates."""
+    return CLUSTER_RADIUS / (TILE_SIZE * 2 ** zoom)
+
+
+def permit_coordinates(df):
+    """Best available location per permit: the regional unit point, else the region point."""
+    lat = pd.to_numeric(df["LAT_UNIT"], errors="coerce").fillna(pd.to_numeric(df["LAT"], errors="coerce"))
+    lon = pd.to_numeric(df["LON_UNIT"], errors="coerce").fillna(pd.to_numeric(df["LON"], errors="coerce"))
+    return lat.to_numpy(dtype=float), lon.to_numpy(dtype=float)
+
+
+class ClusterLevel:
+    """Clusters of one zoom level, sorted by grid row then column."""
+
+    def __init__(self, zoom, row, x, y, count, capacity, technologies, first):
+        self.zoom = zoom
+        self.row = row
+        self.x = x
+        self.y = y
+        self.count = count
+        self.capacity = capacity
+        self.technologies = technologies
+        self.first = first  # smallest permit position in each cluster, to describe single permits
+
+    def query(self, x0, y0, x1, y1):
+        """Positions of the clusters whose centroid lies in the box (unit Mercator coordinates)."""
+        size = cell_size(self.zoom)
+        lo = np.searchsorted(self.row, int(np.floor(y0 / size)), side="left")
+        hi = np.searchsorted(self.row, int(np.floor(y1 / size)), side="right")
+        x, y = self.x[lo:hi], self.y[lo:hi]
+        return lo + np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+
+
+class ClusterIndex:
+    """Hierarchical grid clusters of permit locations for every zoom level."""
+
+    def __init__(self, df):
+        lat, lon = permit_coordinates(df)
+        located = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.df = df
+        self.technology_names, technology_codes = np.unique(df["Technology"].astype(str).to_numpy()[located],
+                                                            return_inverse=True)
+        x, y = mercator(lat[located], lon[located])
+        count = np.ones(len(located))
+        capacity = np.nan_to_num(pd.to_numeric(df["Installed Capacity (MW)"], errors="coerce").to_numpy(dtype=float)[located])
+        technologies = np.zeros((len(located), len(self.technology_names)))
+        technologies[np.arange(len(located)), technology_codes] = 1
+        first = located
+
+        self.levels = {}
+        for zoom in range(MAX_ZOOM, MIN_ZOOM - 1, -1):
+            level = self.merge(zoom, x, y, count, capacity, technologies, first)
+            self.levels[zoom] = level
+            x, y, count, capacity, technologies, first = (level.x, level.y, level.count, level.capacity,
+                                                          level.technologies, level.first)
+
+    @staticmethod
+    def merge(zoom, x, y, count, capacity, technologies, first):
+        """Merge the clusters (or points) of the level above into this zoom's grid cells."""
+        size = cell_size(zoom)
+        columns = int(np.ceil(1 / size)) + 1
+        row = np.floor(y / size).astype(np.int64)
+        key = row * columns + np.floor(x / size).astype(np.int64)
+        keys, inverse = np.unique(key, return_inverse=True)
+        merged_count = np.bincount(inverse, weights=count)
+        merged_first = np.full(len(keys), np.iinfo(np.int64).max)
+        np.minimum.at(merged_first, inverse, first)
+        merged_technologies = np.column_stack([np.bincount(inverse, weights=technologies[:, k], minlength=len(keys))
+                                               for k in range(technologies.shape[1])])
+        return ClusterLevel(
+            zoom,
+            keys // columns,
+            np.bincount(inverse, weights=x * count) / merged_count,
+            np.bincount(inverse, weights=y * count) / merged_count,
+            merged_count,
+            np.bincount(inverse, weights=capacity),
+            merged_technologies,
+            merged_first,
+        )
+
+    def clusters(self, min_lat, min_lon, max_lat, max_lon, zoom):
+        """Clusters visible in a bounding box at a zoom level, as JSON-ready records."""
+        level = self.levels[int(min(max(zoom, MIN_ZOOM), MAX_ZOOM))]
+        x0, y1 = mercator(min_lat, min_lon)
+        x1, y0 = mercator(max_lat, max_lon)
+        positions = level.query(x0, y0, x1, y1)
+        lat, lon = inverse_mercator(level.x[positions], level.y[positions])
+
+        records = []
+        for position, cluster_lat, cluster_lon in zip(positions, lat, lon):
+            count = int(level.count[position])
+            record = {
+                "lat": round(float(cluster_lat), 6),
+                "lon": round(float(cluster_lon), 6),
+                "count": count,
+                "capacity_mw": round(float(level.capacity[position]), 3),
+                "technologies": {name: int(n) for name, n in zip(self.technology_names, level.technologies[position]) if n},
+            }
+            if count == 1:
+                permit = self.df.iloc[int(level.first[position])]
+                record.update({key: None if pd.isna(permit[column]) else permit[column] for key, column in
+                               (("permit_id", "Permit ID"), ("company", "Company"), ("technology", "Technology"))})
+            records.append(record)
+        return records
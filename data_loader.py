@@ -1,24 +1,155 @@
+import hashlib
+import os
+import sys
 import pandas as pd
+import pyarrow as pa
 
-def load_data():
-    """Load and preprocess the renewable energy permits dataset."""
-    file_path = r"data/permits/final_permits_cleaned.xlsx"
+DEFAULT_DATA_FILE = r"data/permits/final_permits_cleaned.xlsx"
+ARROW_SUFFIX = ".arrow"
+# Formats a cleaned dataset can be stored in (see exporter.py), fastest to load first
+DATASET_SUFFIXES = [ARROW_SUFFIX, ".parquet", ".csv.gz", ".csv", ".xlsx"]
+DATE_COLUMNS = ["Application Submission Date", "Permit Issuance Date", "Permit Expiration Date"]
+CAPACITY_COLUMN = "Installed Capacity (MW)"
 
-    df = pd.read_excel(file_path, dtype=str)
+def resolve_data_file(file_path=None):
+    """Return the dataset path: the argument, PERMITS_DATA_FILE, or the default file."""
+    return file_path or os.environ.get("PERMITS_DATA_FILE", DEFAULT_DATA_FILE)
+
+def dataset_version(file_path=None):
+    """Short content hash of the dataset file, identical across workers and hosts."""
+    file_path = resolve_data_file(file_path)
+    if not os.path.exists(file_path):
+        file_path = fastest_source(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+def dataset_path(file_path, suffix):
+    """Path of the same cleaned dataset in another format, e.g. ".parquet"."""
+    for known in DATASET_SUFFIXES:
+        if file_path.endswith(known):
+            return file_path[:-len(known)] + suffix
+    return file_path + suffix
+
+def arrow_path(file_path=None):
+    """Path of the Arrow artifact built next to a cleaned dataset file."""
+    return dataset_path(resolve_data_file(file_path), ARROW_SUFFIX)
+
+def fastest_source(file_path, use_arrow=True):
+    """The fastest-loading format of the dataset that is at least as new as file_path.
+
+    Falls back to file_path itself; if it does not exist, any available format is used.
+    """
+    oldest = os.path.getmtime(file_path) if os.path.exists(file_path) else 0
+    for suffix in DATASET_SUFFIXES:
+        candidate = dataset_path(file_path, suffix)
+        if (use_arrow or suffix != ARROW_SUFFIX) and os.path.exists(candidate) and os.path.getmtime(candidate) >= oldest:
+            return candidate
+    return file_path
+
+def write_arrow(df, path):
+    """Write a loaded permits frame as an uncompressed Arrow IPC file for memory-mapping.
+
+    Floats keep NaN as a value rather than a null, so numeric columns map straight
+    back to numpy without a fill pass. The file is swapped in atomically so processes
+    that still map the previous version are not affected.
+    """
+    arrays = [pa.array(df[col].to_numpy(), from_pandas=False) if df[col].dtype.kind == "f"
+              else pa.array(df[col], from_pandas=True) for col in df.columns]
+    table = pa.Table.from_arrays(arrays, names=list(df.columns))
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def read_arrow(path):
+    """Memory-map an Arrow artifact read-only and view it as a DataFrame without copying.
+
+    Numeric and date columns are numpy views over the mapped file and string columns
+    stay Arrow-backed, so the pages are shared by every process mapping the file.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return arrow_to_frame(table)
+
+def arrow_to_frame(table):
+    """View an Arrow table as a DataFrame: numpy for numbers and dates, Arrow-backed strings."""
+    return table.to_pandas(
+        split_blocks=True,
+        types_mapper=lambda t: pd.ArrowDtype(t) if pa.types.is_string(t) or pa.types.is_large_string(t) else None,
+    )
+
+def build_arrow(file_path=None):
+    """Convert a cleaned dataset file into its Arrow artifact."""
+    file_path = resolve_data_file(file_path)
+    return write_arrow(load_data(file_path, use_arrow=False), arrow_path(file_path))
+
+def load_data(file_path=None, use_arrow=True):
+    """Load and preprocess the renewable energy permits dataset.
+
+    The PERMITS_DATA_FILE environment variable overrides the default file,
+    e.g. to run against a synthetic dataset from generate_synthetic_data.py.
+    The fastest up-to-date format next to the file is read instead of it: the
+    memory-mapped Arrow artifact, then Parquet, then gzip CSV, then the spreadsheet.
+    """
+    source = fastest_source(resolve_data_file(file_path), use_arrow)
+
+    if source.endswith(ARROW_SUFFIX):
+        return read_arrow(source)
+    if source.endswith(".parquet"):
+        df = pd.read_parquet(source)
+    elif source.endswith((".csv", ".csv.gz")):
+        df = pd.read_csv(source, dtype=str)
+    else:
+        df = pd.read_excel(source, dtype=str)
+    return prepare(df)
+
+def as_text(values):
+    """Text of a typed column or of raw cell values as a spreadsheet read with dtype=str gives it.
+
+    Whole numbers lose their ".0"; missing and empty cells are NaN.
+    """
+    values = pd.Series(values)
+    if values.dtype.kind == "f":
+        whole = values.notna() & (values % 1 == 0)
+    else:
+        # Raw cells mix types: only the float ones can be whole numbers
+        values = values.where(values != "")
+        whole = values.map(lambda value: isinstance(value, float) and value.is_integer()).astype(bool)
+    text = values.astype(str)
+    text[whole] = values[whole].astype("int64").astype(str)
+    return text.where(values.notna())
+
+def prepare(df):
+    """Loaded form of a cleaned dataset: dates and capacity typed, the other columns text.
+
+    Spreadsheets and CSV are read as text; typed frames (Parquet, or a frame being
+    exported) get the same text values, so every format loads to the same frame.
+    """
     # ✅ Drop original Greek "Regional Unit" to avoid column conflict
     if "Regional Unit" in df.columns and "Regional Unit English" in df.columns:
-        df.drop(columns=["Regional Unit"], inplace=True)
+        df = df.drop(columns=["Regional Unit"])
 
     # ✅ Rename English version to standard column name
-    df.rename(columns={"Regional Unit English": "Regional Unit"}, inplace=True)
+    df = df.rename(columns={"Regional Unit English": "Regional Unit"})
+
+    for col in df.columns:
+        if col not in DATE_COLUMNS and col != CAPACITY_COLUMN and df[col].dtype != object:
+            df[col] = as_text(df[col])
 
     # Convert date columns to datetime
-    date_cols = ["Application Submission Date", "Permit Issuance Date", "Permit Expiration Date"]
-    for col in date_cols:
+    for col in DATE_COLUMNS:
         df[col] = pd.to_datetime(df[col], errors="coerce")
 
     # Convert numeric columns
-    df["Installed Capacity (MW)"] = pd.to_numeric(df["Installed Capacity (MW)"], errors="coerce")
+    df[CAPACITY_COLUMN] = pd.to_numeric(df[CAPACITY_COLUMN], errors="coerce")
 
     return df
 
+if __name__ == "__main__":
+    # python data_loader.py [cleaned_file] -> builds the memory-mappable Arrow artifact
+    output = build_arrow(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"✅ Arrow artifact saved to: {output}")
@@ -0,0 +1,130 @@
+"""Company-name entity resolution.
+
+The same developer appears in the monthly files under spelling, punctuation and
+legal-form variants ("ΑΙΟΛΙΚΗ ΧΕΛΩΝΑ Α.Ε.", "ΑΙΟΛΙΚΗ ΧΕΛΩΝΑ ΜΟΝ. ΑΕ", "AIOΛIKH
+XEΛΩNA ANΩNYMH ETAIPEIA"). resolve_companies() maps every name to a canonical
+company:
+
+1. normalize: drop the trade name (δ.τ.), accents and punctuation, fold Latin
+   look-alike letters into Greek, join dotted abbreviations (Α.Ε. -> ΑΕ) and
+   remove legal forms, leaving the name's core words;
+2. block: names are only compared with names sharing a blocking key (the prefix
+   of their rarest core word), so the work grows with the block sizes rather than
+   with all pairs of names;
+3. score: inside a block, trigram Jaccard similarities of all pairs come from one
+   matrix product, and pairs above SIMILARITY_THRESHOLD with the same numbers in
+   their names are merged (union-find); "SOLAR 1" and "SOLAR 2" are different
+   project companies.
+
+Each resulting company gets a stable "Company ID" and, as "Company Name", its
+most frequent spelling.
+"""
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SIMILARITY_THRESHOLD = 0.8
+BLOCK_PREFIX = 4
+
+# Latin capitals that look like Greek ones, which the files mix freely
+LOOKALIKES = str.maketrans("ABEHIKMNOPTXYZ", "ΑΒΕΗΙΚΜΝΟΡΤΧΥΖ")
+
+# Legal forms (after normalization), longest first so that e.g. "ΙΔΙΩΤΙΚΗ ΚΕΦΑΛΑΙΟΥΧΙΚΗ
+# ΕΤΑΙΡΕΙΑ" is removed as a whole before "ΕΤΑΙΡΕΙΑ" alone is considered
+LEGAL_FORMS = sorted([
+    "ΑΝΩΝΥΜΗ ΕΤΑΙΡΕΙΑ", "ΑΝΩΝΥΜΗ ΕΤΑΙΡΙΑ", "ΑΝΩΝΥΜΟΣ ΕΤΑΙΡΕΙΑ", "ΑΝΩΝΥΜΟΣ ΕΤΑΙΡΙΑ",
+    "ΙΔΙΩΤΙΚΗ ΚΕΦΑΛΑΙΟΥΧΙΚΗ ΕΤΑΙΡΕΙΑ", "ΙΔΙΩΤΙΚΗ ΚΕΦΑΛΑΙΟΥΧΙΚΗ ΕΤΑΙΡΙΑ", "ΚΕΦΑΛΑΙΟΥΧΙΚΗ ΕΤΑΙΡΕΙΑ",
+    "ΚΕΦΑΛΑΙΟΥΧΙΚΗ ΕΤΑΙΡΙΑ", "ΕΤΑΙΡΕΙΑ ΠΕΡΙΟΡΙΣΜΕΝΗΣ ΕΥΘΥΝΗΣ", "ΕΤΑΙΡΙΑ ΠΕΡΙΟΡΙΣΜΕΝΗΣ ΕΥΘΥΝΗΣ",
+    "ΕΤΕΡΟΡΡΥΘΜΗ ΕΤΑΙΡΕΙΑ", "ΕΤΕΡΟΡΡΥΘΜΗ ΕΤΑΙΡΙΑ", "ΟΜΟΡΡΥΘΜΗ ΕΤΑΙΡΕΙΑ", "ΟΜΟΡΡΥΘΜΗ ΕΤΑΙΡΙΑ",
+    "ΜΟΝΟΠΡΟΣΩΠΗ", "ΜΟΝ", "ΑΕ", "ΜΑΕ", "ΑΒΕΕ", "ΑΒΕΤΕ", "ΑΤΕ", "ΙΚΕ", "ΕΠΕ", "ΟΕ", "ΕΕ", "ΣΑ", "SΑ",
+    "ΚΑΙ ΣΙΑ", "ΣΙΑ", "ΣΥΝ ΠΕ", "ΣΥΝΠΕ",
+], key=len, reverse=True)
+LEGAL_FORMS_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(form) for form in LEGAL_FORMS) + r")\b")
+TRADE_NAME_PATTERN = re.compile(r"[\(/]?\s*\bΔ\s*\.?\s*Τ\s*\.?\s.*$", re.DOTALL)
+
+
+def normalize_company(name):
+    """Comparison key of a company name: its core words, without legal forms or punctuation."""
+    if not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize("NFKD", name.upper())
+    text = "".join(char for char in text if not unicodedata.combining(char)).translate(LOOKALIKES)
+    text = TRADE_NAME_PATTERN.sub("", text) or text
+    words = re.sub(r"[^\w]+", " ", text).split()
+    # Join runs of single letters left by dotted abbreviations: "Ι Κ Ε" -> "ΙΚΕ"
+    joined = []
+    for word in words:
+        if len(word) == 1 and joined and joined[-1][1]:
+            joined[-1] = (joined[-1][0] + word, True)
+        else:
+            joined.append((word, len(word) == 1))
+    text = " ".join(word for word, _ in joined)
+    core = " ".join(LEGAL_FORMS_PATTERN.sub(" ", text).split())
+    return core or text
+
+
+def trigram_matrix(keys):
+    """Binary key × trigram matrix for a block of normalized keys."""
+    grams = [{f" {key} "[i:i + 3] for i in range(len(key))} for key in keys]
+    vocabulary = {gram: column for column, gram in enumerate(set().union(*grams))}
+    matrix = np.zeros((len(keys), len(vocabulary)), dtype=np.float32)
+    for row, key_grams in enumerate(grams):
+        matrix[row, [vocabulary[gram] for gram in key_grams]] = 1
+    return matrix
+
+
+def find(parent, item):
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def resolve_companies(names):
+    """Canonical "Company ID" and "Company Name" for each name, aligned with the input Series."""
+    names = pd.Series(names)
+    raw = names.astype(object).where(names.notna(), None)
+    keys = raw.map({name: normalize_company(name) for name in pd.unique(raw.dropna())}).fillna("")
+    unique_keys = pd.unique(keys[keys != ""])
+    parent = list(range(len(unique_keys)))
+
+    # Blocking key: prefix of the rarest core word, so generic words ("ΑΙΟΛΙΚΗ") do not form huge blocks
+    word_counts = pd.Series([word for key in unique_keys for word in set(key.split())]).value_counts()
+    blocks = {}
+    for position, key in enumerate(unique_keys):
+        rarest = min(key.split(), key=lambda word: (word_counts[word], word))
+        blocks.setdefault(rarest[:BLOCK_PREFIX], []).append(position)
+
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        matrix = trigram_matrix([unique_keys[position] for position in members])
+        shared = matrix @ matrix.T
+        sizes = matrix.sum(axis=1)
+        similarity = shared / (sizes[:, None] + sizes[None, :] - shared)
+        numbers = pd.factorize(pd.Series([" ".join(re.findall(r"\d+", unique_keys[position])) for position in members]))[0]
+        same = (similarity >= SIMILARITY_THRESHOLD) & (numbers[:, None] == numbers[None, :])
+        for i, j in zip(*np.nonzero(np.triu(same, k=1))):
+            parent[find(parent, members[i])] = find(parent, members[j])
+
+    root = {key: find(parent, position) for position, key in enumerate(unique_keys)}
+    cluster = keys.map(root)
+    # Most frequent spelling per company (ties: alphabetically first) as its name and ID seed
+    spellings = pd.DataFrame({"cluster": cluster, "name": raw.map(lambda name: " ".join(name.split()) if name else None)})
+    spellings = spellings.dropna()
+    counts = spellings.groupby(["cluster", "name"]).size().reset_index(name="count")
+    canonical = counts.sort_values(["cluster", "count", "name"], ascending=[True, False, True]).drop_duplicates("cluster")
+    canonical_name = dict(zip(canonical["cluster"], canonical["name"]))
+    # The ID hashes the cluster's smallest key, so it does not depend on the merge order
+    seed = {}
+    for key, cluster_id in root.items():
+        seed[cluster_id] = min(seed.get(cluster_id, key), key)
+    canonical_id = {cluster_id: "CO-" + hashlib.sha1(seed[cluster_id].encode()).hexdigest()[:10].upper()
+                    for cluster_id in canonical_name}
+    return pd.DataFrame({
+        "Company ID": cluster.map(canonical_id),
+        "Company Name": cluster.map(canonical_name),
+    }, index=names.index)
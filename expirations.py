@@ -0,0 +1,67 @@
+"""Sorted expiration-date index for the upcoming-expiration watchlist.
+
+For every series (all permits, each technology, each region and each technology ×
+region pair) ExpirationIndex keeps the permits' row positions sorted by expiration
+date, with the dates and a prefix sum of their capacity alongside. A window of
+expirations is then two binary searches; its totals come from the prefix sums and
+a page of permits is a slice of precomputed JSON-ready columns, so a query never
+scans the dataset.
+"""
+import numpy as np
+import pandas as pd
+
+CAPACITY = "Installed Capacity (MW)"
+WATCHLIST_COLUMNS = ["Permit ID", "Company", "Technology", "Region", "Regional Unit", CAPACITY,
+                     "Permit Expiration Date"]
+
+
+class ExpirationIndex:
+    """Permits sorted by expiration date, per technology and region."""
+
+    def __init__(self, df):
+        # JSON-ready watchlist columns, so a page is built without touching the DataFrame
+        table = df[WATCHLIST_COLUMNS].assign(**{
+            "Permit Expiration Date": df["Permit Expiration Date"].dt.strftime("%Y-%m-%d")})
+        self.columns = {name: table[name].astype(object).where(table[name].notna(), None).to_numpy()
+                        for name in WATCHLIST_COLUMNS}
+        expires = df["Permit Expiration Date"].to_numpy(dtype="datetime64[ns]")
+        capacity = np.nan_to_num(pd.to_numeric(df[CAPACITY], errors="coerce").to_numpy(dtype=float))
+        dated = np.flatnonzero(~np.isnat(expires))
+        order = dated[np.argsort(expires[dated], kind="stable")]
+        technology, region = df["Technology"].astype(str).to_numpy(), df["Region"].astype(str).to_numpy()
+        # Every technology and region of the dataset, including those without expiration dates
+        self.technologies, self.regions = set(technology), set(region)
+        labels = pd.DataFrame({"technology": technology[order], "region": region[order]})
+
+        def series(rows):
+            return rows, expires[rows], np.concatenate([[0.0], np.cumsum(capacity[rows])])
+
+        self.series = {(None, None): series(order)}
+        # groupby().indices keeps each group's positions in expiration order
+        for technology, positions in labels.groupby("technology").indices.items():
+            self.series[(technology, None)] = series(order[positions])
+        for region, positions in labels.groupby("region").indices.items():
+            self.series[(None, region)] = series(order[positions])
+        for key, positions in labels.groupby(["technology", "region"]).indices.items():
+            self.series[key] = series(order[positions])
+
+    def expiring(self, start, end, technology=None, region=None, offset=0, limit=50):
+        """Permits expiring on or after the start date and before the end date, sorted by date.
+
+        Returns the window's totals and one page of permits. Raises KeyError for an
+        unknown technology or region; a known pair without permits has no expirations.
+        """
+        if technology is not None and technology not in self.technologies:
+            raise KeyError(technology)
+        if region is not None and region not in self.regions:
+            raise KeyError(region)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype="datetime64[ns]"), np.zeros(1))
+        rows, dates, capacity = self.series.get((technology, region), empty)
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start).normalize()), side="left")
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end).normalize()), side="left")
+        page = rows[lo + offset:max(lo + offset, min(lo + offset + limit, hi))]
+        values = zip(*(self.columns[name][page] for name in WATCHLIST_COLUMNS))
+        return {
+            "total": {"permits": int(hi - lo), "capacity_mw": round(float(capacity[hi] - capacity[lo]), 3)},
+            "permits": [dict(zip(WATCHLIST_COLUMNS, permit)) for permit in values],
+        }
@@ -0,0 +1,117 @@
+"""Write-once export of the cleaned permits dataset in several formats.
+
+export_dataset() writes the in-memory dataset once per format, with all formats
+written in parallel:
+
+    parquet  typed columnar copy, the system of record for other tools
+    arrow    the memory-mapped artifact load_data() prefers
+    csv      gzip CSV
+    xlsx     spreadsheet for people, streamed with a write-only workbook
+
+Nothing is written and read back: the Arrow artifact is built from the frame
+itself. Each file is swapped in atomically, and all files get one common
+modification time, so load_data() sees them as equally fresh and reads the
+fastest one (see data_loader.fastest_source).
+
+Usage:
+    python exporter.py data/permits/final_permits_cleaned.xlsx --formats parquet,csv
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from openpyxl import Workbook
+
+from data_loader import CAPACITY_COLUMN, DATE_COLUMNS, as_text, dataset_path, prepare, write_arrow
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv.gz", "xlsx": ".xlsx"}
+XLSX_CHUNK_ROWS = 50_000
+
+
+def write_parquet(df, path):
+    df.to_parquet(path, index=False)
+
+
+def write_csv(df, path):
+    # Numbers other than the capacity are text in the loaded dataset; write them as load_data reads them
+    text = {col: as_text(df[col]) for col in df.columns if df[col].dtype.kind in "if" and col != CAPACITY_COLUMN}
+    df.assign(**text).to_csv(path, index=False, compression="gzip", date_format="%Y-%m-%d %H:%M:%S")
+
+
+def write_xlsx(df, path):
+    """Stream the rows into a write-only workbook instead of building the sheet in memory."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    for start in range(0, len(df), XLSX_CHUNK_ROWS):
+        chunk = df.iloc[start:start + XLSX_CHUNK_ROWS]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False):
+            sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
+    workbook.save(path)
+
+
+WRITERS = {
+    "parquet": write_parquet,
+    "arrow": lambda df, path: write_arrow(prepare(df), path),
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+}
+
+
+def read_dataset(file_path):
+    """A cleaned dataset file as the pipeline wrote it (not the loaded form of load_data)."""
+    if file_path.endswith(".parquet"):
+        return pd.read_parquet(file_path)
+    if file_path.endswith((".csv", ".csv.gz")):
+        return pd.read_csv(file_path, parse_dates=DATE_COLUMNS)
+    return pd.read_excel(file_path)
+
+
+def write_atomically(writer, df, path):
+    tmp_path = path + ".tmp"
+    writer(df, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_dataset(df, file_path, formats=FORMATS):
+    """Write df next to file_path in each format and return {format: path}."""
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(unknown)}. Use any of: {', '.join(FORMATS)}")
+    paths = {name: dataset_path(file_path, FORMATS[name]) for name in formats}
+    with ThreadPoolExecutor(max_workers=len(paths) or 1) as pool:
+        futures = {name: pool.submit(write_atomically, WRITERS[name], df, path) for name, path in paths.items()}
+        for future in futures.values():
+            future.result()
+    # Same modification time for every format, so none of them looks stale next to another
+    now = time.time()
+    for path in paths.values():
+        os.utime(path, (now, now))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a cleaned permits dataset to other formats.")
+    parser.add_argument("file", help="Cleaned dataset in any supported format")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"Comma-separated subset of: {', '.join(FORMATS)}")
+    args = parser.parse_args()
+
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(unknown)}")
+    if args.file.endswith(FORMATS["arrow"]):
+        parser.error("The Arrow artifact holds the loaded dataset; export from the parquet, csv or xlsx file")
+    start = time.perf_counter()
+    paths = export_dataset(read_dataset(args.file), args.file, formats)
+    for name, path in paths.items():
+        print(f"✅ {name}: {path}")
+    print(f"Exported in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Gazetteer of Greek regions and regional units compiled from the GeoJSON layers.
+
+Every polygon of data/geo is a place with its Greek and English name, a point on
+its surface and, for regional units, the region containing that point. Names are
+indexed by a normalized key: accents dropped, Latin look-alike letters read as
+Greek, punctuation and "ΚΑΙ" ignored and the inflectional ending of each word cut,
+so "ΛΑΡΙΣΗΣ", "Λάρισα" and "ΛΑΡΙΣΑΣ" share the key "ΛΑΡΙΣ". The spellings used
+in the cleaned dataset are registered as aliases of their places.
+
+Raw names are resolved once per distinct value. A value whose key is unknown is
+tried, in order, as an abbreviation ("ΘΕΣ/ΝΙΚΗΣ", "ΑΝ. ΜΑΚΕΔΟΝΙΑΣ"), as a list
+of places ("ΚΟΖΑΝΗΣ,ΦΛΩΡΙΝΑΣ") and against every key at once with a trigram
+similarity matrix. Every resolution that is not exact goes into a review report.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from geocoding import default_geocoder
+
+LEVELS = ["regions", "regional_units"]
+# Lowest trigram similarity (Dice coefficient, 0-1) accepted as a fuzzy match
+FUZZY_THRESHOLD = 0.6
+REVIEW_COLUMNS = ["level", "value", "rows", "method", "score", "name", "place", "parent", "places"]
+
+LATIN_LOOKALIKES = str.maketrans("ABEHIKMNOPTXYZ", "ΑΒΕΗΙΚΜΝΟΡΤΧΥΖ")
+ENDINGS = ("ΟΥΣ", "ΩΝ", "ΟΥ", "ΟΣ", "ΑΣ", "ΗΣ", "ΩΣ", "ΕΣ", "ΟΙ", "ΑΙ", "Α", "Η", "Ο", "Ι", "Ε", "Σ")
+STOPWORDS = {"ΚΑΙ"}
+WORD = r"[^\W\d_]+"
+# Separators between the places of a list; a hyphen only counts with a space next to it
+PLACE_SEPARATORS = re.compile(r"[,&;\n]|\s+-\s*|\s*-\s+|\sΚΑΙ\s")
+
+
+def fold(name):
+    """Uppercase without accents, with Latin look-alike letters read as Greek."""
+    text = unicodedata.normalize("NFD", str(name).upper())
+    return "".join(char for char in text if not unicodedata.combining(char)).translate(LATIN_LOOKALIKES)
+
+
+def stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 2:
+            return word[:-len(ending)]
+    return word
+
+
+def place_key(name):
+    """Normalized key of a place name, e.g. "Δυτική Αττική" -> "ΔΥΤΙΚ ΑΤΤΙΚ"."""
+    return " ".join(stem(word) for word in re.findall(WORD, fold(name)) if word not in STOPWORDS)
+
+
+def abbreviation_pattern(name):
+    """Regex over keys for a name with abbreviated words ("ΘΕΣ/ΝΙΚΗΣ", "Κ ΜΑΚΕΔΟΝΙΑΣ"), else None."""
+    words, abbreviated = [], False
+    for word in re.findall(WORD + r"(?:/" + WORD + r")?\.?", fold(name)):
+        if word.rstrip(".") in STOPWORDS:
+            continue
+        if "/" in word:
+            prefix, suffix = word.rstrip(".").split("/")
+            words.append(re.escape(prefix) + r"\w*" + re.escape(stem(suffix)))
+        elif word.endswith(".") or len(word) <= 2:
+            words.append(re.escape(word.rstrip(".")) + r"\w*")
+        else:
+            words.append(re.escape(stem(word)))
+            continue
+        abbreviated = True
+    return re.compile(" ".join(words)) if abbreviated and words else None
+
+
+def trigram_similarity(queries, keys):
+    """Dice coefficient of the trigram sets of every query and key, as one matrix product."""
+    grams = [{padded[i:i + 3] for i in range(len(padded) - 2)} for padded in (f" {key} " for key in queries + keys)]
+    vocabulary = {gram: column for column, gram in enumerate(sorted(set().union(*grams)))}
+    incidence = np.zeros((len(grams), len(vocabulary)), dtype=np.float32)
+    rows = np.repeat(np.arange(len(grams)), [len(gram_set) for gram_set in grams])
+    incidence[rows, [vocabulary[gram] for gram_set in grams for gram in gram_set]] = 1
+    query, key = incidence[:len(queries)], incidence[len(queries):]
+    sizes = incidence.sum(axis=1)
+    return 2 * (query @ key.T) / (sizes[:len(queries), None] + sizes[None, len(queries):])
+
+
+class Gazetteer:
+    """Places of the region and regional unit layers with a normalized-key index."""
+
+    def __init__(self, geocoder=None):
+        geocoder = geocoder or default_geocoder()
+        self.places, self.keys, self.canonical = {}, {}, {}
+        for level in LEVELS:
+            layer = geocoder.layers[level]
+            points = shapely.point_on_surface(layer.polygons)
+            self.places[level] = pd.DataFrame({
+                "name": layer.names,
+                "name_greek": layer.names_greek,
+                "lat": shapely.get_y(points),
+                "lon": shapely.get_x(points),
+            })
+            self.keys[level] = {}
+            self.canonical[level] = {}
+            for position, (name, name_greek) in enumerate(zip(layer.names, layer.names_greek)):
+                self.keys[level].setdefault(place_key(name_greek), position)
+                self.keys[level].setdefault(name.upper(), position)
+        units = self.places["regional_units"]
+        parent, _ = geocoder.layers["regions"].match(units["lat"], units["lon"])
+        units["parent"] = np.where(parent >= 0, self.places["regions"]["name"].to_numpy()[parent], None)
+        self.places["regions"]["parent"] = None
+
+    def add_aliases(self, level, aliases):
+        """Register dataset spellings as names of places: {alias: any name of the place}.
+
+        The first alias of a place becomes its canonical name in resolve().
+        Returns the matches of the aliases for review.
+        """
+        matches = self.match(list(aliases.values()), level)
+        for alias, name in aliases.items():
+            position = matches.at[name, "position"]
+            if matches.at[name, "method"] in ("exact", "abbreviation", "fuzzy"):
+                self.keys[level].setdefault(place_key(alias), position)
+                self.canonical[level].setdefault(position, alias)
+        return matches
+
+    def lookup(self, value, level):
+        """(position, method) of a single name by key or abbreviation, or (-1, None)."""
+        keys = self.keys[level]
+        key = place_key(value)
+        if key in keys:
+            return keys[key], "exact"
+        if value.strip().upper() in keys:
+            return keys[value.strip().upper()], "exact"
+        pattern = abbreviation_pattern(value)
+        if pattern is not None:
+            found = {position for candidate, position in keys.items() if pattern.fullmatch(candidate)}
+            if len(found) == 1:
+                return found.pop(), "abbreviation"
+        return -1, None
+
+    def match(self, values, level):
+        """Place of each distinct name, indexed by the name.
+
+        Columns: position (-1 when unmatched), method (exact, abbreviation, list,
+        partial list with parts that name no place, fuzzy or unmatched), score
+        (fuzzy similarity), places (number of distinct places named) and the place's
+        name, name_greek, parent, lat and lon.
+        """
+        values = pd.unique(pd.Series(values, dtype=object).dropna())
+        result = pd.DataFrame(index=pd.Index(values, dtype=object, name="value"))
+        result["position"], result["method"], result["score"], result["places"] = -1, "unmatched", np.nan, 0
+
+        pending = []
+        for value in values:
+            position, method = self.lookup(value, level)
+            if position < 0:
+                # A list of places: resolve each part on its own, the first one gives the location
+                parts = [part for part in PLACE_SEPARATORS.split(fold(value)) if place_key(part)]
+                if len(parts) == 1 and len(parts[0].split()) > 1:
+                    parts = parts[0].split()
+                found = [self.lookup(part, level)[0] for part in parts] if len(parts) > 1 else []
+                resolved = list(dict.fromkeys(position for position in found if position >= 0))
+                if resolved:
+                    # A list with parts that name no place is only located, never renamed (see resolve)
+                    position, method = resolved[0], "partial" if -1 in found else "list"
+                    result.at[value, "places"] = len(resolved)
+            if position >= 0:
+                result.at[value, "position"], result.at[value, "method"] = position, method
+                if method not in ("list", "partial"):
+                    result.at[value, "places"] = 1
+            else:
+                pending.append(value)
+
+        if pending:
+            keys = list(self.keys[level])
+            similarity = trigram_similarity([place_key(value) for value in pending], keys)
+            best = similarity.argmax(axis=1)
+            score = similarity[np.arange(len(pending)), best]
+            accepted = score >= FUZZY_THRESHOLD
+            positions = np.array([self.keys[level][keys[column]] for column in best])
+            result.loc[pending, "score"] = score.round(3)
+            result.loc[np.array(pending, dtype=object)[accepted], "position"] = positions[accepted]
+            result.loc[np.array(pending, dtype=object)[accepted], "method"] = "fuzzy"
+            result.loc[np.array(pending, dtype=object)[accepted], "places"] = 1
+
+        matched = result["position"].to_numpy() >= 0
+        places = self.places[level].iloc[result["position"].clip(lower=0)].set_axis(result.index)
+        return result.join(places.where(pd.Series(matched, index=result.index), axis=0))
+
+    def resolve(self, values, level, canonical, fallback_level=None):
+        """Dataset name and coordinates of each distinct raw name, indexed by the name.
+
+        canonical: {dataset name: (lat, lon)} of the established names, which resolve
+        to themselves. Other names get the canonical name of their place when they
+        name a single place, and keep their own name otherwise (lists of places,
+        including lists with parts that name no place); they are located at
+        the place's coordinates (canonical or the point on its polygon). Names with
+        no exact place at `level` are looked up by key at `fallback_level` (e.g. a
+        region given as regional unit) before a fuzzy match is accepted. Unmatched
+        names keep NaN coordinates.
+        """
+        values = pd.Series(values, dtype=object).dropna()
+        known = pd.unique(values[values.isin(canonical.keys())])
+        result = pd.DataFrame({
+            "name": known,
+            "lat": [canonical[name][0] for name in known],
+            "lon": [canonical[name][1] for name in known],
+            "method": "canonical",
+        }, index=pd.Index(known, dtype=object, name="value"))
+
+        matches = self.match(values[~values.isin(canonical.keys())], level)
+        if fallback_level is not None:
+            inexact = matches.index[matches["method"].isin(["fuzzy", "unmatched"])]
+            for value in inexact:
+                position, method = self.lookup(value, fallback_level)
+                if position >= 0:
+                    place = self.places[fallback_level].iloc[position]
+                    matches.loc[value, ["position", "method", "score", "places", "name", "name_greek", "lat",
+                                        "lon", "parent"]] = [
+                        -1, fallback_level, np.nan, 1, place["name"], place["name_greek"], place["lat"],
+                        place["lon"], place["parent"]]
+        # A name of a single place, or a list whose every part names the same place
+        whole = matches["method"].isin(["exact", "abbreviation", "fuzzy"]) | (
+            (matches["method"] == "list") & (matches["places"] == 1))
+        names = [self.canonical[level].get(position, value) if single else value
+                 for value, position, single in zip(matches.index, matches["position"], whole)]
+        coordinates = [canonical.get(name, (lat, lon)) for name, lat, lon in zip(names, matches["lat"], matches["lon"])]
+        resolved = pd.DataFrame({
+            "name": names,
+            "lat": [lat for lat, _ in coordinates],
+            "lon": [lon for _, lon in coordinates],
+            "method": matches["method"],
+            "score": matches["score"],
+            "place": matches["name"],
+            "parent": matches["parent"],
+            "places": matches["places"],
+        }, index=matches.index)
+        return pd.concat([result, resolved]) if len(resolved) else result
+
+
+def review_report(resolutions, counts):
+    """Resolutions that were not exact, most frequent first, for manual review.
+
+    resolutions: {level: resolve() frame}; counts: {level: value_counts() of the raw names}.
+    """
+    frames = []
+    for level, resolved in resolutions.items():
+        review = resolved[~resolved["method"].isin(["canonical", "exact"])]
+        frames.append(review.assign(level=level, rows=counts[level].reindex(review.index).to_numpy())
+                      .rename_axis("value").reset_index())
+    report = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return report.reindex(columns=REVIEW_COLUMNS).sort_values(["level", "rows"], ascending=[True, False])
+
@@ -0,0 +1,388 @@
+"""Generate synthetic RAE permit datasets for scale and load testing.
+
+Permits are resampled from the real cleaned dataset, so regions, regional units,
+technologies, capacities and date gaps follow the production distributions.
+The generator writes both the raw monthly register snapshots (same layout and
+dirty spellings as the files in data/permits) and the cleaned output that
+load_data() reads.
+
+Usage:
+    python generate_synthetic_data.py --scale 10
+    python generate_synthetic_data.py --scale 1000 --format csv --no-raw
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from data_loader import build_arrow
+
+SEED_FILE = os.path.join("data", "permits", "final_permits_cleaned.xlsx")
+DEFAULT_OUTPUT_DIR = os.path.join("data", "synthetic")
+EXCEL_MAX_ROWS = 1_048_576
+CHUNK_SIZE = 250_000
+
+# Same publication cadence as the real register snapshots in data/permits
+SNAPSHOT_MONTHS = [
+    "2020-12", "2021-03", "2021-05", "2021-08", "2021-10", "2022-03", "2022-09", "2022-12",
+    "2023-01", "2023-02", "2023-03", "2023-05", "2023-06", "2023-07", "2023-09", "2023-10",
+    "2023-11", "2024-02", "2024-03", "2024-05", "2024-09", "2024-10", "2024-11", "2024-12"
+]
+
+greek_month_names = {
+    1: "ΙΑΝΟΥΑΡΙΟΣ", 2: "ΦΕΒΡΟΥΑΡΙΟΣ", 3: "ΜΑΡΤΙΟΣ", 4: "ΑΠΡΙΛΙΟΣ", 5: "ΜΑΙΟΣ", 6: "ΙΟΥΝΙΟΣ",
+    7: "ΙΟΥΛΙΟΣ", 8: "ΑΥΓΟΥΣΤΟΣ", 9: "ΣΕΠΤΕΜΒΡΙΟΣ", 10: "ΟΚΤΩΒΡΙΟΣ", 11: "ΝΟΕΜΒΡΙΟΣ", 12: "ΔΕΚΕΜΒΡΙΟΣ"
+}
+
+# Reverse of perifereia_translation_map in preprocess_data.py
+region_to_greek = {
+    "Central Greece": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
+    "Thessaly": "ΘΕΣΣΑΛΙΑΣ",
+    "Central Macedonia": "ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
+    "Western Macedonia": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
+    "Eastern Macedonia and Thrace": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
+    "Western Greece": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
+    "Peloponnese": "ΠΕΛΟΠΟΝΝΗΣΟΥ",
+    "Epirus": "ΗΠΕΙΡΟΥ",
+    "Attica": "ΑΤΤΙΚΗΣ",
+    "South Aegean": "ΝΟΤΙΟΥ ΑΙΓΑΙΟΥ",
+    "Crete": "ΚΡΗΤΗΣ",
+    "North Aegean": "ΒΟΡΕΙΟΥ ΑΙΓΑΙΟΥ",
+    "Ionian Islands": "ΙΟΝΙΩΝ ΝΗΣΙΩΝ",
+}
+
+# Raw spellings seen in the monthly files (resolved by the gazetteer, see gazetteer.py)
+region_variants = {
+    "ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ": ["Κ ΜΑΚΕΔΟΝΙΑΣ"],
+    "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ": ["ΣΤ ΕΛΛΑΔΑΣ", "ΣΤΕΡΕΑ ΕΛΛΑΔΑ", "ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ", "ΣΤΕΡΕΆΣ ΕΛΛΆΔΑΣ", "ΣΤΕΡΑΙΑΣ ΕΛΛΑΔΑΣ"],
+    "ΝΟΤΙΟΥ ΑΙΓΑΙΟΥ": ["Ν ΑΙΓΑΙΟΥ"],
+    "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ": [
+        "ΑΝ. ΜΑΚΕΔΟΝΙΑΣ & ΘΡΑΚΗΣ", "ΑΝ ΜΑΚΕΔΟΝΙΑΣ ΘΡΑΚΗΣ", "ΑΝΑΤΟΛΙΚΗ ΜΑΚΕΔΟΝΙΑ ΚΑΙ ΘΡΑΚΗΣ",
+        "ΑΝ.ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ", "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ & ΘΡΑΚΗΣ", "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΘΡΑΚΗΣ"
+    ],
+    "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ": ["Δ. ΕΛΛΑΔΑΣ", "ΔΥΤΙΚΉΣ ΕΛΛΆΔΑΣ", "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ", "ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ", "Δ ΕΛΛΑΔΑΣ"],
+    "ΒΟΡΕΙΟΥ ΑΙΓΑΙΟΥ": ["Β ΑΙΓΑΙΟΥ"],
+    "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ": ["Δ ΜΑΚΕΔΟΝΙΑΣ"],
+    "ΙΟΝΙΩΝ ΝΗΣΙΩΝ": ["ΙΟΝΙΩΝ ΝΗΣΩΝ"],
+}
+
+# Multi-region values that the pipeline folds into "Others"
+multi_region_values = [
+    "ΘΕΣΣΑΛΙΑΣ,ΗΠΕΙΡΟΥ", "ΗΠΕΙΡΟΥ & ΘΕΣΣΑΛΙΑΣ", "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ & ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
+    "Δ. ΜΑΚΕΔΟΝΙΑΣ - Κ. ΜΑΚΕΔΟΝΙΑΣ", "ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ - ΘΕΣΣΑΛΙΑΣ", "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ,ΘΕΣΣΑΛΙΑΣ",
+    "ΠΕΛΟΠΟΝΝΗΣΟΥ - ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ", "ΑΤΤΙΚΗΣ,ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ"
+]
+
+# Raw spellings of regional units (resolved by the gazetteer)
+regional_unit_variants = {
+    "ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ": ["ΑΙΤΩΛΟΑΚΑΡΝΑΝΕΙΑΣ", "ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ "],
+    "ΘΕΣΠΡΩΤΙΑΣ": ["ΘΕΣΠΩΤΙΑΣ"],
+    "ΠΡΕΒΕΖΗΣ": ["ΠΡΕΒΕΖΑΣ"],
+    "ΛΑΡΙΣΗΣ": ["ΛΑΡΙΣΑΣ", "ΛΑΡΙΣΣΑΣ"],
+    "ΜΑΓΝΗΣΙΑΣ": ["ΜΑΓΝΗΣΙΑΣ "],
+    "ΚΕΦΑΛΛΗΝΙΑΣ": ["ΚΕΦ/ΝΙΑΣ"],
+    "ΘΕΣΣΑΛΟΝΙΚΗΣ": ["ΘΕΣ/ΝΙΚΗΣ"],
+    "ΒΟΙΩΤΙΑΣ": ["ΒΟΙΩΤΙΑ"],
+    "ΦΘΙΩΤΙΔΑΣ": ["ΦΘΙΩΤΙΔΑ", "ΦΘΟΙΩΤΙΔΑΣ"],
+    "ΦΩΚΙΔΟΣ": ["ΦΩΚΙΔΑΣ"],
+}
+
+# Reverse of technology_translation, plus the spacing/diacritic variants clean_text handles
+technology_to_greek = {
+    "Wind Power": ["ΑΙΟΛΙΚΑ", " ΑΙΟΛΙΚΑ"],
+    "Biomass": ["ΒΙΟΜΑΖΑ"],
+    "Small Hydropower": ["ΜΥΗΕ", "ΜΥΗΕ "],
+    "Photovoltaics": ["ΦΩΤΟΒΟΛΤΑΙΚΑ", "ΦΩΤΟΒΟΛΤΑΪΚΑ"],
+    "Biomass-Biogas": ["ΒΙΟΜΑΖΑ-ΒΙΟΑΕΡΙΟ", "ΒΙΟΜΑΖΑ - ΒΙΟΑΕΡΙΟ"],
+    "Biomass-Combustion": ["ΒΙΟΜΑΖΑ-ΚΑΥΣΗ", "ΒΙΟΜΑΖΑ -ΚΑΥΣΗ"],
+    "Solar Thermal": ["ΗΛΙΟΘΕΡΜΙΚΑ"],
+}
+
+cleaned_columns = [
+    "Company", "Permit ID", "Application Submission Date", "Permit Issuance Date",
+    "Permit Expiration Date", "Region", "Regional Unit", "Municipality", "Installed Capacity (MW)",
+    "Technology", "LAT", "LON", "LAT_UNIT", "LON_UNIT", "index_right", "Regional Unit English",
+    "Regional Unit Greek", "distance_to_match"
+]
+
+# Columns resampled together so that every synthetic row keeps a consistent location
+location_columns = [
+    "Region", "Regional Unit", "Municipality", "Technology", "LAT", "LON", "LAT_UNIT", "LON_UNIT",
+    "index_right", "Regional Unit English", "Regional Unit Greek", "distance_to_match"
+]
+
+raw_columns = [
+    "ΑΙΤΗΣΗ", "ΗΜΕΡΟΜΗΝΙΑ ΥΠΟΒΟΛΗΣ ΑΙΤΗΣΗΣ", "ΕΤΑΙΡΕΙΑ", "AΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ", "ΑΡ. ΒΕΒΑΙΩΣΗΣ ΡΑΕ",
+    "ΗΜΕΡΟΜΗΝΙΑ ΕΚΔ. ΑΔ.ΠΑΡΑΓΩΓΗΣ", "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ", "ΠΕΡΙΦΕΡΕΙΑ", "ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ",
+    "ΔΗΜΟΣ", "ΔΗΜΟΤΙΚΗ ΕΝΟΤΗΤΑ", "ΘΕΣΗ", "ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)", "ΤΕΧΝΟΛΟΓΙΑ"
+]
+
+# Header spellings used from the 2024-05 snapshot onwards
+raw_header_renames = {
+    "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ": "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ. ΠΑΡΑΓΩΓΗΣ",
+    "ΔΗΜΟΣ": "ΔΗΜΟΣ ",
+}
+
+# Probabilities of the data-quality problems preprocess_data.py repairs
+DIRTY_REGION_RATE = 0.15
+DIRTY_UNIT_RATE = 0.10
+DIRTY_TECHNOLOGY_RATE = 0.05
+EXPIRATION_CENTURY_BUG_RATE = 0.30
+INVALID_DATE_RATE = 0.002
+INVALID_CAPACITY_RATE = 0.001
+REVOCATION_RATE = 0.10
+EXTENSION_RATE = 0.05
+CAPACITY_CHANGE_RATE = 0.05
+
+
+def raw_header(month):
+    """Return the raw column headers used by the register snapshot of a given month."""
+    header = [col for col in raw_columns if month < "2022-09" or col != "ΑΡ. ΒΕΒΑΙΩΣΗΣ ΡΑΕ"]
+    if month >= "2024-05":
+        header = [raw_header_renames.get(col, col) for col in header]
+    return header
+
+
+def snapshot_file_name(month):
+    """Build the workbook name of a monthly snapshot, e.g. '2024-12 - Dec.xlsx'."""
+    return f"{month} - {datetime.strptime(month, '%Y-%m').strftime('%b')}.xlsx"
+
+
+class SheetWriter:
+    """Stream rows into a single-sheet xlsx workbook or a gzip CSV file."""
+
+    def __init__(self, path, header, title=None):
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self.is_excel = path.endswith(".xlsx")
+        if self.is_excel:
+            # Write-only mode streams rows to disk instead of holding the sheet in memory
+            self.workbook = Workbook(write_only=True)
+            self.sheet = self.workbook.create_sheet()
+            if title is not None:
+                self.sheet.append([title])
+            self.sheet.append(header)
+        else:
+            # Same layout as the workbooks (title line, then header), so preprocess_data.py reads both
+            rows = ([[title]] if title is not None else []) + [header]
+            pd.DataFrame(rows).to_csv(path, index=False, header=False, compression="gzip")
+
+    def write(self, frame):
+        """Append a DataFrame whose columns follow the writer's header."""
+        if frame.empty:
+            return
+        self.rows += len(frame)
+        if self.is_excel:
+            if self.rows + 2 > EXCEL_MAX_ROWS:
+                raise ValueError(
+                    f"{self.path} would exceed the Excel row limit; rerun with --format csv"
+                )
+            frame = frame.astype(object).where(frame.notna(), None)
+            for row in frame.itertuples(index=False):
+                self.sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+                                   for value in row])
+        else:
+            frame.to_csv(self.path, mode="ab", header=False, index=False,
+                         date_format="%Y-%m-%d %H:%M:%S", compression="gzip")
+
+    def close(self):
+        if self.is_excel:
+            self.workbook.save(self.path)
+
+
+def load_seed(seed_file=SEED_FILE):
+    """Load the real cleaned dataset the synthetic permits are resampled from."""
+    seed = pd.read_excel(seed_file)
+    for col in ["Application Submission Date", "Permit Issuance Date", "Permit Expiration Date"]:
+        seed[col] = pd.to_datetime(seed[col], errors="coerce")
+    seed["Installed Capacity (MW)"] = pd.to_numeric(seed["Installed Capacity (MW)"], errors="coerce")
+    return seed.dropna(subset=["Application Submission Date", "Permit Issuance Date",
+                               "Permit Expiration Date", "Installed Capacity (MW)"]).reset_index(drop=True)
+
+
+def generate_permits(seed, size, first_id, end_date, rng):
+    """Generate `size` synthetic permits in cleaned form plus their change history."""
+    idx = rng.integers(0, len(seed), size)
+    permits = seed.loc[idx, location_columns].reset_index(drop=True)
+
+    # Companies: the seed portfolio is replicated so the company count grows with scale
+    replica = rng.integers(0, max(1, size // len(seed)) + 1, size)
+    company = seed["Company"].iloc[idx].reset_index(drop=True)
+    company = company.where(replica == 0, company.str.cat(pd.Series(replica).astype(str), sep=" "))
+    permits.insert(0, "Company", company)
+    permits.insert(1, "Permit ID", [f"ΑΔ-{i:05d}" for i in range(first_id, first_id + size)])
+
+    # Dates: jitter the submission date and keep the real submission→issuance and validity gaps
+    submission = seed["Application Submission Date"].to_numpy()[idx]
+    submission = submission + rng.normal(0, 45, size).astype("timedelta64[D]")
+    gap = (seed["Permit Issuance Date"] - seed["Application Submission Date"]).to_numpy()[idx]
+    gap = (gap.astype("timedelta64[D]").astype(np.int64) * rng.lognormal(0, 0.2, size)).astype("timedelta64[D]")
+    validity = (seed["Permit Expiration Date"] - seed["Permit Issuance Date"]).to_numpy()[idx]
+    issuance = submission + gap
+    permits.insert(2, "Application Submission Date", submission)
+    permits.insert(3, "Permit Issuance Date", issuance)
+    permits.insert(4, "Permit Expiration Date", issuance + validity.astype("timedelta64[D]"))
+
+    capacity = seed["Installed Capacity (MW)"].to_numpy()[idx] * rng.lognormal(0, 0.15, size)
+    permits.insert(8, "Installed Capacity (MW)", capacity.round(3))
+    permits = permits[permits["Permit Issuance Date"] <= end_date].reset_index(drop=True)
+    size = len(permits)
+
+    # History: some permits are revoked, extended or modified between snapshots
+    months = len(SNAPSHOT_MONTHS)
+    history = pd.DataFrame({
+        "revoked_at": np.where(rng.random(size) < REVOCATION_RATE, rng.integers(1, months, size), months),
+        "extended_at": np.where(rng.random(size) < EXTENSION_RATE, rng.integers(1, months, size), months),
+        "modified_at": np.where(rng.random(size) < CAPACITY_CHANGE_RATE, rng.integers(1, months, size), months),
+        "capacity_factor": rng.uniform(0.8, 1.3, size).round(2),
+        "application": rng.integers(1, 20000, size),
+    })
+
+    # The cleaned output reflects the latest published state of each permit
+    extended = history["extended_at"] < months
+    permits.loc[extended, "Permit Expiration Date"] += pd.DateOffset(years=5)
+    modified = history["modified_at"] < months
+    permits.loc[modified, "Installed Capacity (MW)"] = (
+        permits.loc[modified, "Installed Capacity (MW)"] * history.loc[modified, "capacity_factor"]
+    ).round(3)
+    return permits, history
+
+
+def pick_variant(values, variants, rate, rng):
+    """Replace a fraction of canonical values with one of their raw spelling variants."""
+    values = values.astype(object).copy()
+    dirty = rng.random(len(values)) < rate
+    for canonical, options in variants.items():
+        rows = np.flatnonzero(dirty & (values == canonical))
+        if len(rows):
+            values[rows] = np.asarray(options, dtype=object)[rng.integers(0, len(options), len(rows))]
+    return values
+
+
+def raw_snapshot(permits, history, month_index, rng):
+    """Build the raw register rows of the permits active in one monthly snapshot."""
+    month = SNAPSHOT_MONTHS[month_index]
+    snapshot_date = pd.Period(month, "M").end_time.normalize()
+    months = len(SNAPSHOT_MONTHS)
+
+    expiration = permits["Permit Expiration Date"].copy()
+    not_yet_extended = (history["extended_at"] < months) & (history["extended_at"] > month_index)
+    expiration[not_yet_extended] -= pd.DateOffset(years=5)
+    active = ((permits["Permit Issuance Date"] <= snapshot_date) & (expiration >= snapshot_date)
+              & (history["revoked_at"] > month_index)).to_numpy()
+    rows = permits[active]
+    hist = history[active]
+    expiration = expiration[active]
+    n = len(rows)
+    if n == 0:
+        return pd.DataFrame(columns=raw_header(month))
+
+    capacity = rows["Installed Capacity (MW)"].to_numpy()
+    not_yet_modified = ((hist["modified_at"] < months) & (hist["modified_at"] > month_index)).to_numpy()
+    capacity = np.where(not_yet_modified, (capacity / hist["capacity_factor"].to_numpy()).round(3), capacity)
+    capacity = capacity.astype(object)
+    capacity[rng.random(n) < INVALID_CAPACITY_RATE] = "-"
+
+    # Known publication bug: some 2035/2045/2046 expirations are printed a century early
+    century_bug = expiration.dt.year.isin([2035, 2045, 2046]) & (rng.random(n) < EXPIRATION_CENTURY_BUG_RATE)
+    expiration[century_bug] -= pd.DateOffset(years=100)
+    issuance = rows["Permit Issuance Date"].astype(object).to_numpy()
+    issuance[rng.random(n) < INVALID_DATE_RATE] = "ΕΚΚΡΕΜΕΙ"
+
+    greek_region = rows["Region"].map(region_to_greek).to_numpy(dtype=object)
+    others = (rows["Region"] == "Others").to_numpy()
+    greek_region[others] = np.asarray(multi_region_values, dtype=object)[
+        rng.integers(0, len(multi_region_values), others.sum())]
+
+    tech = rows["Technology"].to_numpy(dtype=object)
+    greek_tech = tech.copy()
+    for english, options in technology_to_greek.items():
+        match = np.flatnonzero(tech == english)
+        choice = np.where(rng.random(len(match)) < DIRTY_TECHNOLOGY_RATE,
+                          rng.integers(0, len(options), len(match)), 0)
+        greek_tech[match] = np.asarray(options, dtype=object)[choice]
+
+    raw = pd.DataFrame({
+        "ΑΙΤΗΣΗ": hist["application"].to_numpy(),
+        "ΗΜΕΡΟΜΗΝΙΑ ΥΠΟΒΟΛΗΣ ΑΙΤΗΣΗΣ": rows["Application Submission Date"].to_numpy(),
+        "ΕΤΑΙΡΕΙΑ": rows["Company"].to_numpy(),
+        "AΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ": rows["Permit ID"].to_numpy(),
+        "ΑΡ. ΒΕΒΑΙΩΣΗΣ ΡΑΕ": None,
+        "ΗΜΕΡΟΜΗΝΙΑ ΕΚΔ. ΑΔ.ΠΑΡΑΓΩΓΗΣ": issuance,
+        "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ": expiration.to_numpy(),
+        # Unknown regions are published with an empty cell
+        "ΠΕΡΙΦΕΡΕΙΑ": pick_variant(greek_region, region_variants, DIRTY_REGION_RATE, rng),
+        "ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ": pick_variant(rows["Regional Unit"].to_numpy(dtype=object),
+                                             regional_unit_variants, DIRTY_UNIT_RATE, rng),
+        "ΔΗΜΟΣ": rows["Municipality"].to_numpy(),
+        "ΔΗΜΟΤΙΚΗ ΕΝΟΤΗΤΑ": None,
+        "ΘΕΣΗ": None,
+        "ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)": capacity,
+        "ΤΕΧΝΟΛΟΓΙΑ": greek_tech,
+    })
+    if month >= "2024-05":
+        raw = raw.rename(columns=raw_header_renames)
+    return raw[raw_header(month)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic RAE permit datasets.")
+    parser.add_argument("--scale", type=float, default=10,
+                        help="Multiple of the real permit count to generate (e.g. 10 to 10000)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx",
+                        help="xlsx mirrors data/permits; csv (gzip) is required above ~1M rows. Both raw "
+                             "formats can be fed to preprocess_data.py --base-dir")
+    parser.add_argument("--no-raw", action="store_true", help="Only write the cleaned output")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-file", default=SEED_FILE)
+    args = parser.parse_args()
+
+    if args.scale <= 0:
+        parser.error("--scale must be positive")
+
+    rng = np.random.default_rng(args.seed)
+    seed = load_seed(args.seed_file)
+    total = int(round(len(seed) * args.scale))
+    end_date = pd.Period(SNAPSHOT_MONTHS[-1], "M").end_time.normalize()
+    extension = ".xlsx" if args.format == "xlsx" else ".csv.gz"
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    cleaned_path = os.path.join(args.output_dir, "final_permits_cleaned" + extension)
+    cleaned_writer = SheetWriter(cleaned_path, cleaned_columns)
+    raw_writers = []
+    if not args.no_raw:
+        for month in SNAPSHOT_MONTHS:
+            year, month_number = (int(part) for part in month.split("-"))
+            title = (f"ΙΣΧΥΟΥΣΕΣ ΑΔΕΙΕΣ ΠΑΡΑΓΩΓΗΣ ΗΛΕΚΤΡΙΚΗΣ ΕΝΕΡΓΕΙΑΣ ΑΠΟ ΑΠΕ  "
+                     f"(ΕΝΗΜΕΡΩΣΗ {greek_month_names[month_number]} {year})")
+            path = os.path.join(args.output_dir, snapshot_file_name(month).replace(".xlsx", extension))
+            raw_writers.append(SheetWriter(path, raw_header(month), title=title))
+
+    start = time.perf_counter()
+    next_id = 1
+    for offset in range(0, total, CHUNK_SIZE):
+        permits, history = generate_permits(seed, min(CHUNK_SIZE, total - offset), next_id, end_date, rng)
+        next_id += CHUNK_SIZE
+        cleaned_writer.write(permits[cleaned_columns])
+        for month_index, writer in enumerate(raw_writers):
+            writer.write(raw_snapshot(permits, history, month_index, rng))
+        print(f"Generated {min(offset + CHUNK_SIZE, total):,}/{total:,} permits")
+
+    for writer in [cleaned_writer] + raw_writers:
+        writer.close()
+    arrow_file = build_arrow(cleaned_path)
+
+    print(f"✅ {cleaned_writer.rows:,} cleaned permits saved to: {cleaned_path} (Arrow artifact: {arrow_file})")
+    for writer in raw_writers:
+        print(f"   {writer.rows:,} rows in {writer.path}")
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Reverse geocoding of coordinates to Greek regions and regional units (prefectures).
+
+A Geocoder loads the polygon layers from data/geo once and keeps an STRtree per
+layer. Points are built in one vectorized call, candidate polygons come from the
+tree's bounding boxes and are confirmed with prepared point-in-polygon tests.
+Points outside every polygon (e.g. just offshore) fall back to the nearest
+polygon, with the distance in degrees like the former gpd.sjoin_nearest join.
+Each lookup costs O(log polygons) instead of a scan over all polygons.
+
+Permits share a few dozen distinct locations, so geocode() matches each distinct
+point once and broadcasts the result to every row. GeocodeCache keeps those
+matches on disk across runs, keyed by the content of the layer file, so a rebuild
+of the dataset only matches the points it has never seen.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+GEO_LAYERS = {
+    "regions": os.path.join("data", "geo", "greece-regions.geojson"),
+    "regional_units": os.path.join("data", "geo", "greece-prefectures.geojson"),
+}
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "geocode")
+
+
+def distinct_points(lat, lon):
+    """(codes, distinct lat, distinct lon) of coordinate arrays; code -1 for missing coordinates."""
+    codes, points = pd.factorize(np.asarray(lat, dtype=float) + 1j * np.asarray(lon, dtype=float))
+    return codes, points.real, points.imag
+
+
+def broadcast(values, codes, fill):
+    """Values of the distinct points back on every row of their codes."""
+    return np.where(codes >= 0, values[np.maximum(codes, 0)] if len(values) else fill, fill)
+
+
+class GeoLayer:
+    """Polygons of one GeoJSON layer with their names and a spatial index."""
+
+    def __init__(self, path):
+        self.path = path
+        frame = gpd.read_file(path).to_crs("EPSG:4326")
+        self.names = frame["name"].to_numpy()
+        self.names_greek = frame["name_greek"].to_numpy()
+        self.polygons = frame.geometry.to_numpy()
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+
+    def match(self, lat, lon):
+        """Index of the containing (or nearest) polygon for each point, -1 for missing coordinates.
+
+        Returns (polygon index, distance in degrees) arrays; the distance is 0 inside a polygon.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        index = np.full(len(lat), -1, dtype=np.int64)
+        distance = np.full(len(lat), np.nan)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        if not len(valid):
+            return index, distance
+
+        points = shapely.points(lon[valid], lat[valid])
+        # Bounding-box candidates from the tree, confirmed by a prepared point-in-polygon test
+        point_idx, polygon_idx = self.tree.query(points)
+        inside = shapely.intersects_xy(self.polygons[polygon_idx], lon[valid][point_idx], lat[valid][point_idx])
+        point_idx, polygon_idx = point_idx[inside], polygon_idx[inside]
+        # On a shared border keep the first polygon, like a point-in-polygon scan would
+        order = np.lexsort((polygon_idx, point_idx))
+        point_idx, first = np.unique(point_idx[order], return_index=True)
+        index[valid[point_idx]] = polygon_idx[order][first]
+        distance[valid[point_idx]] = 0.0
+
+        outside = np.flatnonzero(index[valid] == -1)
+        if len(outside):
+            (nearest_point, nearest_polygon), nearest_distance = self.tree.query_nearest(
+                points[outside], return_distance=True, all_matches=False)
+            index[valid[outside[nearest_point]]] = nearest_polygon
+            distance[valid[outside[nearest_point]]] = nearest_distance
+        return index, distance
+
+
+class Geocoder:
+    """Reverse geocoder over the region and regional unit layers."""
+
+    def __init__(self, layers=None):
+        self.layers = {name: GeoLayer(path) for name, path in (layers or GEO_LAYERS).items()}
+
+    def geocode(self, lat, lon, layer):
+        """Match coordinate columns against one layer.
+
+        Returns a DataFrame aligned with the input with the polygon index, English
+        and Greek name and distance (NaN for rows without coordinates).
+        """
+        lat = pd.to_numeric(pd.Series(lat), errors="coerce")
+        lon = pd.to_numeric(pd.Series(lon), errors="coerce")
+        codes, points_lat, points_lon = distinct_points(lat, lon)
+        index, distance = self.layers[layer].match(points_lat, points_lon)
+        return self.matches(layer, broadcast(index, codes, -1), broadcast(distance, codes, np.nan), lat.index)
+
+    def matches(self, layer, index, distance, rows):
+        """Result frame of geocode() from polygon indexes (-1 for none) and distances."""
+        geo = self.layers[layer]
+        found = index >= 0
+        names = np.where(found, geo.names[index], None)
+        names_greek = np.where(found, geo.names_greek[index], None)
+        return pd.DataFrame({
+            "index": np.where(found, index, np.nan),
+            "name": names,
+            "name_greek": names_greek,
+            "distance": distance,
+        }, index=rows)
+
+    def lookup(self, lat, lon):
+        """Region and regional unit of a single point."""
+        result = {}
+        for name, geo in self.layers.items():
+            index, distance = geo.match([lat], [lon])
+            if index[0] < 0:
+                result[name] = None
+                continue
+            result[name] = {
+                "name": geo.names[index[0]],
+                "name_greek": geo.names_greek[index[0]],
+                "match": "within" if distance[0] == 0 else "nearest",
+                "distance": float(distance[0]),
+            }
+        return result
+
+
+@lru_cache(maxsize=None)
+def default_geocoder():
+    """Process-wide geocoder over data/geo, built on first use."""
+    return Geocoder()
+
+
+class GeocodeCache:
+    """Persistent point -> polygon matches of a geocoder, one Parquet file per layer.
+
+    A layer's file is named after a hash of its GeoJSON, so editing the layer
+    starts a fresh cache instead of serving matches against the old polygons.
+    """
+
+    def __init__(self, geocoder=None, cache_dir=DEFAULT_CACHE_DIR):
+        self.geocoder = geocoder or default_geocoder()
+        self.cache_dir = cache_dir
+        self.computed = 0
+
+    def path(self, layer):
+        with open(self.geocoder.layers[layer].path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{layer}-{digest}.parquet")
+
+    def load(self, layer):
+        path = self.path(layer)
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        return pd.DataFrame({"lat": [], "lon": [], "index": pd.Series([], dtype="int64"), "distance": []})
+
+    def save(self, layer, matches):
+        path = self.path(layer)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        matches.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def geocode(self, lat, lon, layer):
+        """Geocoder.geocode() that only matches the distinct points missing from the cache."""
+        lat = pd.to_numeric(pd.Series(lat), errors="coerce")
+        lon = pd.to_numeric(pd.Series(lon), errors="coerce")
+        codes, points_lat, points_lon = distinct_points(lat, lon)
+        cached = self.load(layer)
+        known = pd.MultiIndex.from_arrays([cached["lat"], cached["lon"]])
+        position = known.get_indexer(pd.MultiIndex.from_arrays([points_lat, points_lon]))
+        missing = position < 0
+        if missing.any():
+            index, distance = self.geocoder.layers[layer].match(points_lat[missing], points_lon[missing])
+            new = pd.DataFrame({"lat": points_lat[missing], "lon": points_lon[missing], "index": index,
+                                "distance": distance})
+            position[missing] = len(cached) + np.arange(missing.sum())
+            cached = pd.concat([cached, new], ignore_index=True)
+            self.save(layer, cached)
+            self.computed += int(missing.sum())
+        index = cached["index"].to_numpy()[position]
+        distance = cached["distance"].to_numpy()[position]
+        return self.geocoder.matches(layer, broadcast(index, codes, -1), broadcast(distance, codes, np.nan),
+                                     lat.index)
@@ -1,10 +1,10 @@
 import streamlit as st
 import folium
 import json
-import pandas as pd
 from streamlit_folium import st_folium
-import os
 from folium.plugins import MarkerCluster
+from aggregations import PERMIT_TOTALS, aggregate
+from data_loader import load_data, dataset_version
 
 # ✅ Load Greece administrative regions GeoJSON
 geojson_path = "data/geo/greece-regions.geojson"
@@ -25,29 +25,27 @@ def load_geojson_units():
 
 @st.cache_data
 def load_permit_data():
-    """Load the processed permit data."""
-    file_path = "data/permits/final_permits_cleaned.xlsx"
-    df = pd.read_excel(file_path)
-    return df.dropna(subset=["LAT", "LON"])  # ✅ Drop rows without coordinates for speed
-
-def get_technology_breakdown(df, region_column, region_value):
-    """Get installed capacity breakdown by technology for a given region or regional unit."""
-    breakdown = df[df[region_column] == region_value].groupby("Technology")["Installed Capacity (MW)"].sum()
+    """Load the processed permit data and its version (the key of the shared aggregation cache)."""
+    df = load_data()
+    return df.dropna(subset=["LAT", "LON"]), dataset_version()  # ✅ Drop rows without coordinates for speed
+
+def get_technology_breakdown(breakdown_df, region_column, region_value):
+    """Format the installed capacity breakdown by technology for a given region or regional unit."""
+    breakdown = breakdown_df[breakdown_df[region_column] == region_value]
     if breakdown.empty:
         return "No data available"
-    return "<br>".join([f"{tech}: {capacity:.2f} MW" for tech, capacity in breakdown.items()])
+    return "<br>".join([f"{tech}: {capacity:.2f} MW"
+                        for tech, capacity in zip(breakdown["Technology"], breakdown["Installed Capacity (MW)"])])
 
 ### 🌍 **REGION MAP**
 def create_combined_map():
     """Create a sleek, modern full-screen Folium map with Greece's regions and permits."""
     greece_geojson = load_geojson()
-    permit_df = load_permit_data()
+    permit_df, version = load_permit_data()
 
-    # ✅ Aggregate permit stats by region
-    permit_summary = permit_df.groupby("Region").agg({
-        "Permit ID": "count",
-        "Installed Capacity (MW)": "sum"
-    }).reset_index()
+    # ✅ Aggregate permit stats by region, and per technology for the popups
+    region_breakdown = aggregate(permit_df, ["Region", "Technology"], PERMIT_TOTALS, version=version, notna=["LAT", "LON"])
+    permit_summary = aggregate(permit_df, ["Region"], PERMIT_TOTALS, version=version, notna=["LAT", "LON"])
 
     permit_summary_dict = permit_summary.set_index("Region").to_dict(orient="index")
 
@@ -82,11 +80,11 @@ def create_combined_map():
         total_capacity = stats["Installed Capacity (MW)"]
 
         # Get technology breakdown for this region
-        tech_breakdown = get_technology_breakdown(permit_df, "Region", region)
+        tech_breakdown = get_technology_breakdown(region_breakdown, "Region", region)
 
         # Get the first valid latitude & longitude for this region
         region_data = permit_df[permit_df["Region"] == region].iloc[0]
-        lat, lon = region_data["LAT"], region_data["LON"]
+        lat, lon = float(region_data["LAT"]), float(region_data["LON"])
 
         # ✅ Add marker with permit count & detailed hover info
         folium.Marker(
@@ -117,18 +115,17 @@ def create_combined_map():
 def create_prefecture_map():
     """Create a sleek, modern Folium map for Greece's **regional units (prefectures)**."""
     greece_geojson_units = load_geojson_units()
-    permit_df = load_permit_data()
+    permit_df, version = load_permit_data()
 
     # ✅ Filter out rows where LAT_UNIT or LON_UNIT are NaN
     permit_df_units = permit_df.dropna(subset=["LAT_UNIT", "LON_UNIT"])
 
-    # Aggregate permit stats by Regional Unit
-    permit_summary_units = permit_df_units.groupby("Regional Unit English").agg({
-        "Permit ID": "count",
-        "Installed Capacity (MW)": "sum"
-    }).reset_index()
+    # Aggregate permit stats by Regional Unit, and per technology for the popups
+    located = ["LAT", "LON", "LAT_UNIT", "LON_UNIT"]
+    unit_breakdown = aggregate(permit_df, ["Regional Unit", "Technology"], PERMIT_TOTALS, version=version, notna=located)
+    permit_summary_units = aggregate(permit_df, ["Regional Unit"], PERMIT_TOTALS, version=version, notna=located)
 
-    permit_summary_units_dict = permit_summary_units.set_index("Regional Unit English").to_dict(orient="index")
+    permit_summary_units_dict = permit_summary_units.set_index("Regional Unit").to_dict(orient="index")
 
     # ✅ Create the Folium map for Prefectures
     prefecture_map = folium.Map(
@@ -157,10 +154,10 @@ def create_prefecture_map():
         total_capacity = stats["Installed Capacity (MW)"]
 
         # Get technology breakdown for this regional unit
-        tech_breakdown = get_technology_breakdown(permit_df_units, "Regional Unit English", unit)
+        tech_breakdown = get_technology_breakdown(unit_breakdown, "Regional Unit", unit)
 
-        unit_data = permit_df_units[permit_df_units["Regional Unit English"] == unit].iloc[0]
-        lat, lon = unit_data["LAT_UNIT"], unit_data["LON_UNIT"]
+        unit_data = permit_df_units[permit_df_units["Regional Unit"] == unit].iloc[0]
+        lat, lon = float(unit_data["LAT_UNIT"]), float(unit_data["LON_UNIT"])
 
         # ✅ Add marker with permit count & hover info
         folium.Marker(
@@ -0,0 +1,40 @@
+"""Gunicorn settings for serving the API in production.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is preloaded in the master process, so the permits dataset is read once
+and the forked workers share its memory copy-on-write. The workers write their
+metrics to RAE_METRICS_DIR (a directory per server by default, removed when it
+exits) and /metrics serves their sum.
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+wsgi_app = "api.wsgi:app"
+bind = os.environ.get("BIND", "0.0.0.0:5001")
+
+# One worker per core by default, each with a few threads for I/O-bound requests
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Load the dataset before forking the workers
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+accesslog = "-"
+
+# Set before the app is preloaded, so the metrics registry picks it up (see api/metrics.py)
+os.environ.setdefault("RAE_METRICS_DIR", os.path.join(tempfile.gettempdir(), f"rae-api-metrics-{os.getpid()}"))
+
+
+def when_ready(server):
+    # Move the preloaded objects out of the GC's tracked generations so garbage
+    # collection in the workers doesn't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def on_exit(server):
+    shutil.rmtree(os.environ["RAE_METRICS_DIR"], ignore_errors=True)
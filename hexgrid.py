@@ -0,0 +1,102 @@
+"""Hexagonal-grid heatmap of permit counts and installed capacity.
+
+Permit locations are binned into pointy-top hexagons laid out in Web Mercator
+space, so cells look regular on the web map, at RESOLUTIONS levels where each one
+halves the hexagon size. HexBins bins every permit at every resolution in a few
+vectorized passes when built (once per dataset version) and keeps, per resolution,
+only the occupied cells' axial coordinates with a cells × technologies matrix of
+counts and capacity. A request picks a column (or sums them) and never touches
+per-permit data.
+"""
+import numpy as np
+import pandas as pd
+
+from clustering import inverse_mercator, mercator, permit_coordinates
+
+RESOLUTIONS = range(0, 6)
+BASE_HEX_SIZE = 0.002  # circumradius at resolution 0 in unit Mercator coordinates, about 60 km over Greece
+SQRT3 = np.sqrt(3)
+
+
+def hex_size(resolution):
+    return BASE_HEX_SIZE / 2 ** resolution
+
+
+def hex_cells(x, y, size):
+    """Axial (q, r) coordinates of the hexagons containing unit Mercator points."""
+    q = (SQRT3 / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    # Cube rounding: round all three cube coordinates and fix the one that moved most
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int32), rr.astype(np.int32)
+
+
+def hex_polygon(q, r, size):
+    """Closed ring of a hexagon's corners as [lon, lat] pairs."""
+    center_x = size * (SQRT3 * q + SQRT3 / 2 * r)
+    center_y = size * 1.5 * r
+    angles = np.radians(30 + 60 * np.arange(7))
+    lat, lon = inverse_mercator(center_x + size * np.cos(angles), center_y + size * np.sin(angles))
+    return [[round(float(a), 6), round(float(b), 6)] for a, b in zip(lon, lat)]
+
+
+class HexBins:
+    """Permit count and capacity per hexagon and technology, for every resolution."""
+
+    def __init__(self, df):
+        lat, lon = permit_coordinates(df)
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        self.technologies, technology_codes = np.unique(df["Technology"].astype(str).to_numpy()[located],
+                                                        return_inverse=True)
+        capacity = np.nan_to_num(pd.to_numeric(df["Installed Capacity (MW)"], errors="coerce").to_numpy(dtype=float)[located])
+        x, y = mercator(lat[located], lon[located])
+
+        self.levels = {}
+        for resolution in RESOLUTIONS:
+            q, r = hex_cells(x, y, hex_size(resolution))
+            cells, inverse = np.unique(np.column_stack([q, r]), axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+            # One flat bincount over (cell, technology) pairs fills the whole matrix
+            slot = inverse * len(self.technologies) + technology_codes
+            shape = (len(cells), len(self.technologies))
+            counts = np.bincount(slot, minlength=shape[0] * shape[1]).reshape(shape).astype(np.uint32)
+            capacities = np.bincount(slot, weights=capacity, minlength=shape[0] * shape[1]).reshape(shape)
+            self.levels[resolution] = (cells, counts, capacities)
+        self.heatmaps = {}  # (resolution, technology) -> FeatureCollection, built on first request
+
+    def heatmap(self, resolution, technology=None):
+        """GeoJSON FeatureCollection of the occupied hexagons, optionally for one technology.
+
+        Raises KeyError for an unknown resolution or technology.
+        """
+        key = (resolution, technology)
+        if key not in self.heatmaps:
+            self.heatmaps[key] = self.build_heatmap(resolution, technology)
+        return self.heatmaps[key]
+
+    def build_heatmap(self, resolution, technology):
+        cells, counts, capacities = self.levels[resolution]
+        if technology is None:
+            count, capacity = counts.sum(axis=1), capacities.sum(axis=1)
+        else:
+            matches = np.flatnonzero(self.technologies == technology)
+            if not len(matches):
+                raise KeyError(technology)
+            count, capacity = counts[:, matches[0]], capacities[:, matches[0]]
+
+        size = hex_size(resolution)
+        features = []
+        for position in np.flatnonzero(count):
+            q, r = cells[position]
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [hex_polygon(q, r, size)]},
+                "properties": {"count": int(count[position]), "capacity_mw": round(float(capacity[position]), 3)},
+            })
+        return {"type": "FeatureCollection", "features": features}
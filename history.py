@@ -0,0 +1,88 @@
+"""Historical store of the monthly permit register snapshots.
+
+preprocess_data.py writes every monthly snapshot, cleaned like the latest state,
+as a Parquet dataset partitioned by year and month (history/year=2023/month=5/)
+next to the cleaned dataset. A query as of a month opens only the directory of
+the latest snapshot up to that month and reads only the requested columns, so
+its cost does not grow with the number of months kept.
+"""
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import arrow_to_frame, resolve_data_file
+
+HISTORY_DIR = "history"
+SNAPSHOT = "Snapshot"
+
+
+def history_path(file_path=None):
+    """Directory of the historical store kept next to a cleaned dataset file."""
+    return os.path.join(os.path.dirname(resolve_data_file(file_path)), HISTORY_DIR)
+
+
+def parse_month(value):
+    """A YYYY-MM string as a monthly pd.Period; ValueError if malformed."""
+    if not re.fullmatch(r"\d{4}-\d{2}", value or ""):
+        raise ValueError(f"Expected YYYY-MM, got {value!r}")
+    return pd.Period(value, freq="M")
+
+
+def write_history(df, path):
+    """Write snapshot rows (with a "YYYY-MM" Snapshot column) as a year/month partitioned dataset.
+
+    Partitions present in df replace the stored ones; other months are kept.
+    """
+    months = pd.PeriodIndex(df[SNAPSHOT], freq="M")
+    table = pa.Table.from_pandas(
+        df.drop(columns=[SNAPSHOT]).assign(year=months.year, month=months.month), preserve_index=False)
+    pq.write_to_dataset(table, path, partition_cols=["year", "month"], existing_data_behavior="delete_matching")
+    return path
+
+
+class HistoryStore:
+    """Read access to the partitioned snapshots, one partition per query."""
+
+    def __init__(self, path):
+        self.path = path
+        self.months = []
+        if os.path.isdir(path):
+            for year in os.listdir(path):
+                year_match = re.fullmatch(r"year=(\d+)", year)
+                if not year_match:
+                    continue
+                for month in os.listdir(os.path.join(path, year)):
+                    month_match = re.fullmatch(r"month=(\d+)", month)
+                    if month_match:
+                        self.months.append(pd.Period(year=int(year_match[1]), month=int(month_match[1]), freq="M"))
+        self.months.sort()
+        self.columns = pq.ParquetDataset(self.partition(self.months[-1])).schema.names if self.months else []
+
+    def partition(self, month):
+        return os.path.join(self.path, f"year={month.year}", f"month={month.month}")
+
+    def snapshot(self, as_of):
+        """The latest snapshot month up to as_of (a pd.Period), or None if there is none."""
+        earlier = [month for month in self.months if month <= as_of]
+        return earlier[-1] if earlier else None
+
+    def read_all(self, columns=None, filters=None):
+        """Every stored snapshot with its "YYYY-MM" Snapshot column, or None without history."""
+        if not self.months:
+            return None
+        table = pq.read_table(self.path, columns=None if columns is None else list(columns) + ["year", "month"],
+                              filters=filters)
+        frame = arrow_to_frame(table)
+        months = frame.pop("year").astype(int).astype(str) + "-" + frame.pop("month").astype(int).map("{:02d}".format)
+        return frame.assign(**{SNAPSHOT: months.to_numpy()})
+
+    def read(self, as_of, columns=None, filters=None):
+        """The register as of a month, restricted to columns, or None before the first snapshot."""
+        month = self.snapshot(as_of)
+        if month is None:
+            return None
+        table = pq.read_table(self.partition(month), columns=columns, filters=filters)
+        return arrow_to_frame(table)
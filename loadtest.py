@@ -0,0 +1,194 @@
+"""Load-test a locally running API with realistic dashboard traffic.
+
+Virtual users replay the requests a dashboard session makes (GeoJSON layers,
+map data, every /visualization/* chart and the occasional full data table)
+and the tool reports per-route p50/p95/p99 latency, throughput and error rate.
+
+Usage:
+    python api/appfordoc.py                     # in another terminal
+    python loadtest.py --concurrency 8 --duration 60 --output results.json
+    python loadtest.py --compare results.json   # compare a new run with a previous one
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+# Relative weight of each route in the dashboard traffic mix: every page load fetches
+# all charts and both map layers once, the full table is opened far less often.
+traffic_mix = {
+    "/geojson/regions": 1.0,
+    "/geojson/regional_units": 1.0,
+    "/map/permits": 1.0,
+    "/visualization/permit_distribution": 1.0,
+    "/visualization/permits_over_time": 1.0,
+    "/visualization/technology_growth": 1.0,
+    "/visualization/installed_capacity": 1.0,
+    "/visualization/top_permits": 1.0,
+    "/visualization/energy_mix": 1.0,
+    "/visualization/expiring_permits": 1.0,
+    "/visualization/cumulative_installed_capacity": 1.0,
+    "/visualization/permit_type_distribution": 1.0,
+    "/visualization/sankey_permits": 1.0,
+    "/visualization/processing_time": 1.0,
+    "/visualization/violin_processing_time": 1.0,
+    "/data/table": 0.2,
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(pct * len(sorted_values) / 100) - 1)]
+
+
+class Recorder:
+    """Collect per-route latencies, errors and response sizes from all workers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, route, seconds, ok, size):
+        with self.lock:
+            sample = self.samples.setdefault(route, {"latencies": [], "errors": 0, "bytes": 0})
+            sample["latencies"].append(seconds)
+            sample["bytes"] += size
+            if not ok:
+                sample["errors"] += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        all_latencies = []
+        total_errors = 0
+        for route, sample in sorted(self.samples.items()):
+            latencies = sorted(sample["latencies"])
+            all_latencies += latencies
+            total_errors += sample["errors"]
+            routes[route] = summarize(latencies, sample["errors"], elapsed, sample["bytes"])
+        overall = summarize(sorted(all_latencies), total_errors, elapsed,
+                            sum(s["bytes"] for s in self.samples.values()))
+        return routes, overall
+
+
+def summarize(latencies, errors, elapsed, size):
+    count = len(latencies)
+    to_ms = lambda value: None if value is None else round(value * 1000, 2)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "max_ms": to_ms(latencies[-1] if latencies else None),
+        "mean_ms": to_ms(sum(latencies) / count if count else None),
+        "avg_response_bytes": int(size / count) if count else 0,
+    }
+
+
+def worker(base_url, routes, weights, deadline, recorder, timeout, seed):
+    """Issue weighted random requests until the deadline."""
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        route = rng.choices(routes, weights)[0]
+        start = time.perf_counter()
+        ok, size = True, 0
+        try:
+            with urllib.request.urlopen(base_url + route, timeout=timeout) as response:
+                size = len(response.read())
+        except urllib.error.HTTPError as e:
+            ok = False
+            size = len(e.read() or b"")
+        except (urllib.error.URLError, OSError):
+            ok = False
+        recorder.record(route, time.perf_counter() - start, ok, size)
+
+
+def print_report(routes, overall, previous=None):
+    header = f"{'route':<48}{'reqs':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if previous:
+        header += f"{'Δp95':>9}"
+    print(header)
+    rows = list(routes.items()) + [("TOTAL", overall)]
+    for route, stats in rows:
+        line = (f"{route:<48}{stats['requests']:>7}{stats['error_rate'] * 100:>6.1f}%"
+                f"{stats['throughput_rps']:>8.1f}{stats['p50_ms'] or 0:>9.1f}"
+                f"{stats['p95_ms'] or 0:>9.1f}{stats['p99_ms'] or 0:>9.1f}")
+        if previous:
+            before = previous["overall"] if route == "TOTAL" else previous["routes"].get(route)
+            if before and before.get("p95_ms") and stats["p95_ms"]:
+                line += f"{(stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:>+8.1f}%"
+        print(line)
+    print("latencies in ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard traffic against a local API.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--routes", help="Comma-separated subset of routes to exercise")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare p95 latency against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mix = dict(traffic_mix)
+    if args.routes:
+        mix = {route: mix.get(route, 1.0) for route in args.routes.split(",")}
+    routes, weights = list(mix), list(mix.values())
+    base_url = args.base_url.rstrip("/")
+
+    try:
+        urllib.request.urlopen(base_url + "/", timeout=args.timeout).read()
+    except (urllib.error.URLError, OSError) as e:
+        sys.exit(f"API not reachable at {base_url}: {e}")
+
+    recorder = Recorder()
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(base_url, routes, weights, deadline, recorder,
+                                                     args.timeout, args.seed + i), daemon=True)
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    route_stats, overall = recorder.summary(elapsed)
+    results = {
+        "started_at": started_at,
+        "base_url": base_url,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "traffic_mix": mix,
+        "overall": overall,
+        "routes": route_stats,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(route_stats, overall, previous)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
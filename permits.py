@@ -0,0 +1,102 @@
+"""Permit detail lookups by Permit ID.
+
+PermitIndex hashes every Permit ID to its row position once per dataset and keeps
+the record columns as JSON-ready arrays (dates as YYYY-MM-DD, missing values as
+None), so looking up a permit is a dict access plus one value per column instead
+of a filter over the whole table. PermitVersions reads the monthly versions of a
+permit from the history store only when they are asked for, and keeps the most
+recently requested ones in memory.
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_CACHED_PERMITS = 4096
+
+# Internal columns left out of permit records, like /data/table does
+HIDDEN_COLUMNS = ["Year", "LAT", "LON", "LAT_UNIT", "LON_UNIT", "Processing Time (Days)", "Regional Unit Greek",
+                  "index_right", "distance_to_match"]
+
+
+def json_column(series):
+    """Column values as JSON-ready Python objects."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime("%Y-%m-%d")
+    return series.astype(object).where(series.notna(), None).to_numpy()
+
+
+class PermitIndex:
+    """Hash index from Permit ID to the permit's record."""
+
+    def __init__(self, df):
+        self.columns = [name for name in df.columns if name not in HIDDEN_COLUMNS]
+        self.values = [json_column(df[name]) for name in self.columns]
+        ids = df["Permit ID"].astype(str).str.strip()
+        # Permit IDs are unique after preprocessing; keep the first row if one repeats
+        self.positions = {}
+        for position, permit_id in enumerate(ids):
+            self.positions.setdefault(permit_id, position)
+
+    def __contains__(self, permit_id):
+        return str(permit_id).strip() in self.positions
+
+    def get(self, permit_id):
+        """Record of one permit, or None if the ID is unknown."""
+        position = self.positions.get(str(permit_id).strip())
+        if position is None:
+            return None
+        return {name: values[position] for name, values in zip(self.columns, self.values)}
+
+    def lookup(self, permit_ids):
+        """Records of several permits as ({permit_id: record}, [unknown permit_ids])."""
+        found, missing = {}, []
+        for permit_id in permit_ids:
+            record = self.get(permit_id)
+            if record is None:
+                missing.append(permit_id)
+            else:
+                found[permit_id] = record
+        return found, missing
+
+
+class PermitVersions:
+    """Permit ID -> the permit's records in every monthly snapshot, oldest first, read on demand."""
+
+    def __init__(self, store, max_permits=MAX_CACHED_PERMITS):
+        """store: a HistoryStore; only the rows of the requested permits are read from it."""
+        self.store = store
+        self.max_permits = max_permits
+        self.columns = [name for name in store.columns if name not in HIDDEN_COLUMNS]
+        self.cache = OrderedDict()  # permit_id -> records
+        self.lock = threading.Lock()
+
+    def get(self, permit_id):
+        """Records of one permit per snapshot (empty if it has no history)."""
+        return self.get_many([permit_id])[str(permit_id).strip()]
+
+    def get_many(self, permit_ids):
+        """{permit_id (stripped): records per snapshot} for several permits, with one read for the uncached ones."""
+        permit_ids = list(dict.fromkeys(str(permit_id).strip() for permit_id in permit_ids))
+        with self.lock:
+            versions = {permit_id: self.cache[permit_id] for permit_id in permit_ids if permit_id in self.cache}
+            for permit_id in versions:
+                self.cache.move_to_end(permit_id)
+        missing = [permit_id for permit_id in permit_ids if permit_id not in versions]
+        if not missing:
+            return versions
+
+        read = {permit_id: [] for permit_id in missing}
+        history = self.store.read_all(self.columns, filters=[("Permit ID", "in", missing)])
+        if history is not None and not history.empty:
+            history = history.sort_values(["Snapshot", "Permit ID"], kind="stable")
+            columns = ["Snapshot"] + [name for name in self.columns if name != "Snapshot"]
+            values = [json_column(history[name]) for name in columns]
+            for position, permit_id in enumerate(history["Permit ID"].astype(str).str.strip()):
+                read[permit_id].append({name: column[position] for name, column in zip(columns, values)})
+        with self.lock:
+            for permit_id, records in read.items():
+                self.cache[permit_id] = records
+            while len(self.cache) > self.max_permits:
+                self.cache.popitem(last=False)
+        return {**versions, **read}
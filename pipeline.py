@@ -0,0 +1,119 @@
+"""Staged, resumable pipeline with per-stage artifact caching.
+
+A Pipeline runs its Stages in order, each taking the previous stage's output
+frame. Every stage output is cached as a Parquet artifact named after the stage,
+the base directory and a key that hashes the stage's input key with the stage's
+code version (the source of the stage function and of everything listed as its
+dependencies: helper functions, mapping tables, modules, data files). Pipelines
+over different base directories share the cache directory without evicting each
+other's artifacts. A rerun walks the
+stages, skips those whose artifact exists, loads the last cached artifact only
+when a later stage has to run, and executes the invalidated stages from there.
+"""
+import hashlib
+import inspect
+import os
+import time
+import types
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "pipeline")
+
+
+def fingerprint(dependency):
+    """Bytes that change whenever a stage dependency changes."""
+    if isinstance(dependency, types.ModuleType):
+        dependency = dependency.__file__
+    if isinstance(dependency, str) and os.path.isfile(dependency):
+        with open(dependency, "rb") as f:
+            return f.read()
+    if inspect.isfunction(dependency) or inspect.isclass(dependency):
+        return inspect.getsource(dependency).encode()
+    return repr(dependency).encode()
+
+
+def files_key(paths):
+    """Key of a set of input files: their names and contents."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        digest.update(hashlib.sha256(fingerprint(path)).digest())
+    return digest.hexdigest()[:16]
+
+
+class Stage:
+    """A named step `run(data, base_dir) -> DataFrame` with the code it depends on.
+
+    `outputs(base_dir)` lists files the stage writes besides its artifact; the stage
+    reruns if any of them is missing.
+    """
+
+    def __init__(self, name, run, dependencies=(), outputs=None):
+        self.name = name
+        self.run = run
+        self.dependencies = list(dependencies)
+        self.outputs = outputs
+
+    def version(self):
+        digest = hashlib.sha256(fingerprint(self.run))
+        for dependency in self.dependencies:
+            digest.update(hashlib.sha256(fingerprint(dependency)).digest())
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """Ordered stages sharing one artifact cache directory."""
+
+    def __init__(self, stages, base_dir, cache_dir=DEFAULT_CACHE_DIR):
+        self.stages = stages
+        self.base_dir = base_dir
+        self.cache_dir = cache_dir
+        # Stages read from and write to the base directory: its artifacts are its own
+        self.scope = hashlib.sha256(os.path.realpath(base_dir).encode()).hexdigest()[:8]
+
+    def artifact(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage.name}-{self.scope}-{key}.parquet")
+
+    def run(self, source, source_key, force=None, until=None):
+        """Run the stages on `source` (identified by `source_key`) and return the last output.
+
+        force: name of a stage to rerun together with every stage after it, cached or not.
+        until: name of the last stage to run.
+        """
+        names = [stage.name for stage in self.stages]
+        for name in (force, until):
+            if name is not None and name not in names:
+                raise ValueError(f"Unknown stage: {name}. Stages: {', '.join(names)}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        data, pending, key = source, None, source_key + self.scope
+        forced = False
+        for stage in self.stages:
+            key = hashlib.sha256((key + stage.version()).encode()).hexdigest()[:16]
+            path = self.artifact(stage, key)
+            forced = forced or stage.name == force
+            outputs = stage.outputs(self.base_dir) if stage.outputs else []
+            if not forced and os.path.exists(path) and all(os.path.exists(output) for output in outputs):
+                print(f"⏭️  {stage.name}: cached ({os.path.basename(path)})")
+                pending = path
+            else:
+                if pending is not None:
+                    data, pending = pd.read_parquet(pending), None
+                start = time.perf_counter()
+                data = stage.run(data, self.base_dir)
+                self.store(stage, data, path)
+                print(f"✅ {stage.name}: {len(data)} rows in {time.perf_counter() - start:.1f}s")
+            if stage.name == until:
+                break
+        return pd.read_parquet(pending) if pending is not None else data
+
+    def store(self, stage, data, path):
+        """Write a stage artifact atomically and drop the stage's outdated artifacts for the same base directory."""
+        tmp_path = path + ".tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        for name in os.listdir(self.cache_dir):
+            if (name.startswith(f"{stage.name}-{self.scope}-") and name.endswith(".parquet")
+                    and name != os.path.basename(path)):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,96 @@
+"""Company portfolios: per-company totals, top-k leaderboards and market concentration.
+
+Companies are the canonical ones from entity resolution ("Company ID" and
+"Company Name", written by preprocess_data.py, or resolved here for datasets
+preprocessed before that stage existed), so spelling and legal-form variants of
+a developer count as one portfolio. CompanyPortfolios takes its group-bys
+(company, company × Technology, company × Region) from the shared aggregation
+layer, so they are memoized per dataset version, and keeps one array per measure
+indexed by company. A leaderboard is a partial selection (np.argpartition) of the
+k largest values followed by a sort of those k only, so it stays cheap with tens
+of thousands of companies. Market concentration per region is the
+Herfindahl-Hirschman index of company capacity shares (0-10000). The API builds
+the same portfolios for any monthly snapshot of the history store
+(/companies?as_of=YYYY-MM), one partition read per snapshot.
+"""
+import numpy as np
+
+from aggregations import PERMIT_TOTALS, aggregate
+from entity_resolution import resolve_companies
+
+CAPACITY = "Installed Capacity (MW)"
+MEASURES = ["capacity_mw", "permits", "technologies", "regions"]
+# Columns a portfolio is built from (Company ID/Name are resolved from Company when missing)
+PORTFOLIO_COLUMNS = ["Company", "Company ID", "Company Name", "Permit ID", CAPACITY, "Technology", "Region"]
+
+
+class CompanyPortfolios:
+    """Per-company aggregates over the permits dataset."""
+
+    def __init__(self, df, version=None):
+        if "Company ID" not in df.columns:
+            df = df.join(resolve_companies(df["Company"]))
+        totals = aggregate(df, ["Company ID", "Company Name"], PERMIT_TOTALS, version=version)
+        self.company_ids = totals["Company ID"].astype(str).to_numpy()
+        self.companies = totals["Company Name"].astype(str).to_numpy()
+        code = {company_id: position for position, company_id in enumerate(self.company_ids)}
+        self.breakdowns = {}
+        self.measures = {
+            "capacity_mw": totals[CAPACITY].to_numpy(dtype=float),
+            "permits": totals["Permit ID"].to_numpy(dtype=np.int64),
+        }
+        for name, column in (("technologies", "Technology"), ("regions", "Region")):
+            pairs = aggregate(df, ["Company ID", column], PERMIT_TOTALS, version=version)
+            companies = pairs["Company ID"].astype(str).map(code).to_numpy()
+            # CSR layout: the pairs of company i are rows offsets[i]:offsets[i + 1] in company order
+            order = np.argsort(companies, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(companies, minlength=len(self.companies)))])
+            self.breakdowns[name] = (offsets, pairs[column].astype(str).to_numpy()[order],
+                                     pairs[CAPACITY].to_numpy(dtype=float)[order])
+            self.measures[name] = np.diff(offsets)
+        self.total_capacity = float(self.measures["capacity_mw"].sum())
+
+        by_region = aggregate(df, ["Region", "Company ID"], PERMIT_TOTALS, version=version)
+        self.concentration = []
+        for region, group in by_region.groupby("Region", sort=True):
+            capacity = group[CAPACITY].to_numpy(dtype=float)
+            region_capacity = capacity.sum()
+            shares = capacity / region_capacity if region_capacity else np.zeros(len(capacity))
+            top = int(np.argmax(capacity))
+            self.concentration.append({
+                "region": region,
+                "companies": len(group),
+                "capacity_mw": round(float(region_capacity), 3),
+                "hhi": round(float((shares * 100) @ (shares * 100)), 1),
+                "top_company": self.companies[code[group["Company ID"].iloc[top]]],
+                "top_share": round(float(shares[top]), 4),
+            })
+
+    def top(self, k=10, by="capacity_mw"):
+        """The k companies with the largest `by` measure, largest first (ties by name)."""
+        values = self.measures[by]
+        k = min(k, len(values))
+        if k <= 0:
+            return []
+        candidates = np.arange(len(values))
+        if k < len(values):
+            # Keep every company tied with the k-th value, so ties are broken by name, not by partition order
+            kth = values[np.argpartition(-values, k - 1)[k - 1]]
+            candidates = np.flatnonzero(values >= kth)
+        ranked = candidates[np.lexsort((self.companies[candidates], -values[candidates]))][:k]
+        return [self.portfolio(position, rank) for rank, position in enumerate(ranked, start=1)]
+
+    def portfolio(self, position, rank=None):
+        capacity = float(self.measures["capacity_mw"][position])
+        record = {
+            "rank": rank,
+            "company_id": self.company_ids[position],
+            "company": self.companies[position],
+            "permits": int(self.measures["permits"][position]),
+            "capacity_mw": round(capacity, 3),
+            "capacity_share": round(capacity / self.total_capacity, 4) if self.total_capacity else 0.0,
+        }
+        for name, (offsets, labels, values) in self.breakdowns.items():
+            lo, hi = offsets[position], offsets[position + 1]
+            record[name] = {label: round(float(value), 3) for label, value in zip(labels[lo:hi], values[lo:hi])}
+        return record
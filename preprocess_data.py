@@ -1,23 +1,60 @@
-import pandas as pd
+"""Preprocess the monthly RAE permit register files into the cleaned permits dataset.
+
+The work runs as a pipeline of stages (pipeline.py), each on every monthly snapshot:
+
+    ingest     read the required columns of the monthly files, typed, through the
+               schema registry (schema.py)
+    dedup      one row per permit and snapshot
+    normalize  clean technologies, resolve regions and regional units against the
+               gazetteer (gazetteer.py), add coordinates and resolve company entities
+    geocode    match each permit's regional unit point to a prefecture polygon
+    translate  English column names, regions and technologies
+    export     latest state (final_permits_cleaned in Parquet, Arrow, gzip CSV and
+               xlsx, see exporter.py), change log and history store
+
+Each stage caches its output in data/cache/pipeline, keyed by its input and by its
+code version (the stage function and the mapping tables, helpers and modules it
+uses), so a rerun only executes the stages whose input or code changed: editing a
+mapping table reruns normalize and what follows, not the ingest.
+
+Usage:
+    python preprocess_data.py
+    python preprocess_data.py --base-dir data/synthetic
+    python preprocess_data.py --force geocode
+    python preprocess_data.py --until normalize
+"""
+import argparse
 import os
-import numpy as np
+import re
 import unicodedata
-import geopandas as gpd
-import geopandas as gpd
-from shapely.geometry import Point
-
-# Define base directory
-base_dir = r"data\permits"
-
-# List of Excel files to process
-excel_files = [
-    "2020-12 - Dec.xlsx", "2021-03 - Mar.xlsx", "2021-05 - May.xlsx", "2021-08 - Aug.xlsx",
-    "2021-10 - Oct.xlsx", "2022-03 - Mar.xlsx", "2022-09 - Sep.xlsx", "2022-12 - Dec.xlsx",
-    "2023-01 - Jan.xlsx", "2023-02 - Feb.xlsx", "2023-03 - Mar.xlsx", "2023-05 - May.xlsx",
-    "2023-06 - Jun.xlsx", "2023-07 - Jul.xlsx", "2023-09 - Sep.xlsx", "2023-10 - Oct.xlsx",
-    "2023-11 - Nov.xlsx", "2024-02 - Feb.xlsx", "2024-03 - Mar.xlsx", "2024-05 - May.xlsx",
-    "2024-09 - Sep.xlsx", "2024-10 - Oct.xlsx", "2024-11 - Nov.xlsx", "2024-12 - Dec.xlsx"
-]
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import entity_resolution
+import exporter
+import gazetteer
+import geocoding
+import history
+import schema
+import snapshots
+from exporter import FORMATS, export_dataset
+from gazetteer import Gazetteer, review_report
+from entity_resolution import resolve_companies
+from geocoding import GEO_LAYERS, GeocodeCache, default_geocoder
+from history import history_path, write_history
+from pipeline import DEFAULT_CACHE_DIR, Pipeline, Stage, files_key
+from schema import read_snapshot, repair_expiration_years
+from snapshots import SNAPSHOT, change_log, churn_summary, snapshot_month
+
+DEFAULT_BASE_DIR = os.path.join("data", "permits")
+FINAL_FILE = "final_permits_cleaned.xlsx"
+CHANGES_FILE = "permit_changes.xlsx"
+PLACE_REVIEW_FILE = "place_name_review.xlsx"
+
+# Monthly register snapshots, e.g. "2024-12 - Dec.xlsx" (or "2024-12 - Dec.csv.gz" from the synthetic generator)
+SNAPSHOT_FILE_PATTERN = re.compile(r"^\d{4}-\d{2} - \w+\.(xlsx|csv\.gz)$")
 
 required_columns = [
     "ΕΤΑΙΡΕΙΑ", "ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ", "ΗΜΕΡΟΜΗΝΙΑ ΥΠΟΒΟΛΗΣ ΑΙΤΗΣΗΣ", "ΗΜΕΡΟΜΗΝΙΑ ΕΚΔ. ΑΔ.ΠΑΡΑΓΩΓΗΣ",
@@ -25,70 +62,7 @@ required_columns = [
     "ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)", "ΤΕΧΝΟΛΟΓΙΑ"
 ]
 
-
-
-# Merging all files into a single DataFrame
-df_all = pd.DataFrame()
-
-for file_name in excel_files:
-    input_path = os.path.join(base_dir, file_name)
-
-    try:
-        # Load the Excel file, skipping the first row
-        df_temp = pd.read_excel(input_path, dtype=str, skiprows=1)
-
-        # Trim spaces from column names
-        df_temp.columns = df_temp.columns.str.strip()
-
-        # Rename incorrect column names if they exist
-        column_rename_map = {
-            "AΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ": "ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ",
-            "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ. ΠΑΡΑΓΩΓΗΣ": "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"
-        }
-        df_temp.rename(columns=column_rename_map, inplace=True)
-
-        # Keep only required columns if they exist
-        missing_columns = [col for col in required_columns if col not in df_temp.columns]
-        if missing_columns:
-            print(f"Skipping {file_name}: Missing columns {missing_columns}")
-            continue
-
-        df_temp = df_temp[required_columns]
-        df_all = pd.concat([df_all, df_temp])
-
-    except Exception as e:
-        print(f"Error processing {file_name}: {e}")
-
-# Reset index after merging
-df_all = df_all.reset_index(drop=True)
-
-# Convert date columns to datetime (AFTER merging)
 date_columns = ["ΗΜΕΡΟΜΗΝΙΑ ΥΠΟΒΟΛΗΣ ΑΙΤΗΣΗΣ", "ΗΜΕΡΟΜΗΝΙΑ ΕΚΔ. ΑΔ.ΠΑΡΑΓΩΓΗΣ", "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"]
-for col in date_columns:
-    df_all[col] = pd.to_datetime(df_all[col], format="%Y-%m-%d %H:%M:%S", errors="coerce")
-
-
-# Fix incorrect expiration years (e.g., 1935 -> 2035, 1945 -> 2045, 1946 -> 2046)
-df_all["ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"] = df_all["ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"].apply(
-    lambda x: x.replace(year=x.year + 100) if x.year in [1935, 1945, 1946] else x
-)
-
-
-# Drop rows with invalid dates AFTER merging
-df_all = df_all.dropna(subset=date_columns)
-
-# Convert power column to numeric
-df_all["ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)"] = pd.to_numeric(df_all["ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)"], errors="coerce")
-
-# Debug check for non-numeric values
-non_numeric_power = df_all[df_all["ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)"].isna()]
-
-
-# Sort by ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ (ascending) and ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ (descending)
-df_all = df_all.sort_values(by=["ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ", "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"], ascending=[True, False])
-
-# Remove duplicate permits, keeping the latest expiration date
-df_all = df_all.drop_duplicates(subset=["ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ"], keep="last").reset_index(drop=True)
 
 def clean_text(text):
     """Normalize Greek text to remove diacritics and standardize spacing."""
@@ -100,92 +74,6 @@ def clean_text(text):
         text = unicodedata.normalize("NFKC", text)  # Normalize Unicode characters
     return text
 
-df_all["ΤΕΧΝΟΛΟΓΙΑ"] = df_all["ΤΕΧΝΟΛΟΓΙΑ"].apply(clean_text)
-
-
-# Standardize the "ΠΕΡΙΦΕΡΕΙΑ" column by stripping spaces, making uppercase, and mapping values
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].str.strip().str.upper()
-
-# Replace missing or incorrect values in ΠΕΡΙΦΕΡΕΙΑ
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].replace({np.nan: "ΑΓΝΩΣΤΗ ΠΕΡΙΦΕΡΕΙΑ"})
-
-# Ensure that no dates accidentally appear in ΠΕΡΙΦΕΡΕΙΑ
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].astype(str)  # Ensure it's a string column
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].apply(lambda x: x if not x.startswith("20") else "ΑΓΝΩΣΤΗ ΠΕΡΙΦΕΡΕΙΑ")
-
-# Define mapping for fixing inconsistencies in "ΠΕΡΙΦΕΡΕΙΑ"
-perifereia_map = {
-    "Κ ΜΑΚΕΔΟΝΙΑΣ": "ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
-    "ΣΤ ΕΛΛΑΔΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
-    "ΣΤΕΡΕΑ ΕΛΛΑΔΑ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
-    "ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
-    "ΣΤΕΡΕΆΣ ΕΛΛΆΔΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
-    "ΣΤΕΡΑΙΑΣ ΕΛΛΑΔΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ",
-    "Ν ΑΙΓΑΙΟΥ": "ΝΟΤΙΟΥ ΑΙΓΑΙΟΥ",
-    "ΑΝ. ΜΑΚΕΔΟΝΙΑΣ & ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "Δ. ΕΛΛΑΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "ΔΥΤΙΚΉΣ ΕΛΛΆΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "ΔΥΤΙΚΉΣ ΕΛΛΆΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "Δ ΕΛΛΑΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ",
-    "Β ΑΙΓΑΙΟΥ": "ΒΟΡΕΙΟΥ ΑΙΓΑΙΟΥ",
-    "Δ ΜΑΚΕΔΟΝΙΑΣ": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
-    "ΑΝ ΜΑΚΕΔΟΝΙΑΣ ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "ΑΝΑΤΟΛΙΚΗ ΜΑΚΕΔΟΝΙΑ ΚΑΙ ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "ΑΝ.ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ & ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΘΡΑΚΗΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ",
-    "ΙΟΝΙΩΝ ΝΗΣΩΝ": "ΙΟΝΙΩΝ ΝΗΣΙΩΝ",
-    "ΘΕΣΣΑΛΙΑΣ,ΗΠΕΙΡΟΥ": "ΘΕΣΣΑΛΙΑΣ, ΗΠΕΙΡΟΥ",
-    "ΘΕΣΣΑΛΙΑΣ,ΗΠΕΙΡΟΥ": "ΘΕΣΣΑΛΙΑΣ, ΗΠΕΙΡΟΥ",
-    "ΗΠΕΙΡΟΥ & ΘΕΣΣΑΛΙΑΣ": "ΘΕΣΣΑΛΙΑΣ, ΗΠΕΙΡΟΥ",
-    "ΗΠΕΙΡΟΥ - ΘΕΣΣΑΛΙΑΣ": "ΘΕΣΣΑΛΙΑΣ, ΗΠΕΙΡΟΥ",
-    "ΔΥΤΙΚΉΣ ΕΛΛΆΔΑΣ, ΣΤΕΡΕΆΣ ΕΛΛΆΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔOΣ",
-    "ΣΤΕΡΑΙΑΣ ΕΛΛΑΔΑΣ & ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔOΣ",
-    "ΔΥΤΙΚΗΣ ΕΛΛΑΔΟΣ & ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔOΣ",
-    "ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ": "ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔOΣ",
-    "Δ. ΜΑΚΕΔΟΝΙΑΣ - Κ. ΜΑΚΕΔΟΝΙΑΣ": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ, ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
-    "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ,ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ, ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
-    "ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ - ΘΕΣΣΑΛΙΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΘΕΣΣΑΛΙΑΣ,ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ - ΘΕΣΣΑΛΙΑΣ": "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΑΝ. ΜΑΚΕΔΟΝΙΑΣ & ΘΡΑΚΗΣ,ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ": "ΑΝΑΤΟΛΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ ΚΑΙ ΘΡΑΚΗΣ, ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ",
-    "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ,ΘΕΣΣΑΛΙΑΣ": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΘΕΣΣΑΛΙΑΣ,ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ": "ΔΥΤΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ - ΘΕΣΣΑΛΙΑΣ": "ΚΕΝΤΡΙΚΗΣ ΜΑΚΕΔΟΝΙΑΣ, ΘΕΣΣΑΛΙΑΣ",
-    "ΠΕΛΟΠΟΝΝΗΣΟΥ - ΔΥΤΙΚΗΣ ΕΛΛΑΔΑΣ": "ΠΕΛΟΠΟΝΝΗΣΟΥ, ΔΥΤΙΚΗΣ ΕΛΛΑΔOΣ",
-    "ΠΕΛΟΠΟΝΝΗΣΟΥ - ΑΤΤΙΚΗΣ": "ΠΕΛΟΠΟΝΝΗΣΟΥ, ΑΤΤΙΚΗΣ",
-    "ΘΕΣΣΑΛΙΑΣ - ΗΠΕΙΡΟΥ": "ΘΕΣΣΑΛΙΑΣ, ΗΠΕΙΡΟΥ",
-    "ΑΤΤΙΚΗΣ,ΣΤΕΡΕΑΣ ΕΛΛΑΔΑΣ": "ΑΤΤΙΚΗΣ, ΣΤΕΡΕΑΣ ΕΛΛΑΔOΣ",
-
-
-}
-df_all["ΤΕΧΝΟΛΟΓΙΑ"] = df_all["ΤΕΧΝΟΛΟΓΙΑ"].str.strip().str.replace(r'\s*-\s*', '-', regex=True)
-
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].replace(perifereia_map)
-# Aggregate any regions that contain a comma (e.g., multiple regions in one field)
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].apply(lambda x: "ΑΛΛΕΣ" if "," in x else x)
-
-
-regional_unit_map = {
-    "ΑΙΤΩΛΟΑΚΑΡΝΑΝΕΙΑΣ": "ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ",
-    "ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ ": "ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ",
-    "ΘΕΣΠΩΤΙΑΣ": "ΘΕΣΠΡΩΤΙΑΣ",
-    "ΠΡΕΒΕΖΑΣ": "ΠΡΕΒΕΖΗΣ",
-    "ΛΑΡΙΣΑΣ": "ΛΑΡΙΣΗΣ",
-    "ΛΑΡΙΣΣΑΣ": "ΛΑΡΙΣΗΣ",
-    "ΜΑΓΝΗΣΙΑΣ": "ΜΑΓΝΗΣΙΑΣ",
-    "ΜΑΓΝΗΣΙΑΣ ": "ΜΑΓΝΗΣΙΑΣ",
-    "ΚΕΦ/ΝΙΑΣ": "ΚΕΦΑΛΛΗΝΙΑΣ",
-    "ΘΕΣ/ΝΙΚΗΣ": "ΘΕΣΣΑΛΟΝΙΚΗΣ",
-    "ΒΟΙΩΤΙΑ": "ΒΟΙΩΤΙΑΣ",
-    "ΦΘΙΩΤΙΔΑ": "ΦΘΙΩΤΙΔΑΣ",
-    "ΦΘΟΙΩΤΙΔΑΣ": "ΦΘΙΩΤΙΔΑΣ",
-    "ΦΩΚΙΔΑΣ": "ΦΩΚΙΔΟΣ"
-}
-
-df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(lambda x: regional_unit_map.get(x, x))
 
 # Apply corrections to the "Regional Unit" column
 # Normalize regional units before applying the mapping
@@ -199,9 +87,6 @@ def normalize_regional_unit(text):
         text = text.upper()  # Convert to uppercase
     return text
 
-# Apply normalization BEFORE applying replacements
-df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].apply(normalize_regional_unit)
-
 # Mapping of ΠΕΡΙΦΕΡΕΙΑ to latitude and longitude
 perifereia_coordinates = {
     "ΑΤΤΙΚΗΣ": (37.9838, 23.7275),
@@ -219,10 +104,6 @@ perifereia_coordinates = {
     "ΚΡΗΤΗΣ": (35.2401, 24.8093)
 }
 
-# Add latitude and longitude columns based on ΠΕΡΙΦΕΡΕΙΑ
-df_all["LAT"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(lambda x: perifereia_coordinates.get(x, np.nan)[0] if x in perifereia_coordinates else np.nan)
-df_all["LON"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(lambda x: perifereia_coordinates.get(x, np.nan)[1] if x in perifereia_coordinates else np.nan)
-
 # Mapping of Regional Units to latitude and longitude
 regional_unit_coordinates = {
     "ΔΡΑΜΑΣ": (41.1528, 24.1476),
@@ -283,14 +164,21 @@ regional_unit_coordinates = {
     "ΦΩΚΙΔΟΣ": (38.4562, 22.4449)
 }
 
-# Add latitude and longitude columns based on Regional Units
-df_all["LAT_UNIT"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(lambda x: regional_unit_coordinates.get(x, (np.nan, np.nan))[0])
-df_all["LON_UNIT"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(lambda x: regional_unit_coordinates.get(x, (np.nan, np.nan))[1])
 
-# Debugging check
-missing_coords = df_all[df_all["LAT"].isna()]
-if not missing_coords.empty:
-    print("⚠️ Missing coordinates for the following regions:", missing_coords["ΠΕΡΙΦΕΡΕΙΑ"].unique())
+def place_gazetteer():
+    """Gazetteer of the GeoJSON places with the dataset's region and regional unit names as aliases.
+
+    Misspelled, abbreviated or listed names are matched to these places when the
+    data is normalized, so new variants need no mapping entry; the ones not
+    matched exactly are listed in the place name review file.
+    """
+    places = Gazetteer()
+    # Regions by their English name ("ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ" is "Κεντρική Ελλάδα" in the layer), then by
+    # the Greek one for the English names spelled differently there ("Western Macedonia")
+    places.add_aliases("regions", {name: perifereia_translation_map[name] for name in perifereia_coordinates})
+    places.add_aliases("regions", {name: name for name in perifereia_coordinates})
+    places.add_aliases("regional_units", {name: name for name in regional_unit_coordinates})
+    return places
 
 column_translations = {
     "ΕΤΑΙΡΕΙΑ": "Company",
@@ -305,7 +193,7 @@ column_translations = {
     "ΤΕΧΝΟΛΟΓΙΑ": "Technology"
 }
 
-# Apply translation to "ΠΕΡΙΦΕΡΕΙΑ" BEFORE renaming it
+# English names of the regions
 perifereia_translation_map = {
     "ΣΤΕΡΕΑΣ ΕΛΛΑΔΟΣ": "Central Greece",
     "ΘΕΣΣΑΛΙΑΣ": "Thessaly",
@@ -324,11 +212,6 @@ perifereia_translation_map = {
     "ΑΓΝΩΣΤΗ ΠΕΡΙΦΕΡΕΙΑ": "Unknown Region"
 }
 
-# Create a new column for the English translation
-df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(perifereia_translation_map)
-
-df_all.rename(columns=column_translations, inplace=True)
-
 # Technology translation mapping
 technology_translation = {
     "ΑΙΟΛΙΚΑ": "Wind Power",
@@ -340,52 +223,216 @@ technology_translation = {
     "ΗΛΙΟΘΕΡΜΙΚΑ": "Solar Thermal"
 }
 
-# Apply the translation
-df_all["Technology"] = df_all["Technology"].replace(technology_translation)
-
-
-# Save the cleaned dataset
-final_output_file = os.path.join(base_dir, "final_permits_cleaned.xlsx")
-df_all.to_excel(final_output_file, index=False)
-
 
+def snapshot_files(base_dir):
+    """Paths of the monthly register files in base_dir, oldest first."""
+    return [os.path.join(base_dir, name) for name in sorted(os.listdir(base_dir)) if SNAPSHOT_FILE_PATTERN.match(name)]
 
 
+def ingest(files, base_dir):
+    """Read every monthly file into one frame with a Snapshot column and typed dates and capacity."""
+    frames = []
+    for input_path in files:
+        file_name = os.path.basename(input_path)
+        try:
+            # Only the required columns, matched through the schema registry and typed at read time
+            df_temp = read_snapshot(input_path, required_columns)
+        except KeyError as e:
+            print(f"Skipping {file_name}: Missing columns {e.args[0]}")
+            continue
+        except Exception as e:
+            print(f"Error processing {file_name}: {e}")
+            continue
 
-# Load the permits data
-permits_df = df_all.copy()
+        # Remember which monthly snapshot each row comes from
+        frames.append(df_temp.assign(**{SNAPSHOT: snapshot_month(file_name)}))
+
+    # Merging all files into a single DataFrame
+    df_all = pd.concat(frames, ignore_index=True)
+
+    # Fix incorrect expiration years (e.g., 1935 -> 2035, 1945 -> 2045, 1946 -> 2046)
+    df_all["ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"] = repair_expiration_years(df_all["ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"])
+
+    # Drop rows with invalid dates AFTER merging
+    df_all = df_all.dropna(subset=date_columns)
+
+    # Debug check for non-numeric values
+    non_numeric_power = df_all["ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)"].isna().sum()
+    if non_numeric_power:
+        print(f"⚠️ Non-numeric capacity values: {non_numeric_power}")
+    return df_all.reset_index(drop=True)
+
+
+def dedup(df_all, base_dir):
+    """One row per permit and monthly snapshot."""
+    # Sort by ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ (ascending) and ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ (descending)
+    df_all = df_all.sort_values(by=["ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ", "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ"], ascending=[True, False])
+
+    # Remove duplicate permits within each monthly snapshot; every snapshot is kept for
+    # the change log and the history store
+    return df_all.drop_duplicates(subset=[SNAPSHOT, "ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ"], keep="last").reset_index(drop=True)
 
-# Create geometry from LAT/LON_UNIT
-geometry = [Point(xy) for xy in zip(permits_df["LON_UNIT"], permits_df["LAT_UNIT"])]
-permits_gdf = gpd.GeoDataFrame(permits_df, geometry=geometry, crs="EPSG:4326")
 
-# Load the prefecture GeoJSON
-geojson_path = "data/geo/greece-prefectures.geojson"  # adjust if needed
-prefectures_gdf = gpd.read_file(geojson_path)
+def normalize(df_all, base_dir):
+    """Standardize technologies, regions and regional units, add coordinates and company entities."""
+    df_all["ΤΕΧΝΟΛΟΓΙΑ"] = df_all["ΤΕΧΝΟΛΟΓΙΑ"].apply(clean_text)
+    df_all["ΤΕΧΝΟΛΟΓΙΑ"] = df_all["ΤΕΧΝΟΛΟΓΙΑ"].str.strip().str.replace(r'\s*-\s*', '-', regex=True)
+
+    # Standardize the "ΠΕΡΙΦΕΡΕΙΑ" column by stripping spaces, making uppercase, and mapping values
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].str.strip().str.upper()
+
+    # Replace missing or incorrect values in ΠΕΡΙΦΕΡΕΙΑ
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].replace({np.nan: "ΑΓΝΩΣΤΗ ΠΕΡΙΦΕΡΕΙΑ"})
+
+    # Ensure that no dates accidentally appear in ΠΕΡΙΦΕΡΕΙΑ
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].astype(str)  # Ensure it's a string column
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].apply(lambda x: x if not x.startswith("20") else "ΑΓΝΩΣΤΗ ΠΕΡΙΦΕΡΕΙΑ")
+
+    df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].apply(normalize_regional_unit)
+
+    # Resolve each distinct region and regional unit name once against the gazetteer
+    places = place_gazetteer()
+    regions = places.resolve(df_all["ΠΕΡΙΦΕΡΕΙΑ"], "regions", perifereia_coordinates)
+    # Several regions in one field are aggregated
+    regions.loc[regions["method"].isin(["list", "partial"]) | regions["name"].str.contains(",", regex=False), "name"] = "ΑΛΛΕΣ"
+    units = places.resolve(df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"], "regional_units", regional_unit_coordinates,
+                           fallback_level="regions")
+    review = review_report(
+        {"regions": regions, "regional_units": units},
+        {"regions": df_all["ΠΕΡΙΦΕΡΕΙΑ"].value_counts(), "regional_units": df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].value_counts()},
+    )
+    review.to_excel(os.path.join(base_dir, PLACE_REVIEW_FILE), index=False)
+    if not review.empty:
+        unmatched = review[review["method"] == "unmatched"]
+        print(f"⚠️ {len(review)} place names not matched exactly ({len(unmatched)} unmatched, "
+              f"{int(unmatched['rows'].sum())} rows), review them in: {os.path.join(base_dir, PLACE_REVIEW_FILE)}")
 
-# Sanity check: ensure both layers are in the same CRS
-permits_gdf = permits_gdf.to_crs("EPSG:4326")
-prefectures_gdf = prefectures_gdf.to_crs("EPSG:4326")
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(regions["name"])
 
-# Perform spatial join: left = permits, right = prefectures
-joined = gpd.sjoin_nearest(
-    permits_gdf,
-    prefectures_gdf[["geometry", "name", "name_greek"]],
-    how="left",
-    distance_col="distance_to_match"
-)
+    # Add latitude and longitude columns based on ΠΕΡΙΦΕΡΕΙΑ
+    df_all["LAT"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(lambda x: perifereia_coordinates.get(x, np.nan)[0] if x in perifereia_coordinates else np.nan)
+    df_all["LON"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(lambda x: perifereia_coordinates.get(x, np.nan)[1] if x in perifereia_coordinates else np.nan)
+
+    # Add latitude and longitude columns based on Regional Units (the place's point when the name is not canonical)
+    df_all["LAT_UNIT"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(units["lat"])
+    df_all["LON_UNIT"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(units["lon"])
+    df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ"].map(units["name"])
+
+    # Debugging check
+    missing_coords = df_all[df_all["LAT"].isna()]
+    if not missing_coords.empty:
+        print("⚠️ Missing coordinates for the following regions:", missing_coords["ΠΕΡΙΦΕΡΕΙΑ"].unique())
+
+    # Entity resolution: one canonical Company ID / Company Name per developer across the
+    # spelling, punctuation and legal-form variants of the company name (over all snapshots,
+    # so the history and the latest state share the IDs)
+    return df_all.join(resolve_companies(df_all["ΕΤΑΙΡΕΙΑ"]))
+
+
+def geocode(df_all, base_dir):
+    """Assign each permit to the prefecture polygon containing its LAT_UNIT/LON_UNIT point.
+
+    Points outside every polygon get the nearest one. Each distinct point is matched
+    once and only if the persistent geocode cache does not have it yet.
+    """
+    cache = GeocodeCache(default_geocoder())
+    matches = cache.geocode(df_all["LAT_UNIT"], df_all["LON_UNIT"], "regional_units")
+    points = df_all[["LAT_UNIT", "LON_UNIT"]].dropna().drop_duplicates()
+    print(f"Geocoded {len(points)} distinct locations ({cache.computed} not cached)")
+    joined = df_all.assign(**{
+        "index_right": matches["index"],
+        "Regional Unit English": matches["name"],
+        "Regional Unit Greek": matches["name_greek"],
+        "distance_to_match": matches["distance"],
+    })
+
+    # Show unmatched cases
+    unmatched = joined[joined["Regional Unit English"].isna()]
+    print(f"⚠️ Unmatched permits after spatial join: {len(unmatched)}")
+    return joined
+
+
+def translate(df_all, base_dir):
+    """English column names, regions and technologies."""
+    # Apply translation to "ΠΕΡΙΦΕΡΕΙΑ" BEFORE renaming it
+    df_all["ΠΕΡΙΦΕΡΕΙΑ"] = df_all["ΠΕΡΙΦΕΡΕΙΑ"].map(perifereia_translation_map)
+
+    df_all = df_all.rename(columns=column_translations)
+
+    # Apply the translation
+    df_all["Technology"] = df_all["Technology"].replace(technology_translation)
+    return df_all
+
+
+def latest_state(df_all):
+    """One row per permit across snapshots."""
+    # Remove duplicate permits, keeping the latest expiration date (same order as dedup)
+    df_all = df_all.sort_values(by=["Permit ID", "Permit Expiration Date"], ascending=[True, False], kind="stable")
+    return df_all.drop_duplicates(subset=["Permit ID"], keep="last").drop(columns=[SNAPSHOT]).reset_index(drop=True)
+
+
+def export(df_all, base_dir):
+    """Write the latest state in every export format, the change log and the history store."""
+    # Change log: permits added, removed or changed (capacity, dates) between consecutive snapshots
+    changes = change_log(df_all)
+    changes_file = os.path.join(base_dir, CHANGES_FILE)
+    changes.to_excel(changes_file, index=False)
+    print(f"✅ Change log ({len(changes)} changes) saved to: {changes_file}")
+    print(churn_summary(changes).to_string(index=False))
+
+    # Save final result once per format (Parquet, Arrow, gzip CSV, xlsx), written in parallel
+    latest = latest_state(df_all)
+    final_save_path = os.path.join(base_dir, FINAL_FILE)
+    for name, path in export_dataset(latest, final_save_path).items():
+        print(f"✅ Cleaned and geospatially matched dataset ({name}) saved to: {path}")
+
+    # History store: every monthly snapshot, partitioned by year/month
+    history_dir = write_history(df_all, history_path(final_save_path))
+    print(f"✅ History of {df_all[SNAPSHOT].nunique()} monthly snapshots saved to: {history_dir}")
+
+    print(f"Final number of unique permits: {len(latest.index)}")
+    return latest
+
+
+def normalize_outputs(base_dir):
+    return [os.path.join(base_dir, PLACE_REVIEW_FILE)]
+
+
+def export_outputs(base_dir):
+    final_save_path = os.path.join(base_dir, FINAL_FILE)
+    return [data_loader.dataset_path(final_save_path, suffix) for suffix in FORMATS.values()] + [
+        os.path.join(base_dir, CHANGES_FILE), history_path(final_save_path)]
+
+
+STAGES = [
+    Stage("ingest", ingest, [required_columns, date_columns, snapshot_month, schema, data_loader]),
+    Stage("dedup", dedup),
+    Stage("normalize", normalize, [clean_text, normalize_regional_unit, place_gazetteer, perifereia_coordinates,
+                                   regional_unit_coordinates, perifereia_translation_map, gazetteer, geocoding,
+                                   GEO_LAYERS["regions"], GEO_LAYERS["regional_units"], entity_resolution],
+          outputs=normalize_outputs),
+    Stage("geocode", geocode, [geocoding, GEO_LAYERS["regional_units"]]),
+    Stage("translate", translate, [column_translations, perifereia_translation_map, technology_translation]),
+    Stage("export", export, [latest_state, snapshots, history, data_loader, exporter], outputs=export_outputs),
+]
 
-joined = joined.rename(columns={"name": "Regional Unit English", "name_greek": "Regional Unit Greek"})
 
-# Show unmatched cases
-unmatched = joined[joined["Regional Unit English"].isna()]
-print(f"⚠️ Unmatched permits after spatial join: {len(unmatched)}")
+def main():
+    stage_names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description="Build the cleaned permits dataset from the monthly register files.")
+    parser.add_argument("--base-dir", default=DEFAULT_BASE_DIR,
+                        help="Directory with the monthly files; the outputs are written there too")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Where stage artifacts are cached")
+    parser.add_argument("--force", choices=stage_names, help="Rerun this stage and the ones after it")
+    parser.add_argument("--until", choices=stage_names, help="Stop after this stage")
+    args = parser.parse_args()
 
-# Save final result
-final_save_path = os.path.join(base_dir, "final_permits_cleaned.xlsx")
-joined.drop(columns="geometry").to_excel(final_save_path, index=False)
-print(f"✅ Cleaned and geospatially matched file saved to: {final_save_path}")
+    files = snapshot_files(args.base_dir) if os.path.isdir(args.base_dir) else []
+    if not files:
+        parser.error(f"No monthly register files (e.g. '2024-12 - Dec.xlsx') in {args.base_dir}")
+    pipeline = Pipeline(STAGES, args.base_dir, args.cache_dir)
+    pipeline.run(files, files_key(files), force=args.force, until=args.until)
 
 
-print(f"Final number of unique permits: {len(df_all.index)}")
-print(f"Cleaned dataset saved to: {final_output_file}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
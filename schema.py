@@ -0,0 +1,137 @@
+"""Schema registry of the monthly permit register files.
+
+The monthly files spell some headers differently (a Latin "A", an extra space,
+trailing blanks), so every field of the register is registered once with its
+canonical Greek header, the header variants seen in the files and its type.
+read_snapshot() matches the header row of a file against the registry and
+streams only the registered columns out of the workbook, keeping the cell values
+typed as stored (dates as datetimes, capacities as numbers) instead of reading
+every column as text and parsing it back afterwards. CSV files with the same
+layout (title line, then header) are read as text and parsed by column type.
+"""
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from data_loader import as_text
+
+TEXT, DATE, NUMBER = "text", "date", "number"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# The header is the second row of every monthly file, below a title line
+HEADER_ROW = 2
+# Monthly files in CSV (e.g. the large synthetic registers) rather than xlsx
+CSV_SUFFIXES = (".csv", ".csv.gz")
+
+# Canonical header -> (type, header variants besides the canonical one)
+REGISTER_SCHEMA = {
+    "ΕΤΑΙΡΕΙΑ": (TEXT, []),
+    "ΑΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ": (TEXT, ["AΡΙΘΜΟΣ ΜΗΤΡΩΟΥ ΑΔΕΙΩΝ"]),
+    "ΗΜΕΡΟΜΗΝΙΑ ΥΠΟΒΟΛΗΣ ΑΙΤΗΣΗΣ": (DATE, []),
+    "ΗΜΕΡΟΜΗΝΙΑ ΕΚΔ. ΑΔ.ΠΑΡΑΓΩΓΗΣ": (DATE, []),
+    "ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ.ΠΑΡΑΓΩΓΗΣ": (DATE, ["ΗΜΕΡΟΜΗΝΙΑ ΛΗΞΗΣ ΑΔ. ΠΑΡΑΓΩΓΗΣ"]),
+    "ΠΕΡΙΦΕΡΕΙΑ": (TEXT, []),
+    "ΠΕΡΙΦΕΡΕΙΑΚΗ ΕΝΟΤΗΤΑ": (TEXT, []),
+    "ΔΗΜΟΣ": (TEXT, []),
+    "ΜΕΓΙΣΤΗ ΙΣΧΥΣ (MW)": (NUMBER, []),
+    "ΤΕΧΝΟΛΟΓΙΑ": (TEXT, []),
+}
+
+HEADER_VARIANTS = {variant: column for column, (_, variants) in REGISTER_SCHEMA.items() for variant in variants}
+
+
+def canonical_column(header):
+    """Registered column of a raw header cell, or None for columns outside the registry."""
+    header = str(header).strip() if header is not None else ""
+    header = HEADER_VARIANTS.get(header, header)
+    return header if header in REGISTER_SCHEMA else None
+
+
+def column_positions(header):
+    """Position of every registered column in a header row; the first match wins."""
+    positions = {}
+    for position, cell in enumerate(header):
+        column = canonical_column(cell)
+        if column is not None and column not in positions:
+            positions[column] = position
+    return positions
+
+
+def as_dates(values):
+    """Date cells as datetimes; text in the register's date format is parsed, anything else is NaT."""
+    dates = pd.Series([value if isinstance(value, datetime) else pd.NaT for value in values],
+                      dtype="datetime64[ns]")
+    text = pd.Series([value if isinstance(value, str) else None for value in values], dtype=object)
+    if text.notna().any():
+        dates = dates.fillna(pd.to_datetime(text, format=DATE_FORMAT, errors="coerce"))
+    return dates
+
+
+def as_numbers(values):
+    """Numeric cells as floats; numeric text is parsed, anything else is NaN."""
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype(float)
+
+
+CONVERTERS = {TEXT: as_text, DATE: as_dates, NUMBER: as_numbers}
+
+
+def wanted_positions(header, columns):
+    """Positions of `columns` in a header row; KeyError naming the columns it lacks."""
+    positions = column_positions(header)
+    missing = [column for column in columns if column not in positions]
+    if missing:
+        raise KeyError(missing)
+    return [positions[column] for column in columns]
+
+
+def workbook_cells(path, columns):
+    """Cell values of `columns` in an xlsx monthly file, one list per column."""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = next(sheet.iter_rows(min_row=HEADER_ROW, max_row=HEADER_ROW, values_only=True), ())
+        wanted = wanted_positions(header, columns)
+        values = [[] for _ in columns]
+        # Some files declare thousands of empty columns: stop every row at the last wanted one
+        for row in sheet.iter_rows(min_row=HEADER_ROW + 1, max_col=max(wanted) + 1, values_only=True):
+            # Error cells (#REF!, #N/A, ...) are missing values, as in pd.read_excel
+            row = [row[position] if position < len(row) and row[position] not in ERROR_CODES else None
+                   for position in wanted]
+            if all(cell is None for cell in row):
+                continue
+            for cells, cell in zip(values, row):
+                cells.append(cell)
+    finally:
+        workbook.close()
+    return values
+
+
+def csv_cells(path, columns):
+    """Cell values of `columns` in a (gzip) CSV monthly file laid out like the workbooks, as text."""
+    header = pd.read_csv(path, header=None, skiprows=HEADER_ROW - 1, nrows=1, dtype=str).iloc[0]
+    wanted = wanted_positions([None if pd.isna(cell) else cell for cell in header], columns)
+    rows = pd.read_csv(path, header=None, skiprows=HEADER_ROW, usecols=wanted, dtype=str, keep_default_na=False)
+    rows = rows[(rows != "").any(axis=1)]
+    return [rows[position].tolist() for position in wanted]
+
+
+def read_snapshot(path, columns=None):
+    """The registered columns of a monthly file (xlsx or CSV), typed; KeyError naming the columns it lacks.
+
+    columns: canonical columns to read (all registered columns by default).
+    """
+    columns = list(REGISTER_SCHEMA) if columns is None else columns
+    values = (csv_cells if path.endswith(CSV_SUFFIXES) else workbook_cells)(path, columns)
+    return pd.DataFrame({column: CONVERTERS[REGISTER_SCHEMA[column][0]](cells)
+                         for column, cells in zip(columns, values)})
+
+
+def repair_expiration_years(dates, years=(1935, 1945, 1946)):
+    """Move expiration dates typed a century early (1935 -> 2035, ...) forward by 100 years."""
+    early = dates.dt.year.isin(years).to_numpy()
+    if not early.any():
+        return dates
+    repaired = dates.copy()
+    repaired[early] = dates[early] + pd.DateOffset(years=100)
+    return repaired
@@ -0,0 +1,140 @@
+"""Diacritic-insensitive search over companies, permit IDs and municipalities.
+
+SearchIndex normalizes every distinct value of SEARCH_FIELDS the same way as the
+queries (accents stripped, final sigma folded, case folded, punctuation turned into
+spaces, in the spirit of preprocess_data.clean_text / normalize_regional_unit) and
+keeps, per field, the values and their word suffixes in sorted arrays and an
+inverted index from character trigrams to values. Exact, prefix and word prefix
+matches are ranges of the sorted arrays found by binary search; fuzzy matches are
+ranked by the share of the query's trigrams they contain. Only the requested
+fields are looked at, and only the best `limit` matches of each kind are ordered.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+SEARCH_FIELDS = {"company": "Company", "permit_id": "Permit ID", "municipality": "Municipality"}
+MATCH_TYPES = ["exact", "prefix", "word_prefix", "fuzzy"]
+MIN_FUZZY_SCORE = 0.5
+
+
+def normalize(text):
+    """Fold Greek (and Latin) text for matching: no accents, final sigma as σ, lower case."""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = text.casefold()  # also folds ς into σ
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def trigrams(text, pad_end=True):
+    """Character trigrams of a normalized value; words start (and, in values, end) with a space."""
+    padded = " " + text + (" " if pad_end else "")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FieldIndex:
+    """Sorted values, sorted word suffixes and trigram postings of one field (doc numbers are global)."""
+
+    def __init__(self, docs, normalized):
+        order = np.argsort(normalized, kind="stable")
+        self.values = np.array(normalized, dtype=str)[order]
+        self.docs = np.asarray(docs, dtype=np.int64)[order]
+
+        suffixes, suffix_docs, postings = [], [], defaultdict(list)
+        for doc, text in zip(docs, normalized):
+            suffixes += [text[match.start():] for match in re.finditer(r" (?=\S)", text)]
+            suffix_docs += [doc] * (len(suffixes) - len(suffix_docs))
+            for gram in trigrams(text):
+                postings[gram].append(doc)
+        order = np.argsort(suffixes, kind="stable")
+        self.suffixes = np.array(suffixes, dtype=str)[order] if suffixes else np.array([], dtype=str)
+        # Suffixes start with the space before their word, so a word prefix is " " + query
+        self.suffix_docs = np.asarray(suffix_docs, dtype=np.int64)[order]
+        self.postings = {gram: np.array(docs, dtype=np.int64) for gram, docs in postings.items()}
+
+    @staticmethod
+    def starting_with(sorted_values, text):
+        """Range of the sorted values starting with text."""
+        return (np.searchsorted(sorted_values, text, side="left"),
+                np.searchsorted(sorted_values, text + "\U0010ffff", side="left"))
+
+    def exact_and_prefix(self, text):
+        low, high = self.starting_with(self.values, text)
+        exact = np.searchsorted(self.values[low:high], text, side="right")
+        return self.docs[low:low + exact], self.docs[low + exact:high]
+
+    def word_prefix(self, text):
+        low, high = self.starting_with(self.suffixes, " " + text)
+        return self.suffix_docs[low:high]
+
+
+class SearchIndex:
+    """Per-field sorted and trigram indexes over the distinct values of the searchable fields."""
+
+    def __init__(self, df):
+        self.fields, self.values, self.rows, self.indexes = [], [], [], {}
+        lengths = []
+        for field, column in SEARCH_FIELDS.items():
+            docs, normalized = [], []
+            for value, rows in df.groupby(df[column].astype(str), sort=False).indices.items():
+                if value in ("", "nan", "<NA>"):
+                    continue
+                docs.append(len(self.values))
+                normalized.append(normalize(value))
+                self.fields.append(field)
+                self.values.append(value)
+                self.rows.append(rows)
+            self.indexes[field] = FieldIndex(docs, normalized)
+            lengths += [len(text) for text in normalized]
+        self.fields = np.array(self.fields)
+        self.lengths = np.array(lengths, dtype=np.int64)
+
+    def best(self, docs, limit, counts=None):
+        """The `limit` best of `docs`, in order: most trigrams (if counted), then shortest value, then first indexed."""
+        size = len(self.values)
+        key = self.lengths[docs] * size + docs
+        if counts is not None:
+            key -= counts * (int(self.lengths.max()) + 1) * size
+        if len(docs) > limit:
+            keep = np.argpartition(key, limit)[:limit]
+            docs, key = docs[keep], key[keep]
+        return docs[np.argsort(key)]
+
+    def search(self, query, fields=None, limit=20):
+        """Best matching values as (field, value, match type, score, row positions), best first."""
+        text = normalize(query)
+        if not text:
+            return []
+        indexes = [self.indexes[field] for field in (fields or SEARCH_FIELDS)]
+        tiers = [[], [], []]
+        for field_index in indexes:
+            exact, prefix = field_index.exact_and_prefix(text)
+            for tier, docs in zip(tiers, (exact, prefix, field_index.word_prefix(text))):
+                tier.append(docs)
+
+        # Exact and (word) prefix matches contain every query trigram: their score is 1
+        ranked, taken = [], np.zeros(len(self.values), dtype=bool)
+        for match, tier in zip(MATCH_TYPES, tiers):
+            docs = np.concatenate(tier)
+            docs = np.unique(docs[~taken[docs]])
+            taken[docs] = True
+            ranked += [(doc, match, 1.0) for doc in self.best(docs, limit - len(ranked)).tolist()]
+            if len(ranked) == limit:
+                return self.results(ranked)
+
+        grams = trigrams(text, pad_end=False)
+        hits = [field_index.postings[gram] for field_index in indexes for gram in grams
+                if gram in field_index.postings]
+        if hits:
+            counts = np.bincount(np.concatenate(hits), minlength=len(self.values))
+            counts[taken] = 0
+            docs = np.flatnonzero(counts >= MIN_FUZZY_SCORE * len(grams))
+            ranked += [(doc, "fuzzy", counts[doc] / len(grams))
+                       for doc in self.best(docs, limit - len(ranked), counts[docs]).tolist()]
+        return self.results(ranked)
+
+    def results(self, ranked):
+        return [(str(self.fields[doc]), self.values[doc], match, round(float(score), 3), self.rows[doc])
+                for doc, match, score in ranked]
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from expirations import ExpirationIndex  # noqa: E402
+import flask_api  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index():
+    return ExpirationIndex(pd.DataFrame({
+        "Permit ID": ["ΑΔ-00001", "ΑΔ-00002", "ΑΔ-00003", "ΑΔ-00004"],
+        "Company": ["A", "B", "C", "D"],
+        "Technology": ["Wind Power", "Photovoltaics", "Wind Power", "Hydroelectric"],
+        "Region": ["Attica", "Attica", "Crete", "Crete"],
+        "Regional Unit": ["East Attica", "East Attica", "Chania", "Chania"],
+        "Installed Capacity (MW)": [10.0, 2.5, 4.0, 1.0],
+        "Permit Expiration Date": pd.to_datetime(["2025-01-01", "2025-01-10", "2025-01-11", None]),
+    }))
+
+
+def test_window_includes_its_start_and_excludes_its_end(index):
+    result = index.expiring(pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-11"))
+    assert [permit["Permit ID"] for permit in result["permits"]] == ["ΑΔ-00001", "ΑΔ-00002"]
+    assert result["total"] == {"permits": 2, "capacity_mw": 12.5}
+
+
+def test_known_pair_without_permits_is_empty_and_unknown_names_raise(index):
+    window = pd.Timestamp("2025-01-01"), pd.Timestamp("2026-01-01")
+    assert index.expiring(*window, technology="Hydroelectric")["total"]["permits"] == 0
+    assert index.expiring(*window, technology="Photovoltaics", region="Crete")["permits"] == []
+    with pytest.raises(KeyError):
+        index.expiring(*window, technology="Fusion")
+    with pytest.raises(KeyError):
+        index.expiring(*window, region="Atlantis")
+
+
+@pytest.fixture(scope="module")
+def client():
+    return flask_api.app.test_client()
+
+
+def test_days_counts_exactly_that_many_days(client):
+    expires = flask_api.df["Permit Expiration Date"].dropna().dt.normalize()
+    day = expires.min()
+    body = client.get(f"/permits/expiring?from={day:%Y-%m-%d}&days=1&limit=500").get_json()
+    assert body["to"] == f"{day + pd.Timedelta(days=1):%Y-%m-%d}"
+    assert body["total"]["permits"] == (expires == day).sum() > 0
+    assert {permit["Permit Expiration Date"] for permit in body["permits"]} == {f"{day:%Y-%m-%d}"}
+
+
+@pytest.mark.parametrize("query", [
+    "technology=Fusion", "region=Atlantis", "from=2025-01-01T00:00:00%2B02:00", "from=abc", "days=0",
+    "from=2199-01-01&days=36500",
+])
+def test_invalid_queries_are_rejected(client, query):
+    response = client.get(f"/permits/expiring?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_known_technology_and_region(client):
+    technology, region = flask_api.df[["Technology", "Region"]].astype(str).iloc[0]
+    response = client.get("/permits/expiring", query_string={"technology": technology, "region": region})
+    assert response.status_code == 200
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from preprocess_data import place_gazetteer, regional_unit_coordinates  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return place_gazetteer()
+
+
+def resolve(gazetteer, value):
+    return gazetteer.resolve([value], "regional_units", regional_unit_coordinates,
+                             fallback_level="regions").loc[value]
+
+
+def test_misspelled_unit_resolves_to_its_canonical_name(gazetteer):
+    assert resolve(gazetteer, "ΛΑΡΙΣΣΑΣ")["name"] == "ΛΑΡΙΣΗΣ"
+
+
+def test_list_of_places_keeps_its_name(gazetteer):
+    resolved = resolve(gazetteer, "ΚΟΖΑΝΗΣ,ΦΛΩΡΙΝΑΣ")
+    assert (resolved["name"], resolved["method"], resolved["places"]) == ("ΚΟΖΑΝΗΣ,ΦΛΩΡΙΝΑΣ", "list", 2)
+
+
+def test_list_naming_one_place_twice_is_that_place(gazetteer):
+    assert resolve(gazetteer, "ΛΑΡΙΣΑΣ - ΛΑΡΙΣΗΣ")["name"] == "ΛΑΡΙΣΗΣ"
+
+
+@pytest.mark.parametrize("value", ["ΘΕΣΠΩΤΙΑΣ & ΠΡΕΒΕΖΑΣ", "ΑΡΓΟΛΙΔΑΣ, ΝΗΣΩΝ"])
+def test_partially_resolved_list_keeps_its_name(gazetteer, value):
+    resolved = resolve(gazetteer, value)
+    assert resolved["method"] == "partial"
+    assert resolved["name"] == value
+    assert resolved["places"] == 1
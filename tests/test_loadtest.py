@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from loadtest import percentile  # noqa: E402
+
+
+@pytest.mark.parametrize("size, pct, expected", [
+    (100, 50, 50), (100, 7, 7), (100, 95, 95), (100, 99, 99), (100, 100, 100),
+    (10, 50, 5), (10, 95, 10), (20, 95, 19), (20, 5, 1), (1, 99, 1), (3, 0, 1),
+])
+def test_nearest_rank_percentile(size, pct, expected):
+    assert percentile(list(range(1, size + 1)), pct) == expected
+
+
+def test_percentile_of_no_values():
+    assert percentile([], 95) is None
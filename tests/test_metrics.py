@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from metrics import MetricsRegistry  # noqa: E402
+
+
+def observe(registry, route="/search"):
+    registry.observe_request(route, "GET", 200, 0.003, 2_000, {"filter": 0.001})
+
+
+def test_render_sums_the_metrics_of_every_worker(tmp_path):
+    worker, other = MetricsRegistry(str(tmp_path)), MetricsRegistry(str(tmp_path))
+    observe(worker)
+    observe(worker)
+    worker.flush()
+    observe(other)
+    observe(other, "/permits/<permit_id>")
+
+    text = other.render()
+    assert 'rae_api_requests_total{route="/search",method="GET",status="200"} 3' in text
+    assert 'rae_api_requests_total{route="/permits/<permit_id>",method="GET",status="200"} 1' in text
+    assert 'rae_api_request_duration_seconds_bucket{route="/search",method="GET",le="0.005"} 3' in text
+    assert 'rae_api_response_size_bytes_count{route="/search"} 3' in text
+    # A worker's own file is not counted on top of its live metrics
+    assert 'rae_api_requests_total{route="/search",method="GET",status="200"} 2' in worker.render()
+
+
+def test_without_a_directory_only_the_process_metrics_are_rendered():
+    registry = MetricsRegistry()
+    observe(registry)
+    assert 'rae_api_phase_duration_seconds_count{route="/search",phase="filter"} 1' in registry.render()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from history import HistoryStore, write_history  # noqa: E402
+from permits import PermitVersions  # noqa: E402
+
+
+def versions(tmp_path, max_permits=4096):
+    write_history(pd.DataFrame({
+        "Snapshot": ["2024-02", "2024-01", "2024-01", "2024-02"],
+        "Permit ID": ["ΑΔ-00001", "ΑΔ-00001", "ΑΔ-00002", "ΑΔ-00003"],
+        "Installed Capacity (MW)": [12.0, 10.0, 3.0, 5.0],
+        "LAT": [38.0, 38.0, 39.0, 40.0],
+    }), str(tmp_path / "history"))
+    return PermitVersions(HistoryStore(str(tmp_path / "history")), max_permits)
+
+
+def test_versions_of_a_permit_oldest_first_without_hidden_columns(tmp_path):
+    assert versions(tmp_path).get(" ΑΔ-00001 ") == [
+        {"Snapshot": "2024-01", "Permit ID": "ΑΔ-00001", "Installed Capacity (MW)": 10.0},
+        {"Snapshot": "2024-02", "Permit ID": "ΑΔ-00001", "Installed Capacity (MW)": 12.0},
+    ]
+
+
+def test_many_permits_and_unknown_ones(tmp_path):
+    found = versions(tmp_path).get_many(["ΑΔ-00002", "ΑΔ-00003", "ΑΔ-99999"])
+    assert [record["Snapshot"] for record in found["ΑΔ-00002"]] == ["2024-01"]
+    assert [record["Snapshot"] for record in found["ΑΔ-00003"]] == ["2024-02"]
+    assert found["ΑΔ-99999"] == []
+
+
+def test_only_the_latest_permits_stay_cached(tmp_path):
+    permit_versions = versions(tmp_path, max_permits=2)
+    for permit_id in ["ΑΔ-00001", "ΑΔ-00002", "ΑΔ-00003"]:
+        permit_versions.get(permit_id)
+    assert list(permit_versions.cache) == ["ΑΔ-00002", "ΑΔ-00003"]
+
+
+def test_no_history_store(tmp_path):
+    assert PermitVersions(HistoryStore(str(tmp_path / "missing"))).get("ΑΔ-00001") == []
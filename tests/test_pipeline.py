@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pipeline import Pipeline, Stage  # noqa: E402
+
+calls = []
+
+
+def double(data, base_dir):
+    calls.append(base_dir)
+    return data.assign(value=data["value"] * 2)
+
+
+def test_base_directories_keep_their_own_artifacts(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    source = pd.DataFrame({"value": [1, 2]})
+    first, second = (Pipeline([Stage("double", double)], str(tmp_path / name), cache_dir)
+                     for name in ("permits", "synthetic"))
+    calls.clear()
+    first.run(source, "key")
+    second.run(source, "key")
+    result = first.run(source, "key")
+    second.run(source, "key")
+    assert calls == [str(tmp_path / "permits"), str(tmp_path / "synthetic")]
+    assert result["value"].tolist() == [2, 4]
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_a_new_input_replaces_the_artifact_of_its_base_directory(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    pipeline = Pipeline([Stage("double", double)], str(tmp_path / "permits"), cache_dir)
+    pipeline.run(pd.DataFrame({"value": [1]}), "old")
+    pipeline.run(pd.DataFrame({"value": [3]}), "new")
+    assert len(os.listdir(cache_dir)) == 1
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from history import HistoryStore, write_history  # noqa: E402
+from portfolios import CompanyPortfolios  # noqa: E402
+import flask_api  # noqa: E402
+
+
+def permits(snapshot=None, **capacities):
+    frame = pd.DataFrame({
+        "Company": list(capacities),
+        "Permit ID": [f"ΑΔ-{number:05d}" for number in range(len(capacities))],
+        "Installed Capacity (MW)": list(capacities.values()),
+        "Technology": "Wind Power",
+        "Region": "Crete",
+    })
+    return frame if snapshot is None else frame.assign(Snapshot=snapshot)
+
+
+def test_top_companies_with_ties_by_name_and_concentration():
+    portfolios = CompanyPortfolios(permits(ΓΑΜΜΑ=10.0, ΑΛΦΑ=30.0, ΒΗΤΑ=30.0, ΔΕΛΤΑ=30.0))
+    leaders = portfolios.top(2)
+    assert [(leader["rank"], leader["company"], leader["capacity_mw"]) for leader in leaders] == [
+        (1, "ΑΛΦΑ", 30.0), (2, "ΒΗΤΑ", 30.0)]
+    assert leaders[0]["capacity_share"] == 0.3
+    assert leaders[0]["technologies"] == {"Wind Power": 30.0}
+    (crete,) = portfolios.concentration
+    assert crete["hhi"] == 2800.0  # 30² + 30² + 30² + 10²
+    assert len(portfolios.top(10)) == 4
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    history = pd.concat([permits("2024-01", ΑΛΦΑ=5.0, ΒΗΤΑ=1.0),
+                         permits("2024-02", ΑΛΦΑ=5.0, ΒΗΤΑ=8.0, ΓΑΜΜΑ=2.0)])
+    write_history(history, str(tmp_path / "history"))
+    monkeypatch.setattr(flask_api, "history_store", HistoryStore(str(tmp_path / "history")))
+    flask_api.snapshot_portfolios.cache_clear()
+    yield flask_api.app.test_client()
+    flask_api.snapshot_portfolios.cache_clear()
+
+
+@pytest.mark.parametrize("as_of, snapshot, leader, companies", [
+    ("2024-01", "2024-01", "ΑΛΦΑ", 2), ("2024-06", "2024-02", "ΒΗΤΑ", 3)])
+def test_companies_as_of_ranks_the_latest_snapshot_up_to_that_month(client, as_of, snapshot, leader, companies):
+    body = client.get(f"/companies?as_of={as_of}&top=1").get_json()
+    assert body["snapshot"] == snapshot
+    assert body["companies"][0]["company"] == leader
+    assert body["companies_total"] == companies
+
+
+def test_companies_as_of_before_the_history_or_malformed(client):
+    assert client.get("/companies?as_of=2023-12").status_code == 404
+    assert client.get("/companies?as_of=2024-1").status_code == 400
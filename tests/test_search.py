@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from search import SearchIndex  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def index():
+    permit_ids = [f"ΑΔ-{number:05d}" for number in range(1, 3001)]
+    return SearchIndex(pd.DataFrame({
+        "Permit ID": permit_ids,
+        "Company": ["ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "ΑΙΟΛΙΚΗ ΚΑΡΥΣΤΙΑΣ ΑΕ", "ΚΑΡΥΣΤΟΣ ΕΝΕΡΓΕΙΑΚΗ"] * 1000,
+        "Municipality": ["ΚΑΡΥΣΤΟΥ", "ΑΔΟ", "ΜΑΡΚΟΠΟΥΛΟΥ"] * 1000,
+    }))
+
+
+def test_matches_are_ranked_exact_prefix_word_prefix_fuzzy(index):
+    results = index.search("Καρυστίας", limit=5)
+    assert [(field, value, match) for field, value, match, _, _ in results] == [
+        ("company", "ΚΑΡΥΣΤΙΑΣ Μ.Α.Ε", "prefix"),
+        ("company", "ΑΙΟΛΙΚΗ ΚΑΡΥΣΤΙΑΣ ΑΕ", "word_prefix"),
+        ("municipality", "ΚΑΡΥΣΤΟΥ", "fuzzy"),
+        ("company", "ΚΑΡΥΣΤΟΣ ΕΝΕΡΓΕΙΑΚΗ", "fuzzy"),
+    ]
+    assert len(results[0][4]) == 1000
+
+
+def test_permit_id_prefix_returns_the_shortest_ids_first(index):
+    results = index.search("ΑΔ-0016", fields=["permit_id"], limit=3)
+    assert [(value, match) for _, value, match, _, _ in results] == [
+        ("ΑΔ-00160", "prefix"), ("ΑΔ-00161", "prefix"), ("ΑΔ-00162", "prefix")]
+
+
+def test_exact_permit_id_comes_first(index):
+    assert index.search("αδ 00160", limit=1)[0][1:3] == ("ΑΔ-00160", "exact")
+
+
+def test_fields_restrict_the_matches(index):
+    # Every permit ID shares the query's "αδ" trigrams; only municipalities may come back
+    results = index.search("ΑΔ-0016", fields=["municipality"])
+    assert {field for field, *_ in results} <= {"municipality"}
+    assert all(value != "ΑΔ-00160" for _, value, *_ in results)
+
+
+def test_limit_keeps_the_best_fuzzy_matches(index):
+    results = index.search("ΑΔ-00169x", fields=["permit_id"], limit=2)
+    assert [match for _, _, match, _, _ in results] == ["fuzzy", "fuzzy"]
+    assert results[0][3] >= results[1][3]
+    assert results[0][1] == "ΑΔ-00169"
+
+
+def test_no_match(index):
+    assert index.search("zzzz") == []
+    assert index.search("  -- ") == []
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+import flask_api  # noqa: E402
+
+ENDPOINTS = ["/timeseries/capacity", "/timeseries/active_capacity"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return flask_api.app.test_client()
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+@pytest.mark.parametrize("query", ["to=2300-01-01", "from=1000-01-01", "from=2300-01-01&to=2301-01-01", "from=abc"])
+def test_out_of_range_or_invalid_dates_are_rejected(client, endpoint, query):
+    response = client.get(f"{endpoint}?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_dates_at_the_range_limits_are_accepted(client, endpoint):
+    response = client.get(f"{endpoint}?from=1900-01-01&to=2199-12-31&granularity=year")
+    assert response.status_code == 200
+    assert response.get_json()["series"]
+
+
+def test_out_of_range_active_capacity_date_is_rejected(client):
+    assert client.get("/timeseries/active_capacity?date=2300-01-01").status_code == 400
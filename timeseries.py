@@ -0,0 +1,157 @@
+"""Daily-resolution time-series indexes over the permits dataset.
+
+A DailyIndex lays the dataset out as one array per series (all permits, each
+technology, each region and each technology × region pair) with one row per day,
+built in a single vectorized pass when the dataset is loaded.
+
+CapacityTimeSeries stores prefix sums of the capacity and permit count issued per
+day, so the capacity issued in any date range is P[end] - P[start]: every bucket
+of a day/month/quarter/year series is an O(1) lookup, whatever the range.
+ActiveCapacity stores the capacity in force on every day, so "licensed and not
+expired on date T" is a single lookup too.
+"""
+import numpy as np
+import pandas as pd
+
+GRANULARITIES = {"day": "D", "month": "M", "quarter": "Q", "year": "Y"}
+ONE_DAY = pd.Timedelta(days=1)
+# Query dates the indexes accept: periods must stay within pandas' nanosecond timestamps (1677-2262)
+DATE_RANGE = (pd.Timestamp("1900-01-01"), pd.Timestamp("2199-12-31"))
+
+
+class DailyIndex:
+    """Day axis and series columns shared by the time-series indexes."""
+
+    def __init__(self, df, origin, end):
+        self.origin = pd.Timestamp(origin).normalize()
+        self.days = (pd.Timestamp(end).normalize() - self.origin).days + 1
+        technology = df["Technology"].astype(str).to_numpy()
+        region = df["Region"].astype(str).to_numpy()
+        self.technologies, self.technology_codes = np.unique(technology, return_inverse=True)
+        self.regions, self.region_codes = np.unique(region, return_inverse=True)
+
+        # Column order: total, technologies, regions, then technology × region pairs
+        n_tech, n_region = len(self.technologies), len(self.regions)
+        keys = [(None, None)]
+        keys += [(name, None) for name in self.technologies]
+        keys += [(None, name) for name in self.regions]
+        keys += [(t, r) for t in self.technologies for r in self.regions]
+        self.columns = {key: position for position, key in enumerate(keys)}
+        self.shape = (self.days, n_tech, n_region)
+
+    def day(self, dates):
+        """Day number of each date from the origin (NaT stays missing as -1)."""
+        dates = pd.to_datetime(pd.Series(dates))
+        days = ((dates - self.origin) // ONE_DAY).to_numpy(dtype=float, na_value=np.nan)
+        return np.where(np.isnan(days), -1, days).astype(np.int64)
+
+    def daily(self, day, weights=None):
+        """Per-day totals of `weights` (default: 1 per permit) for every series column."""
+        days, n_tech, n_region = self.shape
+        valid = (day >= 0) & (day < days)
+        slot = (day * n_tech + self.technology_codes) * n_region + self.region_codes
+        cube = np.bincount(slot[valid], weights=None if weights is None else weights[valid],
+                           minlength=days * n_tech * n_region).reshape(self.shape)
+        return np.concatenate([cube.sum(axis=(1, 2))[:, None], cube.sum(axis=2), cube.sum(axis=1),
+                               cube.reshape(days, -1)], axis=1)
+
+    def column(self, technology=None, region=None):
+        """Series column of a technology and/or region; KeyError if either is unknown."""
+        return self.columns[(technology, region)]
+
+    def buckets(self, start, end, granularity):
+        """Periods covering [start, end] with the day numbers of their first and past-the-end days."""
+        periods = pd.period_range(start, end, freq=GRANULARITIES[granularity])
+        first = periods.start_time.where(periods.start_time > start, start)
+        past_end = (periods + 1).start_time
+        past_end = past_end.where(past_end < end + ONE_DAY, end + ONE_DAY)
+        clip = lambda dates: np.clip(((dates - self.origin) // ONE_DAY).to_numpy(), 0, self.days)
+        return periods, first, past_end - ONE_DAY, clip(first), clip(past_end)
+
+
+class CapacityTimeSeries(DailyIndex):
+    """Prefix sums of issued capacity and permit counts per day, by technology and region."""
+
+    def __init__(self, df):
+        issued = df["Permit Issuance Date"]
+        super().__init__(df, issued.min(), issued.max())
+        day = self.day(issued)
+        capacity = np.nan_to_num(pd.to_numeric(df["Installed Capacity (MW)"], errors="coerce").to_numpy(dtype=float))
+        # Row i holds the totals of the days before day i
+        self.capacity = np.zeros((self.days + 1, len(self.columns)))
+        self.permits = np.zeros((self.days + 1, len(self.columns)), dtype=np.int32)
+        np.cumsum(self.daily(day, capacity), axis=0, out=self.capacity[1:])
+        np.cumsum(self.daily(day), axis=0, out=self.permits[1:])
+
+    def query(self, start=None, end=None, granularity="month", technology=None, region=None):
+        """Capacity and permits issued per period between start and end (inclusive dates).
+
+        Raises KeyError for an unknown granularity, technology or region.
+        """
+        column = self.column(technology, region)
+        start = self.origin if start is None else pd.Timestamp(start).normalize()
+        end = self.origin + (self.days - 1) * ONE_DAY if end is None else pd.Timestamp(end).normalize()
+        periods, first, last, lo, hi = self.buckets(start, end, granularity)
+
+        capacity = self.capacity[hi, column] - self.capacity[lo, column]
+        permits = self.permits[hi, column] - self.permits[lo, column]
+        cumulative = self.capacity[hi, column]
+        return [
+            {"period": period, "start": period_start, "end": period_end, "capacity_mw": period_capacity,
+             "permits": period_permits, "cumulative_capacity_mw": period_cumulative}
+            for period, period_start, period_end, period_capacity, period_permits, period_cumulative
+            in zip(periods.astype(str), first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d"),
+                   capacity.round(3).tolist(), permits.tolist(), cumulative.round(3).tolist())
+        ]
+
+
+class ActiveCapacity(DailyIndex):
+    """Capacity and permits in force (issued and not yet expired) on every day, by technology and region.
+
+    Each permit is active over [issuance, expiration). A sweep over the interval
+    endpoints (+capacity on issuance, -capacity on expiration) gives the level on
+    every day, so a point-in-time query is one array lookup.
+    """
+
+    def __init__(self, df):
+        issued, expires = df["Permit Issuance Date"], df["Permit Expiration Date"]
+        super().__init__(df, issued.min(), max(issued.max(), expires.max()))
+        start, stop = self.day(issued), self.day(expires)
+        # Permits without an issuance date, or expiring before it, are never in force
+        never = (start < 0) | ((stop >= 0) & (stop <= start))
+        start, stop = np.where(never, -1, start), np.where(never, -1, stop)
+        capacity = np.nan_to_num(pd.to_numeric(df["Installed Capacity (MW)"], errors="coerce").to_numpy(dtype=float))
+        # Row d + 1 holds the level on day d; row 0 (before the first issuance) stays empty
+        self.capacity = np.zeros((self.days + 1, len(self.columns)))
+        self.permits = np.zeros((self.days + 1, len(self.columns)), dtype=np.int32)
+        # (+ 0.0 in the queries turns the -0.0 that rounding can leave after all expirations into 0.0)
+        np.cumsum(self.daily(start, capacity) - self.daily(stop, capacity), axis=0, out=self.capacity[1:])
+        np.cumsum(self.daily(start) - self.daily(stop), axis=0, out=self.permits[1:])
+
+    def row(self, dates):
+        return np.clip(((dates - self.origin) // ONE_DAY) + 1, 0, self.days)
+
+    def on(self, date, technology=None, region=None):
+        """Capacity and permits in force on one date."""
+        column = self.column(technology, region)
+        date = pd.Timestamp(date).normalize()
+        row = self.row(date)
+        return {"date": date.strftime("%Y-%m-%d"), "capacity_mw": round(float(self.capacity[row, column]), 3) + 0.0,
+                "permits": int(self.permits[row, column])}
+
+    def query(self, start=None, end=None, granularity="month", technology=None, region=None):
+        """Capacity and permits in force on the last day of each period between start and end.
+
+        Raises KeyError for an unknown granularity, technology or region.
+        """
+        column = self.column(technology, region)
+        start = self.origin if start is None else pd.Timestamp(start).normalize()
+        end = self.origin + (self.days - 1) * ONE_DAY if end is None else pd.Timestamp(end).normalize()
+        periods, first, last, _, _ = self.buckets(start, end, granularity)
+        rows = self.row(last).to_numpy()
+        return [
+            {"period": period, "date": date, "capacity_mw": capacity, "permits": permits}
+            for period, date, capacity, permits
+            in zip(periods.astype(str), last.strftime("%Y-%m-%d"),
+                   (self.capacity[rows, column].round(3) + 0.0).tolist(), self.permits[rows, column].tolist())
+        ]
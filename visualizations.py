@@ -6,6 +6,10 @@ from streamlit_folium import folium_static
 from folium.plugins import FastMarkerCluster
 import random
 import pandas as pd
+from aggregations import aggregate
+
+PERMIT_COUNT = {"Number of Permits": (None, "size")}
+CAPACITY_SUM = {"Installed Capacity (MW)": ("Installed Capacity (MW)", "sum")}
 
 technology_colors = {
     "Wind Power": "#d9ead3",  # Deep Blue
@@ -18,17 +22,15 @@ technology_colors = {
 }
 
 
-def plot_permit_distribution(df):
+def plot_permit_distribution(df, version=None):
     """Stacked bar chart of permits per region, segmented by Technology, preserving original order WITHOUT hover information."""
 
-    # Ensure correct data types
-    df["Technology"] = df["Technology"].astype(str)
-
-    # **Step 1: Preserve Original Order of Regions**
-    region_order = df["Region"].value_counts().index.tolist()  # Get region order based on count
+    # **Step 1: Aggregate Number of Permits per Region per Technology**
+    permit_counts = aggregate(df, ["Region", "Technology"], PERMIT_COUNT, version=version)
 
-    # **Step 2: Aggregate Number of Permits per Region per Technology**
-    permit_counts = df.groupby(["Region", "Technology"]).size().reset_index(name="Number of Permits")
+    # **Step 2: Preserve Original Order of Regions**
+    region_totals = aggregate(df, ["Region"], PERMIT_COUNT, version=version)
+    region_order = region_totals.sort_values("Number of Permits", ascending=False, kind="stable")["Region"].tolist()  # Get region order based on count
 
     # ✅ **Step 3: Stacked Bar Chart (Preserving Region Order)**
     fig = px.bar(
@@ -63,9 +65,9 @@ def plot_permit_distribution(df):
 
 
 
-def plot_installed_capacity(df):
+def plot_installed_capacity(df, version=None):
     """Pie chart of installed MW per technology."""
-    capacity = df.groupby("Technology")["Installed Capacity (MW)"].sum().reset_index()
+    capacity = aggregate(df, ["Technology"], CAPACITY_SUM, version=version)
 
     fig = px.pie(
         capacity,
@@ -96,9 +98,8 @@ def create_folium_map(df_filtered):
     return greece_map
 
 
-def plot_permits_over_time(df):
-    df["Year"] = df["Application Submission Date"].dt.year
-    permits_per_year = df.groupby("Year").size().reset_index(name="Number of Permits")
+def plot_permits_over_time(df, version=None):
+    permits_per_year = aggregate(df, ["Submission Year"], PERMIT_COUNT, version=version).rename(columns={"Submission Year": "Year"})
 
     fig = go.Figure()
 
@@ -125,11 +126,10 @@ def plot_permits_over_time(df):
     return fig
 
 
-def plot_technology_growth(df):
+def plot_technology_growth(df, version=None):
     """Stacked area chart of technology trends over time WITHOUT fire data."""
 
-    df["Year"] = df["Application Submission Date"].dt.year
-    tech_trends = df.groupby(["Year", "Technology"])["Installed Capacity (MW)"].sum().reset_index()
+    tech_trends = aggregate(df, ["Submission Year", "Technology"], CAPACITY_SUM, version=version).rename(columns={"Submission Year": "Year"})
 
     # ✅ Use px.area to apply color_discrete_map
     fig = px.area(
@@ -190,10 +190,11 @@ def plot_top_permits(df):
 
 
 
-def plot_energy_mix_per_region(df):
+def plot_energy_mix_per_region(df, version=None):
     """Sunburst chart of energy mix per region."""
+    energy_mix = aggregate(df, ["Region", "Technology"], CAPACITY_SUM, version=version)
     fig = px.sunburst(
-        df, path=["Region", "Technology"], values="Installed Capacity (MW)",
+        energy_mix, path=["Region", "Technology"], values="Installed Capacity (MW)",
     )
 
     fig.update_layout(width=600, height=600)  # Square aspect ratio
@@ -201,15 +202,11 @@ def plot_energy_mix_per_region(df):
 
 
 
-def plot_expiring_permits(df):
+def plot_expiring_permits(df, version=None):
     """Stacked bar chart of expiring permits per year, split by Technology."""
 
-    # Ensure correct data types
-    df["Year"] = df["Permit Expiration Date"].dt.year.astype(int)  # Convert to int for sorting
-    df["Technology"] = df["Technology"].astype(str)  # Ensure Technology is string
-
     # Aggregate the number of permits per year per Technology
-    expiration_counts = df.groupby(["Year", "Technology"]).size().reset_index(name="Number of Permits")
+    expiration_counts = aggregate(df, ["Expiration Year", "Technology"], PERMIT_COUNT, version=version).rename(columns={"Expiration Year": "Year"})
 
     # ✅ Use a stacked bar chart to show expiration by Technology
     fig = px.bar(
@@ -236,18 +233,18 @@ def plot_expiring_permits(df):
 
     return fig
 
-def plot_cumulative_installed_capacity(df):
+def plot_cumulative_installed_capacity(df, version=None):
     """Line chart showing cumulative installed capacity over time, including total & per technology."""
 
-    df["Year"] = df["Permit Issuance Date"].dt.year
+    # ✅ Compute cumulative installed capacity per technology
+    tech_capacity = aggregate(df, ["Issuance Year", "Technology"], CAPACITY_SUM, version=version).rename(columns={"Issuance Year": "Year"})
+    tech_capacity["Installed Capacity (MW)"] = tech_capacity.groupby("Technology")["Installed Capacity (MW)"].cumsum()
 
-    # ✅ Compute total cumulative installed capacity
-    total_capacity = df.groupby("Year")["Installed Capacity (MW)"].sum().cumsum().reset_index()
+    # ✅ Compute total cumulative installed capacity (rolled up from the per-technology totals)
+    total_capacity = aggregate(df, ["Issuance Year"], CAPACITY_SUM, version=version).rename(columns={"Issuance Year": "Year"})
+    total_capacity["Installed Capacity (MW)"] = total_capacity["Installed Capacity (MW)"].cumsum()
     total_capacity["Technology"] = "Total"
 
-    # ✅ Compute cumulative installed capacity per technology
-    tech_capacity = df.groupby(["Year", "Technology"])["Installed Capacity (MW)"].sum().groupby(level=1).cumsum().reset_index()
-
     # ✅ Merge total and per-technology capacity
     combined_capacity = pd.concat([total_capacity, tech_capacity], ignore_index=True)
 
@@ -293,11 +290,10 @@ def plot_cumulative_installed_capacity(df):
 
 
 
-def plot_permit_type_distribution(df):
+def plot_permit_type_distribution(df, version=None):
     """Stacked area chart showing the distribution of permit types over time."""
 
-    df["Year"] = df["Application Submission Date"].dt.year
-    permit_trends = df.groupby(["Year", "Technology"]).size().reset_index(name="Number of Permits")
+    permit_trends = aggregate(df, ["Submission Year", "Technology"], PERMIT_COUNT, version=version).rename(columns={"Submission Year": "Year"})
 
     # ✅ Use px.area to apply custom colors
     fig = px.area(
@@ -318,11 +314,11 @@ def plot_permit_type_distribution(df):
 
     return fig
 
-def plot_sankey_permits(df):
+def plot_sankey_permits(df, version=None):
     """Creates a clear and readable Sankey diagram for permits from Regions to Technologies."""
 
     # Group data to count permits per region and technology
-    permit_counts = df.groupby(["Region", "Technology"]).size().reset_index(name="Number of Permits")
+    permit_counts = aggregate(df, ["Region", "Technology"], PERMIT_COUNT, version=version)
 
     # Generate unique labels (regions and technologies)
     all_regions = list(permit_counts["Region"].unique())
@@ -374,15 +370,13 @@ def plot_sankey_permits(df):
 
 
 
-def plot_permit_processing_time(df):
+def plot_permit_processing_time(df, version=None):
     """Line chart showing average permit processing time (submission to issuance) over years."""
 
-    # Compute processing time in days
-    df["Processing Time (Days)"] = (df["Permit Issuance Date"] - df["Application Submission Date"]).dt.days
-
-    # Aggregate by year
-    df["Year"] = df["Application Submission Date"].dt.year
-    processing_time_trends = df.groupby("Year")["Processing Time (Days)"].mean().reset_index()
+    # Average processing time in days (submission to issuance), by year
+    processing_time_trends = aggregate(
+        df, ["Submission Year"], {"Processing Time (Days)": ("Processing Time (Days)", "mean")}, version=version
+    ).rename(columns={"Submission Year": "Year"})
 
     # Create the plot
     fig = px.line(